@@ -1,13 +1,39 @@
-import re
 from datetime import datetime
+from itertools import islice
+from typing import Iterator
 
-from nfog.artwork import Artwork
+from nfog import layout
+from nfog.artwork import Artwork, Frame, pad
 from nfog.templates import Template
 
 
 class MiU(Artwork):
-    @staticmethod
-    def with_template(template: Template) -> str:
+    WIDTH = 70
+
+    ART = Frame(
+        "。                  *              °               °。               +  ",
+        "   *     °。       ⢀⡴⠞⢳                                                ",
+        "      .          ⡔⠋ ⢰⠎    ..      °。         +                *       ",
+        "   °。    .。    ⣼⢆⣤⡞⠃                                  。               ",
+        "        *       ⣼⢠⠋⠁     °。     MiU PROUDLY PRESENTS             °    ",
+        "   。  ⢀⣀⣾⢳    ⢸⢠⠃      .                                 +            ",
+        "  ⣀⡤⠴⠊⠉  ⠈⠳⡀  ⠘⢎⠢⣀⣀⣀       .                °                         ",
+        "  ⠳⣄  ⡠⡤⡀ ⠘⣇⡀   ⠉⠓⠒⠺⠭⢵⣦⡀     *      °。                    °           ",
+        "   ⢹⡆ ⢷⡇⠁  ⣸⠇  。  ⢠⢤  ⠘⢷⣆⡀                    *    .           *      ",
+        "    ⠘⠒⢤⡄⠖⢾⣭⣤⣄ ⡔⢢ ⡀⠎⣸    ⠹⣿⡀  GREETS:                    *             ",
+        "  . ⢀⡤⠜⠃  ⠘⠛⣿⢸ ⡼⢠⠃⣤⡟     ⣿⡇   -RPG, -playWEB, -FLUX             .     ",
+        "    ⠸⠶⠖⢏  ⢀⡤⠤⠇⣴⠏⡾⢱⡏⠁    ⢠⣿⠃                       *       +           ",
+        "       ⠈⣇⡀⠿    ⡽⣰⢶⡼⠇    ⣠⣿⠟    °。    *                                ",
+        "  +.    ⠈⠳⢤⣀⡶⠤⣷⣅⡀   ⣀⡠⢔⠕⠁                     °。     *      。         ",
+        "     。    °。  ⠈⠙⠫⠿⠿⠿⠛⠋⠁   .+     °               .                    "
+    )
+
+    # we have to use center() here, as I actually want it centered
+    TITLE = Frame.centered("{ MiU x nfog }", width=WIDTH)
+    SEPARATOR = Frame.centered("-- --", width=WIDTH)
+
+    @classmethod
+    def lines(cls, template: Template) -> Iterator[str]:
         """
         The Goal of this Artwork Template is to be a stylish "modern" BBCode NFO.
 
@@ -24,66 +50,26 @@ class MiU(Artwork):
         |      how are you      |
         (notice the `.` represents the padded spaces, padding to 11 characters)
         """
-        now = datetime.now().strftime("%Y.%m.%d %H:%M")
-        nfo = template.nfo.splitlines(keepends=False)
-        is_nfo = template.file_ext == ".nfo"
-
-        art = [
-            "。                  *              °               °。               +  ",
-            "   *     °。       ⢀⡴⠞⢳                                                ",
-            "      .          ⡔⠋ ⢰⠎    ..      °。         +                *       ",
-            "   °。    .。    ⣼⢆⣤⡞⠃                                  。               ",
-            "        *       ⣼⢠⠋⠁     °。     MiU PROUDLY PRESENTS             °    ",
-            "   。  ⢀⣀⣾⢳    ⢸⢠⠃      .                                 +            ",
-            "  ⣀⡤⠴⠊⠉  ⠈⠳⡀  ⠘⢎⠢⣀⣀⣀       .                °                         ",
-            "  ⠳⣄  ⡠⡤⡀ ⠘⣇⡀   ⠉⠓⠒⠺⠭⢵⣦⡀     *      °。                    °           ",
-            "   ⢹⡆ ⢷⡇⠁  ⣸⠇  。  ⢠⢤  ⠘⢷⣆⡀                    *    .           *      ",
-            "    ⠘⠒⢤⡄⠖⢾⣭⣤⣄ ⡔⢢ ⡀⠎⣸    ⠹⣿⡀  GREETS:                    *             ",
-            "  . ⢀⡤⠜⠃  ⠘⠛⣿⢸ ⡼⢠⠃⣤⡟     ⣿⡇   -RPG, -playWEB, -FLUX             .     ",
-            "    ⠸⠶⠖⢏  ⢀⡤⠤⠇⣴⠏⡾⢱⡏⠁    ⢠⣿⠃                       *       +           ",
-            "       ⠈⣇⡀⠿    ⡽⣰⢶⡼⠇    ⣠⣿⠟    °。    *                                ",
-            "  +.    ⠈⠳⢤⣀⡶⠤⣷⣅⡀   ⣀⡠⢔⠕⠁                     °。     *      。         ",
-            "     。    °。  ⠈⠙⠫⠿⠿⠿⠛⠋⠁   .+     °               .                    "
-        ]
+        now = layout.center(datetime.now().strftime("%Y.%m.%d %H:%M"), cls.WIDTH)
+        nfo = cls.split_lines(template.lines())
 
-        footer = (
-            # we have to use .center() here, as I actually want it centered
-            x.center(70)
-            for x in (
-                "{ MiU x nfog }",
-                now
-            )
-        )
-
-        release_name_width = len("Release  : ") + len(template.release_name)
-
-        if not is_nfo:
-            nfo = [
-                "[align=center]",
-                *[
-                    [
-                        x.ljust(max(70, [70, release_name_width][" : " in x]), " "),
-                        x  # no need to pad if empty, full of spaces, or ends with a bbcode tag
-                    ][not x or x.count(" ") == len(x) or re.search(r"\[/?\w+?(?:=\w+)?]$", x) is not None]
-                    for x in (
-                        *art,
-                        "",
-                        *nfo,
-                        "\n[hr][/hr]\n",
-                        *footer)
-                ],
-                "[/align]"
-            ]
+        if template.file_ext != ".nfo":
+            release_name_width = max(cls.WIDTH, len("Release  : ") + layout.display_width(template.release_name))
+            yield "[align=center]"
+            yield from cls.ART.padded(cls.WIDTH)
+            yield ""
+            for x in nfo:
+                # pad by display width, so lines with wide characters like 。 line up
+                yield pad(x, release_name_width if " : " in x else cls.WIDTH)
+            yield "\n[hr][/hr]\n"
+            yield from cls.TITLE
+            yield now
+            yield "[/align]"
         else:
-            nfo = [
-                *art,
-                "",
-                *nfo[2:],  # exclude release name
-                "",
-                "-- --".center(70),
-                *footer
-            ]
-
-        nfo = "\n".join(nfo)
-
-        return nfo
+            yield from cls.ART
+            yield ""
+            yield from islice(nfo, 2, None)  # exclude release name
+            yield ""
+            yield from cls.SEPARATOR
+            yield from cls.TITLE
+            yield now
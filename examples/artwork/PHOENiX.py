@@ -1,11 +1,13 @@
+from typing import Iterator
+
 from nfog.artwork import Artwork
 from nfog.templates import Template
 
 
 class PHOENiX(Artwork):
     @staticmethod
-    def with_template(template: Template) -> str:
-        return "\n".join([
+    def lines(template: Template) -> Iterator[str]:
+        yield from [
             "``--.`  :hMMMs`  ..`                            `..  `sMMMh:  `.--``",
             " .-`  :dMMMd-  `.......```                ```.......`  -dMMMd:  `-.",
             "`.  .hMMMMs`          `.---.`         `..---.`          `sMMMMh.  .`",
@@ -40,6 +42,6 @@ class PHOENiX(Artwork):
             "               `..` ------.  ``oMMMMo``  .------ `..`",
             "                 `..-----..  -MmMMMMmM-  ..-----..`",
             "                  `--.`   .+mMMMMMMMMm+.   `.--`",
-            "",
-            *template.nfo.splitlines(keepends=False)
-        ])
+            ""
+        ]
+        yield from template.lines()
@@ -1,11 +1,13 @@
+from typing import Iterator
+
 from nfog.artwork import Artwork
 from nfog.templates import Template
 
 
 class Pikachu(Artwork):
     @staticmethod
-    def with_template(template: Template) -> str:
-        return "\n".join([
+    def lines(template: Template) -> Iterator[str]:
+        yield from [
             "                                  :++++++++++++.",
             "                            .ooooohmmmmmmmmmmmmyooooo",
             "                     +ooooooymmmmmmmmmmmmmmmmmmmmmmmmooooooo:",
@@ -29,6 +31,6 @@ class Pikachu(Artwork):
             "      shhhmy...`     hmmd /mmmdh .ymmmmmmmmmmmmmmmmmmmmmmmmm+",
             "      ```-mdhhh/     hmmh -mmmmm: ymmmmmmmmmmmmmmmmmmmmmmmmm+",
             "          ```/mdddd- hmmmds /mmm: ymmmmmmmmmmmmmmmmmmmmmmmmm+",
-            "",
-            *template.nfo.splitlines(keepends=False)
-        ])
+            ""
+        ]
+        yield from template.lines()
@@ -1,11 +1,13 @@
+from typing import Iterator
+
 from nfog.artwork import Artwork
 from nfog.templates import Template
 
 
 class RPG(Artwork):
     @staticmethod
-    def with_template(template: Template) -> str:
-        return "\n".join([
+    def lines(template: Template) -> Iterator[str]:
+        yield from [
             "``````````````````````````````````````````````````````````````````````",
             "``````````````````````````````````````````````````````````````````````",
             "````````````-ddddddddddddd/`ddddddddddddds````:dddddddddd`````````````",
@@ -24,12 +26,14 @@ class RPG(Artwork):
             "`````````````````````````` PROUDLY PRESENTS ``````````````````````````",
             "``````````````````````````````````````````````````````````````````````",
             "``````````````````````````````````````````````````````````````````````",
-            "",
-            *template.nfo.splitlines(keepends=False),
+            ""
+        ]
+        yield from template.lines()
+        yield from [
             "",
             "RPG is currently looking for DVD REMUXers and DVD suppliers.",
             "Get in contact if you feel you have something to offer.",
             "",
             "``````````````````````````````````````````````````````````````````````",
             "``````````````````````````````````````````````````````````````````````"
-        ])
+        ]
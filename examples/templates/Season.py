@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Any
+from typing import Any, Iterator
 
 import click
 
@@ -11,6 +11,7 @@ class Season(Template):
     """
     [IMDb] NFO Template for full-Season packs.
     The release name will be the parent folder name of the provided file.
+    Provide the Season's folder instead of a file to list the differences between episodes.
 
     Note:
     - This uses IMDb for Title information which might not match packs organized
@@ -26,12 +27,8 @@ class Season(Template):
     def cli(ctx: click.Context, **kwargs: Any) -> Template:
         return Season(**ctx.parent.params, **kwargs)
 
-    @property
-    def nfo(self) -> str:
-        """Generate the NFO string using Template information."""
-        if self._nfo:
-            return self._nfo
-
+    def lines(self) -> Iterator[str]:
+        """Generate the NFO line by line using Template information."""
         season: int = self.args["season"]
 
         title = self.imdb["title"]
@@ -40,79 +37,86 @@ class Season(Template):
         episodes = self.imdb["episodes"][season]
         has_chapters = ["No", "Yes"][bool(self.chapters)]
 
-        self._nfo.extend([
+        yield from [
             self.indented_wrap(self.release_name, 66, "  "),
             "",
             f"  Title    : {title}",
             f"  Type     : {type_} ({year})",
             f"  Season   : {season} ({len(episodes)} Episodes)",
             f"  IMDb     : https://imdb.com/title/tt{self.imdb.movieID}"
-        ])
+        ]
 
         if self.tmdb:
-            self._nfo.append(f"  TMDB     : https://themoviedb.org/tv/{self.tmdb.id}")
+            yield f"  TMDB     : https://themoviedb.org/tv/{self.tmdb.id}"
 
         if self.tvdb:
-            self._nfo.append(f"  TVDB     : https://thetvdb.com/?tab=series&id={self.tvdb}")
+            yield f"  TVDB     : https://thetvdb.com/?tab=series&id={self.tvdb}"
 
-        self._nfo.extend([
+        yield from [
             f"  Preview  : {self.preview}",
             f"  Chapters : {has_chapters}"
-        ])
+        ]
 
         if self.source:
-            self._nfo.extend([
+            yield from [
                 "",
                 "  Source :",
                 self.indented_wrap(self.source, 66, "  ")
-            ])
+            ]
 
         if self.note:
-            self._nfo.extend([
+            yield from [
                 "",
                 "  Note :",
                 self.indented_wrap(self.note, 66, "  ")
-            ])
+            ]
 
-        self._nfo.extend([
+        yield from [
             "",
             f"──┤    Video    ├─────────────────────────────────────────────[ {len(self.video_tracks):0>2} ]──",
             ""
-        ])
+        ]
 
         if self.video_tracks:
             for video in self.video_tracks:
                 for line in self.get_video_summary(video).splitlines(keepends=False):
-                    self._nfo.append(self.indented_wrap(line, 66, "  "))
+                    yield self.indented_wrap(line, 66, "  ")
         else:
-            self._nfo.append("  --")
+            yield "  --"
 
-        self._nfo.extend([
+        yield from [
             "",
             f"──┤    Audio    ├─────────────────────────────────────────────[ {len(self.audio_tracks):0>2} ]──",
             ""
-        ])
+        ]
 
         if self.audio_tracks:
             for audio in self.audio_tracks:
-                self._nfo.append(self.indented_wrap(self.get_audio_summary(audio), 66, "  "))
+                yield self.indented_wrap(self.get_audio_summary(audio), 66, "  ")
         else:
-            self._nfo.append("  --")
+            yield "  --"
 
-        self._nfo.extend([
+        yield from [
             "",
             f"──┤    Subtitles     ├────────────────────────────────────────[ {len(self.text_tracks):0>2} ]──",
             ""
-        ])
+        ]
 
         if self.text_tracks:
             for text in self.text_tracks:
-                self._nfo.append(self.indented_wrap(self.get_subtitle_summary(text), 66, "  "))
+                yield self.indented_wrap(self.get_subtitle_summary(text), 66, "  ")
         else:
-            self._nfo.append("  --")
+            yield "  --"
+
+        if self.episodes:
+            yield from [
+                "",
+                f"──┤    Episodes    ├──────────────────────────────────────────[ {len(self.episodes):0>2} ]──",
+                ""
+            ]
 
-        self._nfo = "\n".join(self._nfo)
-        return self._nfo
+            for line in self.get_episode_summary():
+                yield self.indented_wrap(line, 66, "  ")
 
     @property
     def release_name(self) -> str:
@@ -1 +1,5 @@
 __version__ = "1.1.0"
+
+from nfog.api import Result, generate, generate_many  # noqa: E402
+
+__ALL__ = (Result, generate, generate_many)
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from abc import abstractmethod
+from typing import Any
+
+
+class Analyzer:
+    """
+    Analysis of a media file's bytes, fed to it in order by a `Pipeline`.
+
+    Analyzers never read the file themselves, so any amount of them share one
+    sequential pass over it. `update()` is called with each chunk of the file,
+    from start to end, then `result()` once. Results must be JSON-serializable
+    data, as they are cached and saved in snapshots. Results of analyzers with
+    PERSIST, e.g., hashes, are also saved to disk, so they're never computed again
+    for the same file, even by later runs.
+
+    Register an Analyzer with `register()` to make it available by its NAME.
+    """
+
+    NAME: str
+    PERSIST = False
+
+    @abstractmethod
+    def update(self, data: bytes) -> None:
+        """Analyze the next chunk of the file."""
+
+    @abstractmethod
+    def result(self) -> Any:
+        """Get the result once the whole file was analyzed."""
+
+
+class StartCodeAnalyzer(Analyzer):
+    """
+    Analyzer of MPEG start codes (`00 00 01 xx`) found anywhere in the file.
+
+    Matches are passed to `match()` with at least SIZE bytes from the start code
+    onwards, even when a start code is split across chunks.
+    """
+
+    SIZE = 4
+
+    def __init__(self) -> None:
+        self._tail = b""
+
+    @abstractmethod
+    def match(self, data: bytes, i: int) -> None:
+        """Handle the start code at `data[i]`, with `data[i:i + SIZE]` available."""
+
+    def update(self, data: bytes) -> None:
+        size = self.SIZE
+        if self._tail:
+            if len(data) >= size - 1:
+                # start codes beginning within the last chunk's unprocessed tail
+                self._search(self._tail + data[:size - 1], len(self._tail))
+            else:
+                # too small to complete the tail, e.g., the end of the file
+                data = self._tail + data
+        end = len(data) - size + 1
+        self._search(data, end)
+        self._tail = data[max(end, 0):]
+
+    def _search(self, data: bytes, end: int) -> None:
+        end = min(end, len(data) - self.SIZE + 1)
+        i = data.find(b"\x00\x00\x01", 0, end + 2)
+        while 0 <= i < end:
+            self.match(data, i)
+            i = data.find(b"\x00\x00\x01", i + 3, end + 2)
+
+
+__ALL__ = (Analyzer, StartCodeAnalyzer)
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Sequence
+
+from nfog.analyzers.Pipeline import analyze, check_names
+from nfog.config import config
+from nfog.timing import Timings, span
+
+Checksums = Dict[Path, Dict[str, str]]  # file -> analyzer name -> digest
+
+CHECKSUMS = ("crc32", "sha256")
+# files hashed at a time, each is still read once, sequentially, for every checksum
+WORKERS = int(config.get("checksums", {}).get("workers", min(4, os.cpu_count() or 1)))
+
+
+def get_checksums(paths: Iterable[Path], names: Sequence[str] = CHECKSUMS, workers: int = WORKERS) -> Checksums:
+    """
+    Get checksums of many files by analyzer name, e.g., 'crc32' and 'sha256'.
+
+    Files are hashed concurrently on a thread pool, as hashlib and zlib release the
+    GIL, each in a single pass of large unbuffered reads feeding every checksum (see
+    `Pipeline`). Digests are saved to disk keyed by the file's path, size, modification
+    time, and inode, so unchanged files are never hashed again, even by later runs.
+    """
+    paths = list(dict.fromkeys(paths))
+    names = list(names)
+    check_names(names)
+    with span("checksums", files=len(paths)):
+        if len(paths) <= 1 or workers <= 1:
+            return {x: analyze(x, names) for x in paths}
+        with ThreadPoolExecutor(min(workers, len(paths)), thread_name_prefix="nfog-checksum") as pool:
+            return dict(zip(paths, pool.map(Timings.bind(lambda x: analyze(x, names)), paths)))
+
+
+def format_sfv(checksums: Checksums, root: Optional[Path] = None) -> str:
+    """
+    Format the CRC32 checksums of files as an SFV file, with paths relative to `root`,
+    defaulting to the folder the files have in common.
+    """
+    if root is None and checksums:
+        root = Path(os.path.commonpath([x.parent for x in checksums]))
+    lines = ["; Generated by nfog"]
+    for path, digests in checksums.items():
+        try:
+            name = path.relative_to(root).as_posix() if root else path.name
+        except ValueError:
+            name = path.name
+        lines.append(f"{name} {digests['crc32']}")
+    return "\n".join(lines) + "\n"
+
+
+__ALL__ = (CHECKSUMS, Checksums, format_sfv, get_checksums)
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import hashlib
+import zlib
+
+from nfog.analyzers.Analyzer import Analyzer
+
+
+class Hash(Analyzer):
+    """Hex digest of the file by a hashlib ALGORITHM, e.g., 'sha256'."""
+
+    ALGORITHM: str
+    PERSIST = True
+
+    def __init__(self) -> None:
+        self._hash = hashlib.new(self.ALGORITHM)
+
+    def update(self, data: bytes) -> None:
+        # hashlib releases the GIL for large chunks, so hashes run alongside other analyzers
+        self._hash.update(data)
+
+    def result(self) -> str:
+        return self._hash.hexdigest()
+
+
+class MD5(Hash):
+    NAME = ALGORITHM = "md5"
+
+
+class SHA1(Hash):
+    NAME = ALGORITHM = "sha1"
+
+
+class SHA256(Hash):
+    NAME = ALGORITHM = "sha256"
+
+
+class CRC32(Analyzer):
+    """CRC-32 of the file as 8 upper-case hex digits, as used by SFV files."""
+
+    NAME = "crc32"
+    PERSIST = True
+
+    def __init__(self) -> None:
+        self._crc = 0
+
+    def update(self, data: bytes) -> None:
+        self._crc = zlib.crc32(data, self._crc)
+
+    def result(self) -> str:
+        return f"{self._crc:08X}"
+
+
+__ALL__ = (Hash, MD5, SHA1, SHA256, CRC32)
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional
+
+from nfog.analyzers.Analyzer import Analyzer, StartCodeAnalyzer
+from nfog.analyzers.TransportStream import SYNC, PIDProfile, TransportStreamError
+
+# stream IDs of MPEG video PES packets, as single bytes
+VIDEO_STREAM_IDS = frozenset(bytes([x]) for x in range(0xE0, 0xF0))
+
+
+class PictureScan(StartCodeAnalyzer):
+    """
+    Counts picture start codes (`00 00 01 00`) and the progressive frame flags of
+    MPEG-2 picture coding extensions (`00 00 01 B5`, extension ID 8) of an MPEG-1/2
+    video stream, or of a container that keeps it contiguous, e.g., a program stream.
+    """
+
+    SIZE = 9  # start code, extension ID and f_codes, up to the progressive_frame flag
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.pictures = 0
+        self.extensions = 0
+        self.progressive = 0
+
+    def match(self, data: bytes, i: int) -> None:
+        code = data[i + 3]
+        if code == 0x00:
+            self.pictures += 1
+        elif code == 0xB5 and data[i + 4] >> 4 == 0x8:
+            self.extensions += 1
+            self.progressive += data[i + 8] >> 7
+
+    def result(self) -> Dict[str, int]:
+        if not self.extensions:
+            return {"frames": self.pictures, "progressive": self.pictures}
+        return {"frames": self.extensions, "progressive": self.progressive}
+
+
+class MPEGScan(Analyzer):
+    """
+    Scan type of MPEG-1/2 video from the `progressive_frame` flag of every picture.
+
+    Like DGIndex, every picture and MPEG-2 picture coding extension is counted, see
+    `PictureScan`. MPEG-1 has no picture coding extensions, and its pictures are
+    always progressive.
+
+    Transport streams (TS, or M2TS of Blu-rays) split the video into 188-byte packets,
+    whose headers would break up, or fake, start codes. Their packets are demuxed, and
+    the payloads of each PID carrying a video PES stream are scanned on their own.
+    Anything else, e.g., program streams (VOB, MPG) or elementary streams, is scanned
+    as-is.
+    """
+
+    NAME = "mpeg-scan"
+
+    def __init__(self) -> None:
+        self.packet_size: Optional[int] = None  # of a transport stream, 0 if it's not one
+        self._scans: Dict[Optional[int], PictureScan] = {}  # video PID, or None if not demuxed -> scan
+        self._rest = b""  # start of a packet split across chunks
+
+    def update(self, data: bytes) -> None:
+        if self.packet_size is None:
+            try:
+                self.packet_size = PIDProfile.get_packet_size(data)
+            except TransportStreamError:
+                self.packet_size = 0
+        if not self.packet_size:
+            scan = self._scans.get(None)
+            if scan is None:
+                scan = self._scans[None] = PictureScan()
+            scan.update(data)
+            return
+
+        if self._rest:
+            data = self._rest + data
+        size = self.packet_size
+        end = len(data) - len(data) % size
+        self._rest = data[end:]
+
+        # payloads of each video PID within this chunk, scanned at once
+        payloads: Dict[int, List[bytes]] = {}
+        for header in range(size - 188, end, size):
+            if data[header] != SYNC:
+                continue
+            flags = data[header + 3]
+            if not flags & 0x10:
+                continue  # no payload
+            pid = ((data[header + 1] & 0x1F) << 8) | data[header + 2]
+            start = header + 4
+            if flags & 0x20:
+                start += 1 + data[header + 4]  # adaptation field
+            stop = header + 188
+            if start >= stop:
+                continue
+            if pid not in payloads:
+                if pid not in self._scans:
+                    # only PIDs found starting a video PES packet (stream ID 0xE0-0xEF)
+                    if not data[header + 1] & 0x40 or data[start:start + 3] != b"\x00\x00\x01" \
+                            or data[start + 3:start + 4] not in VIDEO_STREAM_IDS:
+                        continue
+                    self._scans[pid] = PictureScan()
+                payloads[pid] = []
+            payloads[pid].append(data[start:stop])
+
+        for pid, parts in payloads.items():
+            self._scans[pid].update(b"".join(parts))
+
+    def result(self) -> Dict[str, int]:
+        results = [x.result() for x in self._scans.values()]
+        return {
+            "frames": sum(x["frames"] for x in results),
+            "progressive": sum(x["progressive"] for x in results)
+        }
+
+
+__ALL__ = (MPEGScan, PictureScan)
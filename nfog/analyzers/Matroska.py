@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import struct
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from nfog.analyzers.Analyzer import Analyzer
+from nfog.analyzers.Pipeline import analyze, get_cached
+from nfog.config import config
+
+EBML = 0x1A45DFA3
+SEGMENT = 0x18538067
+INFO = 0x1549A966
+TIMESTAMP_SCALE = 0x2AD7B1
+DURATION = 0x4489
+CLUSTER = 0x1F43B675
+TIMESTAMP = 0xE7
+SIMPLE_BLOCK = 0xA3
+BLOCK_GROUP = 0xA0
+BLOCK = 0xA1
+
+# master elements walked into, every other element is skipped without reading it
+MASTERS = {SEGMENT, INFO, CLUSTER, BLOCK_GROUP}
+
+BlockStats = Dict[int, Dict[str, Any]]  # track number -> stats
+
+# seconds of the sliding window a peak bitrate is measured over
+PEAK_WINDOW = float(config.get("analyzers", {}).get("peak-window", 1.0))
+
+
+class MatroskaError(ValueError):
+    pass
+
+
+def read_vint(data: bytes, offset: int, mask: bool = True) -> Tuple[int, int, bool]:
+    """
+    Read an EBML variable-length integer, e.g., an element ID (`mask=False`) or size.
+    Returns the value, its length in bytes, and if it's the reserved unknown size.
+    Raises IndexError if it's cut off by the end of the data.
+    """
+    first = data[offset]
+    if not first:
+        raise MatroskaError(f"Invalid EBML variable-length integer at {offset}.")
+    length = 9 - first.bit_length()
+    if offset + length > len(data):
+        raise IndexError("The EBML variable-length integer is cut off.")
+    value = int.from_bytes(data[offset:offset + length], "big")
+    if not mask:
+        return value, length, False
+    value &= (1 << (7 * length)) - 1
+    return value, length, value == (1 << (7 * length)) - 1
+
+
+class BlockScanner(Analyzer):
+    """
+    Walk the Clusters of a Matroska (or WebM) file, reading only the headers of its blocks.
+
+    Every element that isn't needed is skipped by its size, across chunks of the file
+    if need be, so block payloads are never decoded. Each block's size is counted
+    towards its track number, which is the track ID MediaInfo reports for Matroska,
+    along with its timestamp to find the track's duration and peak bitrate. It runs
+    in the same `Pipeline` pass as any other analysis of the file, e.g., checksums.
+    """
+
+    NAME = "mkv-blocks"
+    SKIP_REST = 1 << 63  # bytes to skip after an element of unknown size that isn't walked into
+
+    def __init__(self, window: float = PEAK_WINDOW):
+        self.window = window
+        self.timestamp_scale = 1_000_000  # nanoseconds per timestamp tick
+        self.duration: Optional[float] = None
+        self.error: Optional[str] = None  # why the walk stopped, e.g., it's not a Matroska file
+        # track number -> blocks, bytes, first and last timestamp, peak window bytes, and the window's blocks
+        self._tracks: Dict[int, list[Any]] = {}
+        self._started = False
+        self._cluster_time = 0
+        self._skip = 0  # bytes left of an element being skipped
+        self._skipping: Optional[list[Any]] = None  # stats of the track whose block is being skipped
+        self._rest = b""  # the start of an element split across chunks
+
+    def update(self, data: bytes) -> None:
+        if self.error is not None:
+            return
+        if self._rest:
+            data = self._rest + data
+        try:
+            done = self._walk(data)
+        except MatroskaError as e:
+            # e.g., a corrupt file, use the blocks found so far
+            self.error = str(e)
+            self._rest = b""
+            return
+        self._rest = data[done:]
+
+    def result(self) -> Optional[BlockStats]:
+        # a truncated or still downloading file uses the blocks found so far
+        if not self._started or (self.error is not None and not self._tracks):
+            return None
+        if self._skip and self._skipping is not None and self._skip != self.SKIP_REST:
+            # only count the bytes of a cut-off block that are in the file
+            self._skipping[1] -= self._skip
+        return self.results()
+
+    def _walk(self, data: bytes) -> int:
+        """Walk the elements of a chunk, returning where the first element it can't read yet starts."""
+        # master elements are stepped into rather than recursed, as their children are only
+        # needed one at a time, which also handles unknown-size Clusters of live recordings
+        offset = min(self._skip, len(data))
+        self._skip -= offset
+        end = len(data)
+        if not self._started:
+            if end < 4:
+                return 0
+            if int.from_bytes(data[:4], "big") != EBML:
+                raise MatroskaError("Not a Matroska file.")
+            self._started = True
+        while offset < end:
+            try:
+                element, id_length, _ = read_vint(data, offset, mask=False)
+                size, size_length, unknown = read_vint(data, offset + id_length)
+            except IndexError:
+                return offset
+            start = offset + id_length + size_length
+
+            if element in MASTERS:
+                if element == CLUSTER:
+                    self._cluster_time = 0
+                offset = start
+                continue
+            if element in (SIMPLE_BLOCK, BLOCK):
+                # the track number, of up to 8 bytes, and the timestamp
+                needed = min(size, 10)
+            elif element in (TIMESTAMP, TIMESTAMP_SCALE, DURATION):
+                if size > 8:
+                    raise MatroskaError(f"Invalid size of element {element:#x}: {size}.")
+                needed = size
+            else:
+                needed = 0
+            if start + needed > end:
+                return offset
+
+            stats = None
+            if element == TIMESTAMP:
+                self._cluster_time = int.from_bytes(data[start:start + size], "big")
+            elif element in (SIMPLE_BLOCK, BLOCK):
+                stats = self._block(data[start:start + needed], size)
+            elif element == TIMESTAMP_SCALE:
+                self.timestamp_scale = int.from_bytes(data[start:start + size], "big")
+            elif element == DURATION:
+                self.duration = struct.unpack(">f" if size == 4 else ">d", data[start:start + size])[0]
+
+            if unknown:
+                self._skip = self.SKIP_REST
+                return end
+            offset = start + size
+            if offset > end:
+                self._skip = offset - end
+                self._skipping = stats
+                return end
+        return offset
+
+    def _block(self, header: bytes, size: int) -> list[Any]:
+        track, length, _ = read_vint(header, 0)
+        timestamp = self._cluster_time + int.from_bytes(header[length:length + 2], "big", signed=True)
+        size -= length + 3  # track number, timestamp, flags
+
+        stats = self._tracks.get(track)
+        if stats is None:
+            stats = self._tracks[track] = [0, 0, timestamp, timestamp, 0, 0, deque()]
+        stats[0] += 1
+        stats[1] += size
+        stats[2] = min(stats[2], timestamp)
+        stats[3] = max(stats[3], timestamp)
+
+        # bytes within a sliding window of `window` seconds ending at this block
+        window: Deque[Tuple[int, int]] = stats[6]
+        window.append((timestamp, size))
+        stats[5] += size
+        ticks = self.window * 1e9 / self.timestamp_scale
+        while window[0][0] <= timestamp - ticks:
+            stats[5] -= window.popleft()[1]
+        stats[4] = max(stats[4], stats[5])
+        return stats
+
+    def results(self) -> BlockStats:
+        """Get the blocks, bytes, duration in seconds, and average and peak bitrate in bits/s of each track."""
+        scale = self.timestamp_scale / 1e9
+        results = {}
+        for track, (blocks, size, first, last, peak, _, _) in sorted(self._tracks.items()):
+            duration = (self.duration * scale) if self.duration else (last - first) * scale
+            results[track] = {
+                "blocks": blocks,
+                "bytes": size,
+                "duration": round(duration, 3),
+                "bitrate": round(size * 8 / duration) if duration else None,
+                "peak_bitrate": round(peak * 8 / self.window)
+            }
+        return results
+
+
+def get_block_stats(path: Path) -> Optional[BlockStats]:
+    """
+    Get the block statistics of every track of a Matroska file, see `BlockScanner`,
+    or None if it's not a Matroska file. Results are cached until the file changes,
+    and used as-is if the file no longer exists, e.g., when rendering a snapshot.
+    """
+    def scan() -> Optional[BlockStats]:
+        stats: Optional[BlockStats] = analyze(path, [BlockScanner.NAME])[BlockScanner.NAME]
+        return stats
+
+    return get_cached("blocks", path, scan)
+
+
+def format_bitrate(bitrate: int) -> str:
+    """Format a bitrate in bits/s like MediaInfo, e.g., '6 542 kb/s'."""
+    if bitrate >= 10_000_000:
+        return f"{bitrate / 1_000_000:.1f} Mb/s"
+    if bitrate >= 1000:
+        return f"{round(bitrate / 1000):,} kb/s".replace(",", " ")
+    return f"{bitrate} b/s"
+
+
+__ALL__ = (BlockScanner, BlockStats, MatroskaError, format_bitrate, get_block_stats)
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+from nfog.analyzers.Analyzer import StartCodeAnalyzer
+
+
+class PESSizes(StartCodeAnalyzer):
+    """
+    Packet size statistics of every PES stream, e.g., of an MPEG program stream (VOB, MPG).
+
+    Returns the amount of packets, and the total, smallest, largest, and average size
+    in bytes per stream ID as a hex string, e.g., 'E0' for the first video stream.
+    Packets of unbounded length (0), used by video in transport streams, are counted
+    but have no size.
+    """
+
+    NAME = "pes-sizes"
+    SIZE = 6  # start code, stream ID, PES_packet_length
+
+    # private stream 1 (0xBD), audio (0xC0-0xDF), video (0xE0-0xEF)
+    STREAM_IDS = frozenset([0xBD, *range(0xC0, 0xF0)])
+
+    def __init__(self) -> None:
+        super().__init__()
+        # stream ID -> packets, unbounded packets, total, smallest, largest
+        self.streams: Dict[int, List[int]] = {}
+
+    def match(self, data: bytes, i: int) -> None:
+        stream_id = data[i + 3]
+        if stream_id not in self.STREAM_IDS:
+            return
+        size = (data[i + 4] << 8) | data[i + 5]
+        stats = self.streams.get(stream_id)
+        if stats is None:
+            stats = self.streams[stream_id] = [0, 0, 0, 0xFFFF, 0]
+        stats[0] += 1
+        if not size:
+            stats[1] += 1
+            return
+        stats[2] += size
+        stats[3] = min(stats[3], size)
+        stats[4] = max(stats[4], size)
+
+    def result(self) -> Dict[str, Dict[str, Any]]:
+        results = {}
+        for stream_id, (packets, unbounded, total, smallest, largest) in sorted(self.streams.items()):
+            sized = packets - unbounded
+            results[f"{stream_id:02X}"] = {
+                "packets": packets,
+                "bytes": total,
+                "min": smallest if sized else None,
+                "max": largest if sized else None,
+                "average": round(total / sized, 1) if sized else None
+            }
+        return results
+
+
+__ALL__ = (PESSizes,)
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Sequence, Tuple, Type
+
+from nfog.analyzers.Analyzer import Analyzer
+from nfog.cache import Cache
+from nfog.config import Directories, config
+from nfog.timing import span
+
+ANALYZERS: Dict[str, Type[Analyzer]] = {}
+CHUNK_SIZE = int(config.get("analyzers", {}).get("chunk-size", 8 * 1024 * 1024))
+RESULTS_DIR = Directories.cache / "analysis"
+
+Signature = Tuple[int, int, int]  # size, modification time, inode
+
+# path -> lock of its analysis, and how many callers are using it, dropped once none are
+_locks: Dict[str, Tuple[threading.Lock, int]] = {}
+_lock = threading.Lock()
+
+
+def register(analyzer: Type[Analyzer]) -> Type[Analyzer]:
+    """Make an Analyzer available by its NAME, e.g., to `analyze()` and `Template.ANALYZERS`."""
+    ANALYZERS[analyzer.NAME] = analyzer
+    return analyzer
+
+
+class Pipeline:
+    """
+    Single sequential pass over a file, feeding every chunk to many Analyzers.
+
+    Chunks are read ahead on a background thread while the analyzers work on the
+    previous chunk, and the analyzers of a chunk run concurrently when there's
+    more than one, e.g., hashes, which release the GIL. However many analyzers
+    there are, the file is only read once.
+    """
+
+    def __init__(self, path: Path, analyzers: Sequence[Analyzer], chunk_size: int = CHUNK_SIZE):
+        self.path = path
+        self.analyzers = list(analyzers)
+        self.chunk_size = chunk_size
+
+    def chunks(self) -> Iterator[bytes]:
+        """Read the file chunk by chunk, reading up to two chunks ahead on another thread."""
+        chunks: queue.Queue[Any] = queue.Queue(maxsize=2)
+        stop = threading.Event()
+
+        def read() -> None:
+            try:
+                with open(self.path, "rb", buffering=0) as f:
+                    if hasattr(os, "posix_fadvise"):
+                        os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                    while not stop.is_set():
+                        chunk = f.read(self.chunk_size)
+                        chunks.put(chunk)
+                        if not chunk:
+                            return
+            except Exception as e:
+                chunks.put(e)
+
+        reader = threading.Thread(target=read, name="nfog-analyze-read", daemon=True)
+        reader.start()
+        try:
+            while True:
+                chunk = chunks.get()
+                if isinstance(chunk, Exception):
+                    raise chunk
+                if not chunk:
+                    return
+                yield chunk
+        finally:
+            stop.set()
+            while reader.is_alive():
+                # unblock the reader if it's waiting for room
+                try:
+                    chunks.get_nowait()
+                except queue.Empty:
+                    reader.join(0.01)
+
+    def run(self) -> Dict[str, Any]:
+        """Feed the whole file to every analyzer, and get their results by name."""
+        with span("analyze", file=self.path.name, analyzers=",".join(x.NAME for x in self.analyzers)):
+            if len(self.analyzers) == 1:
+                update = self.analyzers[0].update
+                for chunk in self.chunks():
+                    update(chunk)
+            else:
+                with ThreadPoolExecutor(len(self.analyzers), thread_name_prefix="nfog-analyze") as pool:
+                    for chunk in self.chunks():
+                        # list() to wait for, and raise errors of, every analyzer before the next chunk
+                        list(pool.map(lambda analyzer: analyzer.update(chunk), self.analyzers))
+            return {x.NAME: x.result() for x in self.analyzers}
+
+
+def get_signature(path: Path) -> Optional[Signature]:
+    """Get what identifies the contents of a file without reading it, or None if it doesn't exist."""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+
+def get_cached(namespace: str, path: Path, factory: Callable[[], Any]) -> Any:
+    """
+    Get the cached result of `factory` for a file, calling it if the file changed since.
+    If the file no longer exists, e.g., when rendering a snapshot, the cached result is used.
+    """
+    key = str(path)
+    signature = get_signature(path)
+
+    def compute() -> Tuple[Optional[Signature], Any]:
+        return signature, factory()
+
+    cached = Cache.get(namespace, key, compute)
+    if signature is not None and cached[0] != signature:
+        cached = compute()
+        Cache.set(namespace, key, cached)
+    return cached[1]
+
+
+def want(path: Path, names: Iterable[str]) -> None:
+    """
+    Ask for analyzers to run on a file whenever it's analyzed, so they share the
+    pass of whatever analysis is needed first, e.g., the scan type of the video.
+    """
+    check_names(names)
+    with _lock:
+        # a bounded namespace, as files may be wanted but never analyzed, e.g., by `nfo watch`
+        Cache.get("wanted", str(path), dict).update(dict.fromkeys(names))
+
+
+def analyze(path: Path, names: Iterable[str]) -> Dict[str, Any]:
+    """
+    Get the results of analyzers on a file by name, see `register()`.
+
+    Results are cached per file until it changes. Any that are missing, and any
+    others wanted for the file (see `want()`), are computed together in a single
+    pass over the file. If the file no longer exists, e.g., when rendering a
+    snapshot, the cached results are used.
+    """
+    names = list(names)
+    check_names(names)
+    key = str(path)
+    with _lock:
+        path_lock, users = _locks.get(key, (threading.Lock(), 0))
+        _locks[key] = (path_lock, users + 1)
+
+    try:
+        with path_lock:
+            return _analyze(path, key, names)
+    finally:
+        with _lock:
+            path_lock, users = _locks[key]
+            if users > 1:
+                _locks[key] = (path_lock, users - 1)
+            else:
+                del _locks[key]
+
+
+def _analyze(path: Path, key: str, names: Sequence[str]) -> Dict[str, Any]:
+    # must be called with the path's lock held
+    signature = get_signature(path)
+    cached: Optional[Tuple[Optional[Signature], Dict[str, Any]]] = Cache.peek("analysis", key)
+    if cached and (signature is None or cached[0] == signature):
+        results = cached[1]
+    else:
+        # e.g., hashes from a previous run, see `Analyzer.PERSIST`
+        results = load_results(path, signature) if signature else {}
+        if results:
+            Cache.set("analysis", key, (signature, results))
+
+    missing = [x for x in names if x not in results]
+    if missing:
+        if signature is None:
+            raise FileNotFoundError(f"Cannot analyze {path}, it does not exist.")
+        with _lock:
+            # wanted analyzers run in this pass, so they're no longer wanted
+            wanted = Cache.pop("wanted", key) or {}
+        missing = [x for x in dict.fromkeys([*missing, *wanted]) if x not in results]
+        results = {**results, **Pipeline(path, [ANALYZERS[x]() for x in missing]).run()}
+        Cache.set("analysis", key, (signature, results))
+        if any(ANALYZERS[x].PERSIST for x in missing):
+            save_results(path, signature, results)
+
+    return {x: results[x] for x in names}
+
+
+def get_results_path(path: Path) -> Path:
+    """Get where the persisted results of analyzers on a file are saved."""
+    key = hashlib.sha256(str(path.resolve()).encode("utf8")).hexdigest()
+    return RESULTS_DIR / key[:2] / f"{key}.json"
+
+
+def load_results(path: Path, signature: Signature) -> Dict[str, Any]:
+    """Load the persisted results of analyzers on a file, if it's unchanged since they were saved."""
+    results_path = get_results_path(path)
+    if not results_path.is_file():
+        return {}
+    try:
+        data = json.loads(results_path.read_text(encoding="utf8"))
+    except ValueError:
+        return {}
+    if data.get("path") != str(path.resolve()) or tuple(data.get("signature") or ()) != signature:
+        return {}
+    return {k: v for k, v in data["results"].items() if k in ANALYZERS}
+
+
+def save_results(path: Path, signature: Signature, results: Dict[str, Any]) -> None:
+    """Save the results of analyzers with PERSIST on a file, keyed by its path and signature."""
+    results_path = get_results_path(path)
+    results_path.parent.mkdir(parents=True, exist_ok=True)
+    temp = results_path.with_suffix(f".{threading.get_ident()}.tmp")
+    temp.write_text(json.dumps({
+        "path": str(path.resolve()),
+        "signature": signature,
+        "results": {k: v for k, v in results.items() if k in ANALYZERS and ANALYZERS[k].PERSIST}
+    }), encoding="utf8")
+    temp.replace(results_path)
+
+
+def check_names(names: Iterable[str]) -> None:
+    unknown = [x for x in names if x not in ANALYZERS]
+    if unknown:
+        raise ValueError(f"Unknown analyzers: {', '.join(unknown)}, expected any of {', '.join(ANALYZERS)}.")
+
+
+__ALL__ = (ANALYZERS, Pipeline, analyze, get_cached, get_signature, load_results, register, save_results, want)
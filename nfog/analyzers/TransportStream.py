@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+import mmap
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
+
+from nfog.analyzers.Analyzer import Analyzer
+from nfog.analyzers.Pipeline import analyze, get_cached
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:  # optional, see `PIDProfile`
+    HAS_NUMPY = False
+
+if TYPE_CHECKING:
+    from numpy.typing import NDArray
+
+    Packets = NDArray[np.uint8]  # 2D, a row per packet
+    Ticks = NDArray[np.int64]
+
+PacketStats = Dict[int, Dict[str, Any]]  # PID -> stats
+
+SYNC = 0x47
+CLOCK = 27_000_000  # Hz of the PCR and M2TS arrival timestamps
+ATS_WRAP = 1 << 30
+PCR_WRAP = (1 << 33) * 300
+MAX_PCR_GAP = CLOCK  # PCRs are at most 100 ms apart, a longer step between them is a discontinuity
+
+
+class TransportStreamError(ValueError):
+    pass
+
+
+class PIDProfile(Analyzer):
+    """
+    Per-PID byte counts and bitrate over time of an MPEG transport stream (TS, or M2TS of Blu-rays).
+
+    Chunks of the file are viewed as arrays of 188-byte (TS) or 192-byte (M2TS) packets,
+    and the PID, payload size, and time of every packet are found with vectorized
+    NumPy operations over the whole chunk, so there's no Python code per packet.
+    Packet times come from the arrival timestamps of M2TS packets, or are interpolated
+    between the PCRs of TS packets. It runs in the same `Pipeline` pass as any other
+    analysis of the file, e.g., its MPEG-2 scan type or checksums.
+
+    Only the elementary stream is counted, i.e., the payload of each packet without
+    its header, adaptation field (including stuffing), or the header of a PES packet
+    starting within it, so bitrates are comparable to MediaInfo's stream bitrates.
+
+    Requires NumPy, e.g., `pip install nfog[fast]`, otherwise the result is None.
+    """
+
+    NAME = "ts-packets"
+    MAX_PENDING = 64 * 1024 * 1024  # bytes of packets kept waiting for a PCR to time them
+
+    def __init__(self) -> None:
+        self.packet_size = 0
+        self.duration = 0.0
+        self.error: Optional[str] = None  # why it's not profiled, e.g., it's not a transport stream
+        # PID -> packets, elementary stream bytes, and bytes per second
+        self._packets: Dict[int, int] = {}
+        self._bytes: Dict[int, int] = {}
+        self._seconds: Dict[int, Ticks] = {}
+        self._clock: Optional[Tuple[int, int]] = None  # last (packet index, unwrapped 27 MHz time)
+        self._first: Optional[int] = None
+        self._rest = b""  # packets left to profile, e.g., after the last PCR, and the start of a split packet
+        self._index = 0  # of the first packet in `_rest`
+
+    def update(self, data: bytes) -> None:
+        if self.error is not None:
+            return
+        try:
+            if not HAS_NUMPY:
+                raise TransportStreamError("NumPy is required to profile transport streams, install it with pip.")
+            if not self.packet_size:
+                # wait for enough of the file to find the sync bytes of its first packets
+                self._rest += data
+                if len(self._rest) < 192 * 4:
+                    return
+                self.packet_size = self.get_packet_size(self._rest)
+                data = b""
+            self._feed(data, final=False)
+        except TransportStreamError as e:
+            self.error = str(e)
+            self._rest = b""
+
+    def result(self) -> Optional[PacketStats]:
+        if self.error is None:
+            try:
+                if not self.packet_size:
+                    self.packet_size = self.get_packet_size(self._rest)
+                self._feed(b"", final=True)
+            except TransportStreamError as e:
+                self.error = str(e)
+        if self.error is not None:
+            return None
+        return self.results()
+
+    @staticmethod
+    def get_packet_size(data: Union[bytes, mmap.mmap]) -> int:
+        """Get the packet size from where the sync bytes of the first packets are."""
+        for size, offset in ((188, 0), (192, 4)):
+            if len(data) >= size * 4 and all(data[offset + size * i] == SYNC for i in range(4)):
+                return size
+        raise TransportStreamError("Not an MPEG transport stream, the packets are not in sync.")
+
+    def _feed(self, data: bytes, final: bool) -> None:
+        """Profile every whole packet of `_rest` and data that can be timed, keeping the rest for later."""
+        data = self._rest + data if self._rest else data
+        size = self.packet_size
+        count = len(data) // size
+        done = 0
+        if count:
+            packets = np.frombuffer(data, np.uint8, count * size).reshape(count, size)
+            done = self._profile(packets, self._index, final)
+        self._index += done
+        self._rest = data[done * size:]
+        if len(self._rest) > self.MAX_PENDING:
+            raise TransportStreamError("There are no PCRs to time the packets with.")
+
+    def _profile(self, chunk: Packets, start: int, final: bool) -> int:
+        """Profile a chunk of packets. Returns how many were profiled, the rest are left for the next chunk."""
+        if self.packet_size == 192:
+            ticks = self._arrival_times(chunk)
+        else:
+            ticks = self._pcr_times(chunk, start, final)
+            if not len(ticks):
+                return 0
+            chunk = chunk[:len(ticks)]
+        ts = chunk[:, -188:]
+        pids = ((ts[:, 1].astype(np.int64) & 0x1F) << 8) | ts[:, 2]
+        sizes = self._payload_sizes(ts)
+
+        if self._first is None:
+            self._first = int(ticks[0])
+        seconds = (ticks - self._first) // CLOCK
+        self.duration = max(self.duration, float(ticks[-1] - self._first) / CLOCK)
+
+        # bytes of each PID per second, only of the seconds with packets, sorted by PID then second
+        keys, inverse = np.unique((pids << 40) | seconds, return_inverse=True)
+        totals = np.bincount(inverse.ravel(), weights=sizes).astype(np.int64)
+        key_pids, key_seconds = keys >> 40, keys & ((1 << 40) - 1)
+        packets = np.bincount(pids, minlength=8192)
+
+        for index in np.flatnonzero(packets):
+            pid = int(index)
+            found = key_pids == pid
+            row_seconds, row = key_seconds[found], totals[found]
+            last = int(row_seconds[-1])
+            self._packets[pid] = self._packets.get(pid, 0) + int(packets[pid])
+            self._bytes[pid] = self._bytes.get(pid, 0) + int(row.sum())
+            histogram = self._seconds.get(pid)
+            if histogram is None or len(histogram) < last + 1:
+                grown = np.zeros(last + 1, np.int64)
+                if histogram is not None:
+                    grown[:len(histogram)] = histogram
+                histogram = self._seconds[pid] = grown
+            histogram[row_seconds] += row
+
+        return len(chunk)
+
+    @staticmethod
+    def _payload_sizes(ts: Packets) -> Ticks:
+        """Get the elementary stream bytes of each packet, without its header, adaptation field, and PES header."""
+        flags = ts[:, 3]
+        offsets = np.where((flags & 0x20) != 0, 5 + ts[:, 4].astype(np.int64), 4)
+        sizes = np.where((flags & 0x10) != 0, np.maximum(188 - offsets, 0), 0)
+
+        # packets starting a PES packet with the optional PES header (marker bits '10'), within the packet
+        rows = np.flatnonzero(((ts[:, 1] & 0x40) != 0) & (sizes >= 9))
+        if len(rows):
+            head = ts[rows[:, None], offsets[rows, None] + np.arange(9)]
+            is_pes = (head[:, 0] == 0) & (head[:, 1] == 0) & (head[:, 2] == 1) & ((head[:, 6] & 0xC0) == 0x80)
+            rows, head = rows[is_pes], head[is_pes]
+            sizes[rows] = np.maximum(sizes[rows] - 9 - head[:, 8].astype(np.int64), 0)
+        return sizes
+
+    def _arrival_times(self, chunk: Packets) -> Ticks:
+        """Get the 27 MHz arrival time of M2TS packets, unwrapping the 30-bit timestamps."""
+        ats = (chunk[:, :4].astype(np.int64) * [1 << 24, 1 << 16, 1 << 8, 1]).sum(axis=1) & (ATS_WRAP - 1)
+        wraps = np.cumsum(np.diff(ats, prepend=ats[0]) < 0) * ATS_WRAP
+        ticks = ats + wraps
+        if self._clock is not None:
+            # continue from the previous chunk, including any wrap between them
+            previous = self._clock[1]
+            offset = previous - previous % ATS_WRAP
+            if ats[0] < previous % ATS_WRAP:
+                offset += ATS_WRAP
+            ticks += offset
+        self._clock = (0, int(ticks[-1]))
+        return ticks
+
+    def _pcr_times(self, ts: Packets, start: int, final: bool) -> Ticks:
+        """
+        Get the 27 MHz time of TS packets, interpolated between the packets carrying a PCR.
+        Packets after the last PCR of the chunk are left for the next chunk to time them,
+        apart from the end of the file, which is timed as of its last PCR.
+
+        PCR discontinuities, e.g., of a spliced stream, or the clocks of many programs,
+        continue from the previous PCR, so a jump doesn't add hours of empty seconds.
+        """
+        has_pcr = ((ts[:, 3] & 0x20) != 0) & (ts[:, 4] >= 7) & ((ts[:, 5] & 0x10) != 0)
+        index = np.flatnonzero(has_pcr)
+        pcr = ts[index]
+        base = (
+            (pcr[:, 6].astype(np.int64) << 25) | (pcr[:, 7].astype(np.int64) << 17)
+            | (pcr[:, 8].astype(np.int64) << 9) | (pcr[:, 9].astype(np.int64) << 1)
+            | (pcr[:, 10].astype(np.int64) >> 7)
+        )
+        extension = ((pcr[:, 10].astype(np.int64) & 1) << 8) | pcr[:, 11]
+        values = base * 300 + extension
+        index = index + start
+
+        if not final and not len(index):
+            # wait for a PCR after these packets to time them
+            return np.empty(0, np.int64)
+        if self._clock is not None:
+            index = np.concatenate(([self._clock[0]], index))
+            values = np.concatenate(([self._clock[1]], values))
+        if not len(index):
+            raise TransportStreamError("There are no PCRs to time the packets with.")
+        # unwrap the 33-bit PCR, remove discontinuities, and use the earliest PCR of any PID at each point in time
+        values = values + np.cumsum(np.diff(values, prepend=values[0]) < -PCR_WRAP // 2) * PCR_WRAP
+        steps = np.diff(values, prepend=values[0])
+        values = values - np.cumsum(np.where(np.abs(steps) > MAX_PCR_GAP, steps, 0))
+        values = np.maximum.accumulate(values)
+        self._clock = (int(index[-1]), int(values[-1]))
+
+        end = start + len(ts)
+        if not final:
+            end = int(index[-1]) + 1
+        positions = np.arange(start, end)
+        return np.interp(positions, index, values).astype(np.int64)
+
+    def results(self) -> PacketStats:
+        """
+        Get the packets, elementary stream bytes, and average and peak bitrate in bits/s
+        of each PID, with its bits per second.
+        """
+        results = {}
+        for pid, histogram in sorted(self._seconds.items()):
+            size = self._bytes[pid]
+            bits: List[int] = [int(x) * 8 for x in histogram]
+            results[pid] = {
+                "packets": self._packets[pid],
+                "bytes": size,
+                "duration": round(self.duration, 3),
+                "bitrate": round(size * 8 / self.duration) if self.duration else None,
+                "peak_bitrate": max(bits),
+                "histogram": bits
+            }
+        return results
+
+
+def get_packet_stats(path: Path) -> Optional[PacketStats]:
+    """
+    Get the packet statistics of every PID of a transport stream, see `PIDProfile`, or
+    None if it's not a transport stream or NumPy is not installed. Results are cached
+    until the file changes, and used as-is if the file no longer exists.
+    """
+    def scan() -> Optional[PacketStats]:
+        if not HAS_NUMPY:
+            print(f"Warning: NumPy is not installed, using MediaInfo's bitrates for {path.name}.")
+            return None
+        stats: Optional[PacketStats] = analyze(path, [PIDProfile.NAME])[PIDProfile.NAME]
+        return stats
+
+    return get_cached("packets", path, scan)
+
+
+__ALL__ = (PIDProfile, PacketStats, TransportStreamError, get_packet_stats)
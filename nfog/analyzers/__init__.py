@@ -0,0 +1,17 @@
+from nfog.analyzers.Analyzer import Analyzer, StartCodeAnalyzer
+from nfog.analyzers.Checksums import CHECKSUMS, format_sfv, get_checksums
+from nfog.analyzers.Hash import CRC32, MD5, SHA1, SHA256, Hash
+from nfog.analyzers.Matroska import BlockScanner, format_bitrate, get_block_stats
+from nfog.analyzers.MPEGScan import MPEGScan
+from nfog.analyzers.PESSizes import PESSizes
+from nfog.analyzers.Pipeline import ANALYZERS, Pipeline, analyze, get_cached, get_signature, register, want
+from nfog.analyzers.TransportStream import PIDProfile, get_packet_stats
+
+for _analyzer in (MD5, SHA1, SHA256, CRC32, MPEGScan, PESSizes, PIDProfile, BlockScanner):
+    register(_analyzer)
+
+__ALL__ = (
+    ANALYZERS, Analyzer, StartCodeAnalyzer, Hash, MD5, SHA1, SHA256, CRC32, MPEGScan, PESSizes, Pipeline,
+    BlockScanner, PIDProfile, CHECKSUMS, analyze, format_bitrate, format_sfv, get_block_stats, get_cached,
+    get_checksums, get_packet_stats, get_signature, register, want
+)
@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
+
+import click
+
+
+class Result:
+    """
+    Outcome of generating an NFO, see `generate()`.
+
+    When nothing changed since the NFO was last generated, `unchanged` is True and
+    the NFO is read back from where it was saved. When generating it failed within
+    `generate_many()`, `error` is the exception and there's no NFO.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        template: str,
+        release_name: Optional[str] = None,
+        nfo: Optional[str] = None,
+        out_path: Optional[Path] = None,
+        saved: bool = False,
+        unchanged: bool = False,
+        skipped: Optional[List[str]] = None,
+        estimated: Optional[List[str]] = None,
+        usage: Optional[Dict[str, Dict[str, Any]]] = None,
+        outputs: Optional[List[Tuple[str, Path]]] = None,
+        error: Optional[Exception] = None
+    ):
+        self.path = path
+        self.template = template
+        self.release_name = release_name
+        self.nfo = nfo
+        self.out_path = out_path
+        self.saved = saved
+        self.unchanged = unchanged
+        self.skipped = skipped or []
+        self.estimated = estimated or []  # fields of each track that a fast probe may have estimated
+        self.usage = usage or {}
+        self.outputs = outputs or []  # NFO text and path of every output, including the first
+        self.error = error
+
+    def __repr__(self) -> str:
+        if self.error:
+            return f"{self.__class__.__name__}({self.path}, error={self.error!r})"
+        return f"{self.__class__.__name__}({self.release_name}, out_path={self.out_path}, unchanged={self.unchanged})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the result as JSON-serializable data."""
+        return {
+            "release_name": self.release_name,
+            "path": str(self.out_path),
+            "saved": self.saved,
+            "unchanged": self.unchanged,
+            "skipped": self.skipped,
+            "estimated": self.estimated,
+            "usage": self.usage,
+            "outputs": [
+                {"release_name": path.stem, "path": str(path), "nfo": text}
+                for text, path in self.outputs
+            ],
+            "nfo": self.nfo
+        }
+
+
+def get_command() -> click.Command:
+    """Get the `generate` command group, see `TemplateGroup`, imported on first use as it loads the whole CLI."""
+    from nfog.nfog import generate as command
+    return command
+
+
+def get_args(
+    path: Union[Path, str],
+    template: str,
+    args: Iterable[Any] = (),
+    options: Optional[Mapping[str, Any]] = None,
+    command: Optional[click.Command] = None
+) -> List[str]:
+    """
+    Convert a path, template, template arguments, and `generate` options to
+    `generate` command-line arguments, e.g., `artwork="MiU"` to `--artwork MiU`.
+    Options are named like the `generate` function's parameters, e.g., `imdb`,
+    `artwork`, `force`, or `outputs`. None values are left to their defaults.
+    """
+    params = {
+        param.name: param
+        for param in (command or get_command()).params
+        if isinstance(param, click.Option)
+    }
+
+    cli_args = []
+    for name, value in (options or {}).items():
+        if name not in params:
+            raise ValueError(f"Unknown option `{name}`, expected one of {', '.join(params)}.")
+        if value is None:
+            continue
+        param = params[name]
+        if param.is_flag:
+            if value:
+                cli_args.append(param.opts[-1])
+        elif param.multiple:
+            for item in [value] if isinstance(value, str) else value:
+                cli_args.extend([param.opts[-1], str(item)])
+        else:
+            cli_args.extend([param.opts[-1], str(value)])
+
+    cli_args.append(str(Path(path)))
+    cli_args.append(str(template))
+    cli_args.extend(str(x) for x in args)
+
+    return cli_args
+
+
+def insert_path(path: Union[Path, str], args: List[str], command: Optional[click.Command] = None) -> List[str]:
+    """
+    Insert a path into `generate` command-line arguments, after the options and
+    before the template name, e.g., `-a MiU Movie` to `-a MiU PATH Movie`.
+    """
+    options = {
+        opt: param
+        for param in (command or get_command()).params
+        if isinstance(param, click.Option)
+        for opt in (*param.opts, *param.secondary_opts)
+    }
+    i = 0
+    while i < len(args) and args[i].startswith("-"):
+        name, separator, _ = args[i].partition("=")
+        if name not in options:
+            raise ValueError(f"Unknown option `{args[i]}`, options must come before the template name.")
+        i += 1 if options[name].is_flag or separator else 2
+    return [*args[:i], str(Path(path)), *args[i:]]
+
+
+def generate(
+    path: Union[Path, str],
+    template: str,
+    *args: Any,
+    save: bool = True,
+    **options: Any
+) -> Result:
+    """
+    Generate an NFO for a file or folder, like `nfo generate`, without starting a new process.
+
+    Template arguments follow the template name, and `generate` options are keyword
+    arguments named like their long option, e.g., to run `nfo generate -a MiU -imdb tt0386676 FILE Season 1`:
+
+        >>> import nfog
+        >>> result = nfog.generate("Show.S01E01.mkv", "Season", 1, artwork="MiU", imdb="tt0386676")
+        >>> print(result.nfo)
+
+    Loaded templates and artwork, probed media information, fetched metadata, and
+    HTTP connections are kept by the process, so every call after the first only
+    does what's new. Pass `save=False` to render the NFO without saving it.
+
+    Progress is printed like the CLI, and errors are raised, e.g., ValueError for an
+    unknown option, or ClickException for a missing file, template, or IDs.
+    """
+    return run(get_args(path, template, args, options), save=save)
+
+
+def run(args: List[str], save: bool = True) -> Result:
+    """
+    Generate an NFO from `generate` command-line arguments, e.g., `["-a", "MiU", "Movie.mkv", "Movie"]`.
+    Like `generate()`, progress is printed like the CLI and errors are raised.
+    """
+    state: Dict[str, Any] = dict(save=save)
+    result = get_command().main(list(args), prog_name="nfo generate", standalone_mode=False, obj=state)
+
+    if state.get("unchanged"):
+        # nothing changed since the NFO was last generated, so it was not re-generated
+        out_path: Path = state["unchanged"]
+        nfo = out_path.read_text(encoding=state["encoding"])
+        return Result(
+            path=state["file"],
+            template=state["template"],
+            release_name=out_path.stem,
+            nfo=nfo,
+            out_path=out_path,
+            unchanged=True,
+            outputs=[(nfo, out_path)]
+        )
+
+    nfo, out_path = result
+    if nfo is None:
+        # saved NFOs are written as they're rendered, rather than kept in memory
+        nfo = out_path.read_text(encoding=state["encoding"])
+    outputs = [
+        (text if text is not None else path.read_text(encoding=state["encoding"]), path)
+        for text, path in state.get("outputs", [])
+    ]
+    return Result(
+        path=state["file"],
+        template=state["template"],
+        release_name=out_path.stem,
+        nfo=nfo,
+        out_path=out_path,
+        saved=save,
+        skipped=state.get("skipped", []),
+        estimated=state.get("estimated", []),
+        usage=state.get("usage", {}),
+        outputs=outputs
+    )
+
+
+def generate_many(
+    items: Iterable[Mapping[str, Any]],
+    workers: int = 4,
+    save: bool = True
+) -> Iterator[Result]:
+    """
+    Generate NFOs for many releases concurrently, yielding results as they complete.
+
+    Each item holds the `generate()` arguments: `path`, `template`, optionally `args`,
+    and any options, e.g., `{"path": "Movie.mkv", "template": "Movie", "artwork": "MiU"}`.
+    Unlike `generate()`, a failed release doesn't stop the rest, its Result has the
+    `error` instead. Up to `workers` releases are generated at the same time, and
+    items are only taken from the iterable as workers free up, so it may be lazy.
+    """
+    if workers < 1:
+        raise ValueError(f"There must be at least one worker, not {workers}.")
+
+    def run(item: Mapping[str, Any]) -> Result:
+        options = dict(item)
+        path = options.pop("path")
+        template = options.pop("template")
+        args = options.pop("args", ())
+        try:
+            return generate(path, template, *args, save=save, **options)
+        except Exception as e:
+            return Result(path=Path(path), template=template, error=e)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="nfog-generate") as pool:
+        pending: set[Future[Result]] = set()
+        for item in items:
+            pending.add(pool.submit(run, item))
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                yield from (x.result() for x in done)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            yield from (x.result() for x in done)
+
+
+__ALL__ = (Result, generate, generate_many, get_args, insert_path, run)
@@ -1,10 +1,39 @@
-from abc import abstractmethod
+from __future__ import annotations
+
+from typing import Iterable, Iterator
 
 from nfog.templates import Template
 
 
 class Artwork:
+    """
+    Artwork wraps a Template's NFO, e.g., with ASCII art and a footer.
+
+    Artwork implements either `with_template()` to return the whole NFO, or `lines()`
+    to stream it line by line, in which case the NFO is written as it's generated.
+    """
+
+    @classmethod
+    def with_template(cls, template: Template) -> str:
+        """Return the Artwork with the Template information. By default, it joins `lines()`."""
+        return "\n".join(cls.lines(template))
+
+    @classmethod
+    def lines(cls, template: Template) -> Iterator[str]:
+        """
+        Generate the Artwork with the Template information line by line, see `Template.lines()`.
+        By default, it splits `with_template()`.
+        """
+        if next(x for x in cls.__mro__ if "with_template" in vars(x)) is Artwork:
+            # the default `with_template()` joins `lines()`, which would recurse forever
+            raise NotImplementedError(f"The {cls.__name__} Artwork must implement `with_template()` or `lines()`.")
+        yield from cls.with_template(template).split("\n")
+
     @staticmethod
-    @abstractmethod
-    def with_template(template: Template) -> str:
-        """Return the Artwork with the Template information."""
+    def split_lines(lines: Iterable[str]) -> Iterator[str]:
+        """Split items spanning multiple lines, e.g., from `Template.lines()`, to work on single lines."""
+        for line in lines:
+            yield from line.split("\n")
+
+
+__ALL__ = (Artwork,)
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import re
+from typing import Dict, Iterator, Pattern, Tuple
+
+from nfog import layout
+
+# lines left as-is when padding: empty, only spaces, or ending with a BBCode tag
+KEEP = re.compile(r"^ *$|\[/?\w+?(?:=\w+)?]$")
+
+
+def pad(line: str, width: int, keep: Pattern[str] = KEEP) -> str:
+    """Pad a line with spaces to a display width, unless it's matched by `keep`."""
+    if keep.search(line):
+        return line
+    return layout.ljust(line, width)
+
+
+class Frame:
+    """
+    Static lines of an Artwork, e.g., ASCII art, declared once as a class attribute.
+
+    The display width of each line, and whether it's kept as-is when padding, is
+    worked out when the Frame is created. Padded lines are computed once per width,
+    so every NFO rendered by the process reuses the same prepared lines, and only
+    the Template's lines are measured per NFO.
+
+    Example:
+        >>> class Art(Artwork):
+        ...     HEADER = Frame("~ art ~", "", "[b]bold[/b]")
+        ...     @classmethod
+        ...     def lines(cls, template):
+        ...         yield from cls.HEADER.padded(10)
+        ...         yield from (pad(x, 10) for x in cls.split_lines(template.lines()))
+    """
+
+    def __init__(self, *lines: str, keep: Pattern[str] = KEEP):
+        self.lines = lines
+        self.widths = tuple(map(layout.display_width, lines))
+        self.kept = tuple(bool(keep.search(x)) for x in lines)
+        self._padded: Dict[int, Tuple[str, ...]] = {}
+
+    @classmethod
+    def centered(cls, *lines: str, width: int, keep: Pattern[str] = KEEP) -> Frame:
+        """Create a Frame of lines centered to a display width."""
+        return cls(*(layout.center(x, width) for x in lines), keep=keep)
+
+    @property
+    def width(self) -> int:
+        """The display width of the widest line."""
+        return max(self.widths, default=0)
+
+    def padded(self, width: int) -> Tuple[str, ...]:
+        """Get the lines padded with spaces to a display width, except kept lines, see `pad()`."""
+        lines = self._padded.get(width)
+        if lines is None:
+            lines = self._padded[width] = tuple(
+                line if kept else line + " " * (width - line_width)
+                for line, line_width, kept in zip(self.lines, self.widths, self.kept)
+            )
+        return lines
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.lines)
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+
+__ALL__ = (KEEP, Frame, pad)
@@ -1,3 +1,4 @@
 from nfog.artwork.Artwork import Artwork
+from nfog.artwork.Frame import Frame, pad
 
-__ALL__ = (Artwork,)
+__ALL__ = (Artwork, Frame, pad)
@@ -0,0 +1,300 @@
+from __future__ import annotations
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from nfog.constants import MEDIA_EXTENSIONS
+from nfog.probe import get_media_files
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    args TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    updated REAL NOT NULL,
+    UNIQUE (path, args)
+);
+CREATE INDEX IF NOT EXISTS items_status ON items (status, lease_until);
+CREATE TABLE IF NOT EXISTS journal (
+    id INTEGER PRIMARY KEY,
+    item INTEGER NOT NULL REFERENCES items (id),
+    time REAL NOT NULL,
+    worker TEXT,
+    event TEXT NOT NULL,
+    detail TEXT
+);
+"""
+
+
+class Item:
+    """A release in a WorkQueue, and the `generate` arguments following its path."""
+
+    def __init__(self, id_: int, path: str, args: str, attempts: int):
+        self.id = id_
+        self.path = Path(path)
+        self.args: List[str] = json.loads(args)
+        self.attempts = attempts
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.id}, {self.path})"
+
+
+class WorkQueue:
+    """
+    Queue of releases to generate NFOs for, shared by worker processes on one or more machines.
+
+    The queue is a SQLite database, e.g., on the storage every machine mounts, so no
+    broker is needed. A coordinator adds releases, then any amount of workers claim
+    them one by one. A claim is a lease for `lease` seconds, renewed while the NFO is
+    generated, so a release claimed by a worker that crashed or lost its connection
+    is claimed again once its lease runs out. Results and failures are recorded on
+    each item, and every claim, release, result, and failure is journaled.
+
+    Completed releases are never claimed again, and adding a release twice keeps the
+    first, so an interrupted batch resumes where it stopped by running the workers
+    (or the coordinator) again.
+
+    Leases use each machine's clock, so keep them in sync, e.g., with NTP, and keep
+    the lease much longer than any difference between them. The database is used in
+    rollback-journal mode with short transactions, as WAL mode does not work over
+    network file systems, which must support POSIX file locks.
+    """
+
+    PENDING = "pending"
+    CLAIMED = "claimed"
+    DONE = "done"
+    FAILED = "failed"
+
+    def __init__(self, path: Path, lease: float = 600.0, max_attempts: int = 3, timeout: float = 60.0):
+        self.path = path
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        self._local = threading.local()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db.executescript(SCHEMA)
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        """The connection of the current thread, as SQLite connections can't be shared across threads."""
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = self._local.db = sqlite3.connect(str(self.path), timeout=self.timeout, isolation_level=None)
+            db.execute("PRAGMA journal_mode=DELETE")
+        return db
+
+    def transaction(self) -> sqlite3.Connection:
+        """Start a write transaction, locking out other writers so claims can't race."""
+        self.db.execute("BEGIN IMMEDIATE")
+        return self.db
+
+    def close(self) -> None:
+        db = getattr(self._local, "db", None)
+        if db is not None:
+            db.close()
+            self._local.db = None
+
+    def journal(self, db: sqlite3.Connection, item: int, worker: Optional[str], event: str, detail: Any = None) -> None:
+        db.execute(
+            "INSERT INTO journal (item, time, worker, event, detail) VALUES (?, ?, ?, ?, ?)",
+            (item, time.time(), worker, event, None if detail is None else json.dumps(detail))
+        )
+
+    def add(self, releases: Iterable[Path], args: List[str]) -> int:
+        """Add releases with the `generate` arguments following the path. Returns how many were new."""
+        now = time.time()
+        encoded = json.dumps(list(args))
+        added = 0
+        db = self.transaction()
+        try:
+            for path in releases:
+                cursor = db.execute(
+                    "INSERT OR IGNORE INTO items (path, args, updated) VALUES (?, ?, ?)",
+                    (str(path), encoded, now)
+                )
+                # an INSERT that added a row always sets lastrowid
+                if cursor.rowcount and cursor.lastrowid is not None:
+                    added += 1
+                    self.journal(db, cursor.lastrowid, None, "added")
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return added
+
+    def claim(self, worker: str) -> Optional[Item]:
+        """Claim the next pending release, or one whose lease has expired, if any."""
+        now = time.time()
+        db = self.transaction()
+        try:
+            row = db.execute(
+                "SELECT id, path, args, attempts, status, worker FROM items "
+                "WHERE status = ? OR (status = ? AND lease_until < ?) ORDER BY id LIMIT 1",
+                (self.PENDING, self.CLAIMED, now)
+            ).fetchone()
+            if not row:
+                db.execute("COMMIT")
+                return None
+            item_id, path, args, attempts, status, previous = row
+            if status == self.CLAIMED:
+                self.journal(db, item_id, previous, "expired")
+            db.execute(
+                "UPDATE items SET status = ?, worker = ?, lease_until = ?, attempts = ?, updated = ? WHERE id = ?",
+                (self.CLAIMED, worker, now + self.lease, attempts + 1, now, item_id)
+            )
+            self.journal(db, item_id, worker, "claimed", {"attempt": attempts + 1})
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return Item(item_id, path, args, attempts + 1)
+
+    def _update(self, item: Item, worker: str, event: str, detail: Any, sql: str, params: tuple) -> bool:
+        """Update a claimed item if the worker still holds its lease, and journal it."""
+        db = self.transaction()
+        try:
+            cursor = db.execute(
+                f"UPDATE items SET {sql}, updated = ? WHERE id = ? AND status = ? AND worker = ?",
+                (*params, time.time(), item.id, self.CLAIMED, worker)
+            )
+            owned = cursor.rowcount > 0
+            self.journal(db, item.id, worker, event if owned else f"{event}-lost", detail)
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return owned
+
+    @contextmanager
+    def hold(self, item: Item, worker: str) -> Iterator[threading.Event]:
+        """
+        Keep renewing the lease of a claimed item in the background until the block exits.
+        The yielded Event is set if the lease was lost, e.g., after the machine was suspended.
+        """
+        stop = threading.Event()
+        lost = threading.Event()
+
+        def heartbeat() -> None:
+            try:
+                while not stop.wait(self.lease / 3):
+                    try:
+                        if not self.renew(item, worker):
+                            lost.set()
+                            return
+                    except sqlite3.Error:
+                        # e.g., locked for longer than the timeout, try again on the next beat
+                        continue
+            finally:
+                self.close()
+
+        thread = threading.Thread(target=heartbeat, name=f"nfog-lease-{item.id}", daemon=True)
+        thread.start()
+        try:
+            yield lost
+        finally:
+            stop.set()
+
+    def renew(self, item: Item, worker: str) -> bool:
+        """Extend the lease of a claimed item. Returns False if the lease was lost to another worker."""
+        cursor = self.db.execute(
+            "UPDATE items SET lease_until = ? WHERE id = ? AND status = ? AND worker = ?",
+            (time.time() + self.lease, item.id, self.CLAIMED, worker)
+        )
+        return cursor.rowcount > 0
+
+    def complete(self, item: Item, worker: str, result: Dict[str, Any]) -> bool:
+        """Record the result of a claimed item. Returns False if the lease was lost to another worker."""
+        return self._update(
+            item, worker, "done", result,
+            "status = ?, lease_until = NULL, result = ?, error = NULL", (self.DONE, json.dumps(result))
+        )
+
+    def fail(self, item: Item, worker: str, error: str) -> bool:
+        """
+        Record the failure of a claimed item. It's retried by the next claim until it
+        has failed `max_attempts` times. Returns False if the lease was lost to another worker.
+        """
+        status = self.FAILED if item.attempts >= self.max_attempts else self.PENDING
+        return self._update(
+            item, worker, "failed", {"error": error, "attempt": item.attempts},
+            "status = ?, lease_until = NULL, error = ?", (status, error)
+        )
+
+    def release(self, item: Item, worker: str) -> bool:
+        """Give back a claimed item without counting the attempt, e.g., when the worker is stopped."""
+        return self._update(
+            item, worker, "released", None,
+            "status = ?, lease_until = NULL, attempts = attempts - 1", (self.PENDING,)
+        )
+
+    def retry(self) -> int:
+        """Queue every failed item again, with no attempts. Returns how many were queued."""
+        db = self.transaction()
+        try:
+            ids = [x for x, in db.execute("SELECT id FROM items WHERE status = ?", (self.FAILED,))]
+            db.execute(
+                "UPDATE items SET status = ?, attempts = 0, updated = ? WHERE status = ?",
+                (self.PENDING, time.time(), self.FAILED)
+            )
+            for item_id in ids:
+                self.journal(db, item_id, None, "retry")
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return len(ids)
+
+    def counts(self) -> Dict[str, int]:
+        """Get the amount of items of each status."""
+        counts = dict.fromkeys((self.PENDING, self.CLAIMED, self.DONE, self.FAILED), 0)
+        counts.update(self.db.execute("SELECT status, COUNT(*) FROM items GROUP BY status").fetchall())
+        return counts
+
+    def is_finished(self) -> bool:
+        """Check if no item is pending or claimed, i.e., the batch is done, apart from failures."""
+        return not self.db.execute(
+            "SELECT 1 FROM items WHERE status IN (?, ?) LIMIT 1", (self.PENDING, self.CLAIMED)
+        ).fetchone()
+
+    def failures(self) -> List[tuple[str, int, str]]:
+        """Get the path, attempts, and last error of every failed item."""
+        return self.db.execute(
+            "SELECT path, attempts, error FROM items WHERE status = ? ORDER BY id", (self.FAILED,)
+        ).fetchall()
+
+
+def get_worker_name() -> str:
+    """Get a name for the current worker, unique across machines sharing a queue."""
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+def find_releases(directories: Iterable[Path], folders: bool = False) -> Iterator[Path]:
+    """
+    Find the releases in directories, every media file, or with `folders`, every
+    folder directly containing media files, e.g., season packs.
+    """
+    for directory in directories:
+        if folders:
+            candidates = [directory, *sorted(x for x in directory.rglob("*") if x.is_dir())]
+            yield from (x for x in candidates if get_media_files(x))
+        else:
+            yield from sorted(
+                x for x in directory.rglob("*")
+                if x.suffix.lower() in MEDIA_EXTENSIONS and x.is_file()
+            )
+
+
+__ALL__ = (Item, WorkQueue, find_releases, get_worker_name)
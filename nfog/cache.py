@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+from nfog.config import config
+
+Limit = Tuple[Optional[int], Optional[float]]  # max entries, seconds to live
+
+
+class Cache:
+    """
+    Process-wide in-memory cache.
+
+    Keeps loaded templates, artwork, and fetched metadata warm across multiple
+    generations within the same process, e.g., when running `nfo watch`.
+    Values are namespaced so that a single kind of data can be cleared at once.
+
+    Each namespace keeps at most a number of entries, dropping the least recently
+    used first, and may expire entries after some seconds, e.g., so the episodes
+    of an airing show are fetched again by a long-running process. See `LIMITS`,
+    overridable per namespace in the config, e.g., `cache.imdb = {size = 64, ttl = 600}`.
+    """
+
+    LIMITS: dict[str, Limit] = {
+        "imdb": (256, 6 * 60 * 60),
+        "tmdb": (256, 6 * 60 * 60),
+        "previews": (512, 24 * 60 * 60),
+        "fanart-tv": (256, None),  # revalidated by `FanartTV` itself
+        "code": (128, None),  # keyed by the file's modification time
+        "scan": (1024, None),  # keyed by the file's stream size
+        "cinemagoer": (1, None)
+    }
+    DEFAULT_LIMIT: Limit = (1024, None)
+
+    _lock = threading.RLock()
+    # namespace -> key -> value, and when it expires (monotonic), least recently used first
+    _data: defaultdict[str, OrderedDict[Hashable, Tuple[Any, Optional[float]]]] = defaultdict(OrderedDict)
+    _key_locks: dict[tuple[str, Hashable], threading.Lock] = {}
+
+    @classmethod
+    def get_limit(cls, namespace: str) -> Limit:
+        """Get the max entries and seconds to live of a namespace, None for no limit."""
+        size, ttl = cls.LIMITS.get(namespace, cls.DEFAULT_LIMIT)
+        custom = config.get("cache", {}).get(namespace, {})
+        # e.g., strings set with `nfo config cache.imdb.size 64`
+        size, ttl = custom.get("size", size), custom.get("ttl", ttl)
+        return None if size is None else int(size), None if ttl is None else float(ttl)
+
+    @classmethod
+    def get(cls, namespace: str, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """
+        Get a cached value, calling factory() to create and store it if missing.
+        Concurrent callers asking for the same key wait for the first call instead
+        of repeating the work.
+        """
+        with cls._lock:
+            found, value = cls._lookup(namespace, key)
+            if found:
+                return value
+            key_lock = cls._key_locks.setdefault((namespace, key), threading.Lock())
+
+        with key_lock:
+            try:
+                with cls._lock:
+                    found, value = cls._lookup(namespace, key)
+                    if found:
+                        return value
+                value = factory()
+                with cls._lock:
+                    cls._store(namespace, key, value)
+                return value
+            finally:
+                with cls._lock:
+                    cls._key_locks.pop((namespace, key), None)
+
+    @classmethod
+    def set(cls, namespace: str, key: Hashable, value: Any) -> None:
+        """Store a value in the cache, replacing any existing value."""
+        with cls._lock:
+            cls._store(namespace, key, value)
+
+    @classmethod
+    def peek(cls, namespace: str, key: Hashable) -> Any:
+        """Get a cached value without creating it, or None if it's not cached."""
+        with cls._lock:
+            return cls._lookup(namespace, key)[1]
+
+    @classmethod
+    def pop(cls, namespace: str, key: Hashable) -> Any:
+        """Remove and return a value from the cache, or None if it's not cached."""
+        with cls._lock:
+            found, value = cls._lookup(namespace, key)
+            cls._data[namespace].pop(key, None)
+            return value if found else None
+
+    @classmethod
+    def clear(cls, namespace: Optional[str] = None) -> None:
+        """Clear a single namespace, or the entire cache if no namespace is provided."""
+        with cls._lock:
+            if namespace:
+                cls._data.pop(namespace, None)
+            else:
+                cls._data.clear()
+
+    @classmethod
+    def _lookup(cls, namespace: str, key: Hashable) -> Tuple[bool, Any]:
+        # must be called with the lock held
+        entries = cls._data[namespace]
+        if key not in entries:
+            return False, None
+        value, expires = entries[key]
+        if expires is not None and time.monotonic() >= expires:
+            del entries[key]
+            return False, None
+        entries.move_to_end(key)
+        return True, value
+
+    @classmethod
+    def _store(cls, namespace: str, key: Hashable, value: Any) -> None:
+        # must be called with the lock held
+        size, ttl = cls.get_limit(namespace)
+        entries = cls._data[namespace]
+        entries[key] = (value, time.monotonic() + ttl if ttl else None)
+        entries.move_to_end(key)
+        while size is not None and len(entries) > size:
+            entries.popitem(last=False)
+
+
+__ALL__ = (Cache,)
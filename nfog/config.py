@@ -2,13 +2,15 @@ from pathlib import Path
 
 import tmdbsimple
 import toml
-from appdirs import user_data_dir
+from appdirs import user_cache_dir, user_data_dir
 
 
 class Directories:
     user_data = Path(user_data_dir("nfog", False))
     templates = user_data / "templates"
     artwork = user_data / "artwork"
+    cache = Path(user_cache_dir("nfog", False))
+    manifests = cache / "manifests"
 
 
 class Files:
@@ -2,3 +2,8 @@ GROUP_SETTINGS = dict(
     help_option_names=["-?", "-h", "--help"],
     max_content_width=116  # max PEP8 line-width, -4 to adjust for initial indent
 )
+
+MEDIA_EXTENSIONS = (
+    ".mkv", ".mka", ".mp4", ".m4v", ".m2ts", ".mts", ".ts", ".avi",
+    ".mpg", ".mpeg", ".vob", ".webm", ".wmv"
+)
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import textwrap
+import unicodedata
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Any, Iterable, List, Optional
+
+# Code point ranges of East Asian Wide (W) and Fullwidth (F) characters, which take two
+# columns when displayed. Generated from the Unicode 14.0 database of `unicodedata`,
+# with unassigned code points between ranges merged in.
+WIDE_RANGES = (
+    (0x1100, 0x115F), (0x231A, 0x231B), (0x2329, 0x232A), (0x23E9, 0x23EC), (0x23F0, 0x23F0), (0x23F3, 0x23F3),
+    (0x25FD, 0x25FE), (0x2614, 0x2615), (0x2648, 0x2653), (0x267F, 0x267F), (0x2693, 0x2693), (0x26A1, 0x26A1),
+    (0x26AA, 0x26AB), (0x26BD, 0x26BE), (0x26C4, 0x26C5), (0x26CE, 0x26CE), (0x26D4, 0x26D4), (0x26EA, 0x26EA),
+    (0x26F2, 0x26F3), (0x26F5, 0x26F5), (0x26FA, 0x26FA), (0x26FD, 0x26FD), (0x2705, 0x2705), (0x270A, 0x270B),
+    (0x2728, 0x2728), (0x274C, 0x274C), (0x274E, 0x274E), (0x2753, 0x2755), (0x2757, 0x2757), (0x2795, 0x2797),
+    (0x27B0, 0x27B0), (0x27BF, 0x27BF), (0x2B1B, 0x2B1C), (0x2B50, 0x2B50), (0x2B55, 0x2B55), (0x2E80, 0x303E),
+    (0x3041, 0x3247), (0x3250, 0x4DBF), (0x4E00, 0xA4C6), (0xA960, 0xA97C), (0xAC00, 0xD7A3), (0xF900, 0xFAD9),
+    (0xFE10, 0xFE19), (0xFE30, 0xFE6B), (0xFF01, 0xFF60), (0xFFE0, 0xFFE6), (0x16FE0, 0x1B2FB),
+    (0x1F004, 0x1F004), (0x1F0CF, 0x1F0CF), (0x1F18E, 0x1F18E), (0x1F191, 0x1F19A), (0x1F200, 0x1F320),
+    (0x1F32D, 0x1F335), (0x1F337, 0x1F37C), (0x1F37E, 0x1F393), (0x1F3A0, 0x1F3CA), (0x1F3CF, 0x1F3D3),
+    (0x1F3E0, 0x1F3F0), (0x1F3F4, 0x1F3F4), (0x1F3F8, 0x1F43E), (0x1F440, 0x1F440), (0x1F442, 0x1F4FC),
+    (0x1F4FF, 0x1F53D), (0x1F54B, 0x1F54E), (0x1F550, 0x1F567), (0x1F57A, 0x1F57A), (0x1F595, 0x1F596),
+    (0x1F5A4, 0x1F5A4), (0x1F5FB, 0x1F64F), (0x1F680, 0x1F6C5), (0x1F6CC, 0x1F6CC), (0x1F6D0, 0x1F6D2),
+    (0x1F6D5, 0x1F6DF), (0x1F6EB, 0x1F6EC), (0x1F6F4, 0x1F6FC), (0x1F7E0, 0x1F7F0), (0x1F90C, 0x1F93A),
+    (0x1F93C, 0x1F945), (0x1F947, 0x1F9FF), (0x1FA70, 0x1FAF6), (0x20000, 0x3134A)
+)
+_WIDE_STARTS = [start for start, _ in WIDE_RANGES]
+
+
+@lru_cache(maxsize=4096)
+def char_width(char: str) -> int:
+    """
+    Get the amount of columns a character takes when displayed: 2 for wide and
+    fullwidth characters (e.g., CJK, '。'), 0 for control, combining, and format
+    characters, and 1 for everything else, including braille and ambiguous width.
+    """
+    cp = ord(char)
+    if cp < 0x20 or 0x7F <= cp < 0xA0:
+        return 0
+    if cp < 0x300:
+        return 1
+    if unicodedata.category(char) in ("Mn", "Me", "Cf") or 0x1160 <= cp <= 0x11FF:
+        return 0
+    i = bisect_right(_WIDE_STARTS, cp) - 1
+    return 2 if i >= 0 and cp <= WIDE_RANGES[i][1] else 1
+
+
+def display_width(text: str) -> int:
+    """Get the amount of columns text takes when displayed, unlike len() which counts characters."""
+    if text.isascii():
+        return len(text)
+    return sum(map(char_width, text))
+
+
+def ljust(text: str, width: int, fillchar: str = " ") -> str:
+    """Like str.ljust(), but pads to a display width."""
+    return text + fillchar * (width - display_width(text))
+
+
+def rjust(text: str, width: int, fillchar: str = " ") -> str:
+    """Like str.rjust(), but pads to a display width."""
+    return fillchar * (width - display_width(text)) + text
+
+
+def center(text: str, width: int, fillchar: str = " ") -> str:
+    """Like str.center(), but pads to a display width."""
+    padding = width - display_width(text)
+    if padding <= 0:
+        return text
+    # same split of odd padding as str.center()
+    left = padding // 2 + (padding & width & 1)
+    return fillchar * left + text + fillchar * (padding - left)
+
+
+class _Measured(str):
+    """A string whose len() is its display width, so TextWrapper's line filling counts columns."""
+
+    def __len__(self) -> int:
+        if self.isascii():
+            return str.__len__(self)
+        return sum(map(char_width, self))
+
+
+class WidthWrapper(textwrap.TextWrapper):
+    """TextWrapper measuring text by display width instead of characters, see `display_width()`."""
+
+    def wrap(self, text: str) -> List[str]:
+        fits = display_width(self.initial_indent) + len(text) <= self.width
+        if fits and text and text.isascii() and text.isprintable() and text == text.strip() \
+                and not self.fix_sentence_endings:
+            # fits on a single line with no whitespace to clean up, skip splitting it into chunks
+            return [self.initial_indent + text]
+        return super().wrap(text)
+
+    def _split_chunks(self, text: str) -> List[str]:
+        chunks = super()._split_chunks(text)
+        if text.isascii():
+            # every character is a column, nothing to measure
+            return chunks
+        return [_Measured(x) for x in chunks]
+
+    def _handle_long_word(self, reversed_chunks: List[str], cur_line: List[str], cur_len: int, width: int) -> None:
+        if not isinstance(reversed_chunks[-1], _Measured):
+            return super()._handle_long_word(reversed_chunks, cur_line, cur_len, width)
+        space_left = max(width - cur_len, 1)
+        if self.break_long_words:
+            chunk = str(reversed_chunks[-1])
+            end, used = 0, 0
+            while end < len(chunk) and used + char_width(chunk[end]) <= space_left:
+                used += char_width(chunk[end])
+                end += 1
+            end = max(end, 1)
+            cur_line.append(_Measured(chunk[:end]))
+            reversed_chunks[-1] = _Measured(chunk[end:])
+        elif not cur_line:
+            cur_line.append(reversed_chunks.pop())
+
+
+@lru_cache(maxsize=256)
+def get_wrapper(width: int, initial_indent: str = "", subsequent_indent: str = "", **kwargs: Any) -> WidthWrapper:
+    """
+    Get a reusable wrapper for the width, indents, and other TextWrapper options.
+    Wrappers are cached, so repeat calls with the same settings don't rebuild one.
+    """
+    if not width or width < 1:
+        raise ValueError(f"An invalid width value of [{width}] was provided.")
+    return WidthWrapper(width, initial_indent=initial_indent, subsequent_indent=subsequent_indent, **kwargs)
+
+
+def wrap(text: str, width: int, indent: Optional[str] = None, **kwargs: Any) -> List[str]:
+    """
+    Wrap text at a display width, returning a list of lines.
+    The `indent` value will set an initial and subsequent indent, overriding any indent options in kwargs.
+    """
+    if indent:
+        kwargs["initial_indent"] = indent
+        kwargs["subsequent_indent"] = indent
+    return get_wrapper(width, **kwargs).wrap(text)
+
+
+def indented_wrap(text: str, width: int, indent: Optional[str] = None, **kwargs: Any) -> str:
+    """
+    Wrap text at a specific width and indent.
+    The `indent` value will set an initial and subsequent indent. If
+    set, it will override any indent options you may have also provided via kwargs.
+    """
+    if not text:
+        return text
+    return "\n".join(wrap(text, width, indent, **kwargs))
+
+
+def centered_wrap(text: str, width: int, wrap_width: Optional[int] = None) -> str:
+    """
+    Center text to a specific width, while also wrapping at another width.
+    If wrap_width is not provided, width will be used instead.
+    """
+    if not text:
+        return text
+    if not width or width < 1:
+        raise ValueError(f"An invalid width value of [{width}] was provided.")
+    if wrap_width and wrap_width < width:
+        raise ValueError(f"Wrap width [{wrap_width}] cannot be less than centering width [{width}].")
+    return "\n".join([
+        center(x, width).rstrip()
+        for x in wrap(text, wrap_width or width)
+    ])
+
+
+def wrap_lines(lines: Iterable[str], width: int, indent: Optional[str] = None, **kwargs: Any) -> List[str]:
+    """
+    Wrap many lines at once with the same settings, see `indented_wrap()`.
+    Returns the wrapped text of each line, in order.
+    """
+    if indent:
+        kwargs["initial_indent"] = indent
+        kwargs["subsequent_indent"] = indent
+    wrapper = get_wrapper(width, **kwargs)
+    return [
+        "\n".join(wrapper.wrap(line)) if line else line
+        for line in lines
+    ]
+
+
+__ALL__ = (
+    WIDE_RANGES, WidthWrapper, center, centered_wrap, char_width, display_width, get_wrapper, indented_wrap, ljust,
+    rjust, wrap, wrap_lines
+)
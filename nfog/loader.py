@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+
+from nfog.cache import Cache
+
+
+def load_object(fn: Path, name: str) -> Any:
+    """
+    Execute a Template or Artwork Python file and return the object named `name`.
+
+    The compiled and executed result is cached for the life of the process, keyed
+    by the file's modification time and size, so changes on disk are picked up
+    without re-compiling unchanged files on every generation.
+    """
+    stat = fn.stat()
+
+    def _load() -> Any:
+        scope: dict[str, Any] = {}
+        with fn.open(encoding="utf8") as f:
+            code = compile(f.read(), fn, "exec")
+            eval(code, scope, scope)
+        if name not in scope:
+            raise NameError(f"The file ({fn}) does not define `{name}`.")
+        return scope[name]
+
+    return Cache.get("code", (str(fn.resolve()), name, stat.st_mtime_ns, stat.st_size), _load)
+
+
+__ALL__ = (load_object,)
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Any, List, Optional, Tuple
+
+from nfog.config import Directories, config
+from nfog.probe import get_media_files
+
+Source = Tuple[Path, Optional[Path]]  # template, artwork
+
+
+class Manifest:
+    """
+    Record of the inputs that produced a generated NFO.
+
+    A manifest is kept per invocation (input file, template, template arguments,
+    and generate options) and stores the size and modification time of the input
+    file, when metadata was fetched, and for each output, hashes of the template and
+    artwork source and the saved NFO.
+
+    When the input file, templates, artwork, and outputs are unchanged since the
+    last generation, the NFO would come out the same, so probing, fetching, and
+    writing can all be skipped. Metadata cannot be checked for changes without
+    fetching it, so it is trusted for `METADATA_TTL` seconds before the NFO is
+    regenerated anyway.
+    """
+
+    VERSION = 2
+    METADATA_TTL = int(config.get("manifest", {}).get("metadata-ttl", 7 * 24 * 60 * 60))
+
+    def __init__(self, file: Path, template: str, args: list[str], options: dict[str, Any]):
+        self.file = file
+        self.key = self.digest([str(file.resolve()), template, args, sorted(options.items())])
+        self.path = Directories.manifests / self.key[:2] / f"{self.key}.json"
+        self.data: dict[str, Any] = {}
+        if self.path.exists():
+            try:
+                self.data = json.loads(self.path.read_text(encoding="utf8"))
+            except ValueError:
+                self.data = {}
+            if self.data.get("version") != self.VERSION:
+                self.data = {}
+
+    @staticmethod
+    def digest(data: Any) -> str:
+        """Get a stable SHA-256 hex digest of bytes, strings, or any JSON/repr-able data."""
+        if isinstance(data, bytes):
+            raw = data
+        elif isinstance(data, str):
+            raw = data.encode("utf8")
+        else:
+            raw = json.dumps(data, default=repr).encode("utf8")
+        return hashlib.sha256(raw).hexdigest()
+
+    @classmethod
+    def digest_file(cls, path: Optional[Path]) -> Optional[str]:
+        """Get the SHA-256 hex digest of a file, or None if there's no file."""
+        if not path or not path.is_file():
+            return None
+        return cls.digest(path.read_bytes())
+
+    @staticmethod
+    def stat(path: Path) -> list[Any]:
+        if path.is_dir():
+            return [
+                [x.name, x.stat().st_size, x.stat().st_mtime_ns]
+                for x in get_media_files(path)
+            ]
+        stat = path.stat()
+        return [stat.st_size, stat.st_mtime_ns]
+
+    @property
+    def outputs(self) -> List[Path]:
+        """The paths the NFOs were last saved to."""
+        return [Path(x["path"]) for x in self.data.get("outputs", [])]
+
+    @property
+    def output(self) -> Optional[Path]:
+        """The path the first NFO was last saved to."""
+        return next(iter(self.outputs), None)
+
+    def is_current(self, sources: List[Source]) -> bool:
+        """Check if regenerating the NFO of each source would produce the same NFOs as the ones last saved."""
+        if not self.data:
+            return False
+        if self.data["file"] != self.stat(self.file):
+            return False
+        if time.time() - self.data["metadata"]["time"] > self.METADATA_TTL:
+            return False
+        if len(sources) != len(self.data["outputs"]):
+            return False
+        for (template, artwork), output in zip(sources, self.data["outputs"]):
+            if output["template"] != self.digest_file(template):
+                return False
+            if output["artwork"] != self.digest_file(artwork):
+                return False
+            if output["sha256"] != self.digest_file(Path(output["path"])):
+                return False
+        return True
+
+    def save(self, sources: List[Source], outputs: List[Path]) -> None:
+        """Record the inputs and outputs of a successful generation, with an output path per source."""
+        self.data = {
+            "version": self.VERSION,
+            "file": self.stat(self.file),
+            "metadata": {
+                "time": time.time()
+            },
+            "outputs": [
+                {
+                    "template": self.digest_file(template),
+                    "artwork": self.digest_file(artwork),
+                    "path": str(output.resolve()),
+                    "sha256": self.digest_file(output)
+                }
+                for (template, artwork), output in zip(sources, outputs)
+            ]
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(self.data, indent=2), encoding="utf8")
+
+
+__ALL__ = (Manifest, Source)
@@ -0,0 +1,480 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import Future, as_completed, wait
+from contextlib import contextmanager
+from typing import Any, Callable, Hashable, Iterator, Optional, TypeVar, Union
+from urllib.parse import urlparse
+
+import requests
+from requests import RequestException, Response
+from requests.adapters import HTTPAdapter
+
+from nfog.cache import Cache
+from nfog.config import config
+from nfog.parsers.gallery import get_domain
+from nfog.ratelimit import RateLimiter
+from nfog.timing import Timings, format_bytes, span
+
+# registrable domain -> provider name, for looking up per-provider settings
+PROVIDERS = {
+    "imdb.com": "imdb",
+    "themoviedb.org": "tmdb",
+    "fanart.tv": "fanart-tv",
+    "imgbox.com": "gallery",
+    "beyondhd.co": "gallery"
+}
+
+DEFAULT_TIMEOUT = 10.0
+
+# connection pools shared by every Session of the process, so each NFO reuses the connections of the
+# ones before it, keeping up to `network.pool-size` connections per host for concurrent generations
+POOL_SIZE = int(config.get("network", {}).get("pool-size", 16))
+ADAPTERS = {
+    "https://": HTTPAdapter(pool_maxsize=POOL_SIZE),
+    "http://": HTTPAdapter(pool_maxsize=POOL_SIZE)
+}
+
+T = TypeVar("T")
+
+
+def get_provider(url: str) -> str:
+    """Get the provider name of a URL, or its host name if it's not a known provider."""
+    return PROVIDERS.get(get_domain(url)) or urlparse(url).hostname or url
+
+
+def get_timeout(provider: str) -> float:
+    """
+    Get the request timeout in seconds for a provider.
+    Configurable per-provider at `network.timeouts.<provider>`, or for all at `network.timeout`.
+    """
+    network = config.get("network", {})
+    return float(network.get("timeouts", {}).get(provider, network.get("timeout", DEFAULT_TIMEOUT)))
+
+
+class DeadlineExceeded(Exception):
+    """The time budget for generating an NFO has been used up."""
+
+
+class CircuitOpen(Exception):
+    """Requests to a provider are being skipped after repeated failures."""
+
+
+class BudgetExceeded(Exception):
+    """The request budget of a provider for generating an NFO has been used up."""
+
+
+class Deadline:
+    """Overall time budget for generating an NFO. No budget is enforced if `seconds` is None."""
+
+    def __init__(self, seconds: Optional[float] = None):
+        self.seconds = seconds
+        self.end = time.monotonic() + seconds if seconds else None
+
+    @property
+    def remaining(self) -> Optional[float]:
+        """Seconds left in the budget, or None if there's no budget."""
+        if self.end is None:
+            return None
+        return max(self.end - time.monotonic(), 0.0)
+
+    def check(self) -> None:
+        """Raise DeadlineExceeded if the budget has been used up."""
+        if self.remaining == 0.0:
+            raise DeadlineExceeded(f"The deadline of {self.seconds}s has passed.")
+
+    def timeout(self, timeout: float) -> float:
+        """Shorten a timeout to fit within the remaining budget."""
+        self.check()
+        remaining = self.remaining
+        return timeout if remaining is None else min(timeout, remaining)
+
+
+class CircuitBreaker:
+    """
+    Stop calling a provider after `threshold` failures in a row.
+
+    Once tripped, calls fail immediately with CircuitOpen for `cooldown` seconds,
+    after which a single trial call is let through, while concurrent calls keep
+    failing. A success closes the circuit, while another failure trips it again.
+    A trial call that never reports back is replaced by another after `cooldown`.
+    """
+
+    _breakers: dict[str, CircuitBreaker] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, name: str, threshold: int = 3, cooldown: float = 60.0):
+        self.name = name
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_at: Optional[float] = None  # when the trial call of the half-open circuit was let through
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get(cls, name: str) -> CircuitBreaker:
+        """Get the process-wide circuit breaker of a provider, configurable at `network.breaker`."""
+        with cls._registry_lock:
+            if name not in cls._breakers:
+                settings = config.get("network", {}).get("breaker", {})
+                cls._breakers[name] = cls(
+                    name,
+                    threshold=int(settings.get("threshold", 3)),
+                    cooldown=float(settings.get("cooldown", 60.0))
+                )
+            return cls._breakers[name]
+
+    def allow(self) -> bool:
+        """Check if a call may be made, letting a trial call through once the cooldown passes."""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            now = time.monotonic()
+            if now - self.opened_at < self.cooldown:
+                return False
+            if self.trial_at is not None and now - self.trial_at < self.cooldown:
+                # half-open, another call is already the trial
+                return False
+            self.trial_at = now
+            return True
+
+    def success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_at = None
+
+    def failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.trial_at is not None or self.failures >= self.threshold:
+                # a failed trial trips it again right away
+                self.opened_at = time.monotonic()
+                self.trial_at = None
+
+    @contextmanager
+    def guard(self) -> Iterator[None]:
+        """Run a call through the circuit breaker, counting any exception as a failure."""
+        if not self.allow():
+            raise CircuitOpen(f"Skipped {self.name}, it failed {self.failures} times in a row.")
+        try:
+            yield
+        except Exception:
+            self.failure()
+            raise
+        self.success()
+
+
+class Usage:
+    """
+    Network usage of a single NFO per provider: requests, bytes received, cache hits, and latencies.
+
+    Providers can be given a budget of requests per NFO at `network.budgets.<provider>`,
+    or every other provider at `network.budgets."*"`. Requests past the budget fail with
+    BudgetExceeded before they're sent, and code that knows how many requests it's about
+    to make can `check()` for all of them up front.
+
+    The Cache keys looked up through `cached()` are recorded in `keys`, e.g., to snapshot
+    the data an NFO used.
+    """
+
+    _active = threading.local()
+
+    def __init__(self, budgets: Optional[dict[str, int]] = None):
+        if budgets is None:
+            budgets = config.get("network", {}).get("budgets", {})
+        self.budgets = {k: int(v) for k, v in budgets.items()}
+        self.keys: dict[tuple[str, Hashable], str] = {}  # (namespace, key) -> provider
+        self.stats: defaultdict[str, dict[str, Any]] = defaultdict(
+            lambda: {"requests": 0, "bytes": 0, "cache_hits": 0, "latencies": []}
+        )
+        self._lock = threading.Lock()
+
+    @classmethod
+    def active(cls) -> Optional[Usage]:
+        """Get the Usage activated on the current thread, for code that doesn't go through a Session."""
+        return getattr(cls._active, "usage", None)
+
+    @contextmanager
+    def activate(self) -> Iterator[None]:
+        """Count requests made on the current thread within the context, see `active()`."""
+        previous = self.active()
+        self._active.usage = self
+        try:
+            yield
+        finally:
+            self._active.usage = previous
+
+    def check(self, provider: str, count: int = 1) -> None:
+        """Raise BudgetExceeded if making `count` more requests would exceed the provider's budget."""
+        budget = self.budgets.get(provider, self.budgets.get("*"))
+        if budget is None:
+            return
+        with self._lock:
+            used = self.stats[provider]["requests"]
+        if used + count > budget:
+            raise BudgetExceeded(
+                f"{count} more {provider} requests would exceed its budget of {budget} per NFO, {used} are used."
+            )
+
+    def record(self, provider: str, size: int, seconds: float) -> None:
+        """Count a request made to the provider, with the bytes received and how long it took."""
+        with self._lock:
+            stats = self.stats[provider]
+            stats["requests"] += 1
+            stats["bytes"] += size
+            stats["latencies"].append(seconds)
+
+    def hit(self, provider: str) -> None:
+        """Count data of the provider that was cached, saving a request."""
+        with self._lock:
+            self.stats[provider]["cache_hits"] += 1
+
+    def used(self, provider: str, namespace: str, key: Hashable) -> None:
+        """Record that the NFO used the provider's data cached at a key, see `keys`."""
+        with self._lock:
+            self.keys[(namespace, key)] = provider
+
+    def cached(self, provider: str, namespace: str, key: Hashable, factory: Callable[[], T]) -> T:
+        """Get a value from the Cache, counting a cache hit if factory() didn't have to be called."""
+        self.used(provider, namespace, key)
+        called = False
+
+        def create() -> T:
+            nonlocal called
+            called = True
+            return factory()
+
+        value = Cache.get(namespace, key, create)
+        if not called:
+            self.hit(provider)
+        return value
+
+    def merge(self, other: Usage) -> None:
+        """Add the usage of another NFO, e.g., of another output rendered from the same data."""
+        with other._lock:
+            stats = {provider: dict(x, latencies=list(x["latencies"])) for provider, x in other.stats.items()}
+            keys = dict(other.keys)
+        with self._lock:
+            self.keys.update(keys)
+            for provider, x in stats.items():
+                total = self.stats[provider]
+                total["requests"] += x["requests"]
+                total["bytes"] += x["bytes"]
+                total["cache_hits"] += x["cache_hits"]
+                total["latencies"].extend(x["latencies"])
+
+    def to_dict(self) -> dict[str, dict[str, Any]]:
+        """Get the usage per provider, with latencies summarized as their average and maximum in seconds."""
+        with self._lock:
+            return {
+                provider: {
+                    "requests": stats["requests"],
+                    "bytes": stats["bytes"],
+                    "cache_hits": stats["cache_hits"],
+                    "latency_avg": sum(stats["latencies"]) / len(stats["latencies"]) if stats["latencies"] else None,
+                    "latency_max": max(stats["latencies"], default=None)
+                }
+                for provider, stats in sorted(self.stats.items())
+            }
+
+    def summary(self) -> str:
+        lines = ["Network usage:"]
+        for provider, stats in self.to_dict().items():
+            line = (
+                f"  {provider}: {stats['requests']} requests, {format_bytes(stats['bytes'])}, "
+                f"{stats['cache_hits']} cache hits"
+            )
+            if stats["latency_avg"] is not None:
+                line += f", {stats['latency_avg']:.3f}s avg, {stats['latency_max']:.3f}s max"
+            if provider in self.budgets:
+                line += f" (budget {self.budgets[provider]})"
+            lines.append(line)
+        if len(lines) == 1:
+            lines.append("  No requests were made.")
+        return "\n".join(lines)
+
+
+def is_enabled(name: str) -> bool:
+    """Check if a boolean network option is enabled at `network.<name>`."""
+    value = config.get("network", {}).get(name, False)
+    if isinstance(value, str):
+        return value.lower() in ("1", "true", "yes", "on")
+    return bool(value)
+
+
+class Latency:
+    """Rolling window of recent request latencies per provider, for the life of the process."""
+
+    WINDOW = 100
+    MIN_SAMPLES = 10
+
+    _samples: defaultdict[str, deque[float]] = defaultdict(lambda: deque(maxlen=Latency.WINDOW))
+    _lock = threading.Lock()
+
+    @classmethod
+    def record(cls, provider: str, seconds: float) -> None:
+        with cls._lock:
+            cls._samples[provider].append(seconds)
+
+    @classmethod
+    @contextmanager
+    def measure(cls, provider: str) -> Iterator[None]:
+        """Record the latency of a successful call made within the context."""
+        start = time.monotonic()
+        yield
+        cls.record(provider, time.monotonic() - start)
+
+    @classmethod
+    def percentile(cls, provider: str, percent: float) -> Optional[float]:
+        """Get a latency percentile in seconds, or None if there are not enough samples yet."""
+        with cls._lock:
+            samples = sorted(cls._samples[provider])
+        if len(samples) < cls.MIN_SAMPLES:
+            return None
+        return samples[min(int(len(samples) * percent / 100), len(samples) - 1)]
+
+
+def submit(func: Callable[..., T], *args: Any) -> Future[T]:
+    """
+    Call a function on a new daemon thread, returning a Future of its result.
+    Unlike a thread pool, nested or abandoned calls can never starve each other,
+    and losing hedged or raced calls don't keep the process alive. The call's
+    spans are recorded with the caller's timings, see `Timings.bind()`.
+    """
+    future: Future[T] = Future()
+    func = Timings.bind(func)
+
+    def run() -> None:
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(func(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, daemon=True).start()
+    return future
+
+
+def hedge(func: Callable[[], T], provider: str) -> T:
+    """
+    Call a function, starting an identical second attempt if the first takes longer
+    than the provider's 95th percentile latency, and return whichever finishes first.
+
+    Only used when `network.hedge` is enabled. Until enough latencies are recorded,
+    the delay is `network.hedge-delay` seconds (2 by default).
+    """
+    if not is_enabled("hedge"):
+        return func()
+
+    delay = Latency.percentile(provider, 95) or float(config.get("network", {}).get("hedge-delay", 2.0))
+    first = submit(func)
+    done, _ = wait([first], timeout=delay)
+    if done:
+        return first.result()
+
+    error: Optional[BaseException] = None
+    for future in as_completed([first, submit(func)]):
+        try:
+            return future.result()
+        except Exception as e:
+            error = e
+    raise error or RuntimeError(f"Neither attempt of the {provider} call finished.")
+
+
+def race(*funcs: Callable[[], T], valid: Callable[[T], bool] = bool) -> T:
+    """
+    Call equivalent functions concurrently and return the first valid result.
+    If none return a valid result, the last error is raised, if any.
+    """
+    error: Optional[BaseException] = None
+    for future in as_completed([submit(func) for func in funcs]):
+        try:
+            result = future.result()
+        except Exception as e:
+            error = e
+            continue
+        if valid(result):
+            return result
+    if error:
+        raise error
+    raise ValueError("None of the providers returned a valid result.")
+
+
+class Session(requests.Session):
+    """
+    Requests Session with per-provider timeouts, rate limits, circuit breakers, and
+    request budgets, bound by a Deadline. Every request is counted in its Usage.
+
+    Every request gets the provider's timeout unless one is provided, shortened to
+    fit within the deadline. Connection errors, timeouts, and 5xx/429 responses
+    count as failures towards the provider's circuit breaker. Requests to rate
+    limited providers wait for their turn, and 429/503 responses hold back further
+    requests from all processes for the Retry-After delay.
+
+    Sessions are made per NFO for its deadline, usage, and headers, but connections
+    are pooled by the process, see `ADAPTERS`, and outlive the Session.
+    """
+
+    def __init__(self, deadline: Optional[Deadline] = None, usage: Optional[Usage] = None):
+        super().__init__()
+        for prefix, adapter in ADAPTERS.items():
+            self.mount(prefix, adapter)
+        self.deadline = deadline or Deadline()
+        self.usage = usage or Usage()
+
+    def close(self) -> None:
+        # unmount the shared adapters rather than closing the process's connection pools
+        self.adapters.clear()
+
+    def request(self, method: str, url: Union[str, bytes], *args: Any, **kwargs: Any) -> Response:
+        if isinstance(url, bytes):
+            url = url.decode("utf8")
+        provider = get_provider(url)
+        breaker = CircuitBreaker.get(provider)
+        if not breaker.allow():
+            raise CircuitOpen(f"Skipped {provider}, it failed {breaker.failures} times in a row.")
+        self.usage.check(provider)
+
+        with span(f"http.{provider}", method=method, url=url) as timed:
+            limiter = RateLimiter.get(provider)
+            if limiter and not limiter.acquire(self.deadline.remaining):
+                raise DeadlineExceeded(f"The deadline of {self.deadline.seconds}s would pass waiting on {provider}.")
+
+            kwargs["timeout"] = self.deadline.timeout(kwargs.get("timeout") or get_timeout(provider))
+
+            start = time.monotonic()
+            try:
+                with Latency.measure(provider):
+                    res = super().request(method, url, *args, **kwargs)
+            except RequestException:
+                self.usage.record(provider, 0, time.monotonic() - start)
+                breaker.failure()
+                raise
+            self.usage.record(provider, 0 if kwargs.get("stream") else len(res.content), time.monotonic() - start)
+
+            if timed:
+                timed.args.update(status=res.status_code, length=res.headers.get("Content-Length"))
+
+        if limiter and res.status_code in (429, 503):
+            limiter.throttled(res.headers.get("Retry-After"))
+        if res.status_code >= 500 or res.status_code == 429:
+            breaker.failure()
+        else:
+            breaker.success()
+
+        return res
+
+
+# optional data may be skipped on these errors, instead of failing the whole NFO
+NETWORK_ERRORS = (RequestException, DeadlineExceeded, CircuitOpen, BudgetExceeded)
+
+
+__ALL__ = (
+    ADAPTERS, BudgetExceeded, CircuitBreaker, CircuitOpen, Deadline, DeadlineExceeded, Latency, NETWORK_ERRORS, Session,
+    Usage, get_provider, get_timeout, hedge, is_enabled, race, submit
+)
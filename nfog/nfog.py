@@ -2,22 +2,44 @@ from __future__ import annotations
 
 import gzip
 import logging
+import os
+import shlex
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Iterator, Optional
 
 import click
 import jsonpickle
 import toml
 from click_default_group import DefaultGroup
-from pymediainfo import MediaInfo
 
-from nfog import __version__
-from nfog.artwork import Artwork
+from nfog import __version__, api
+from nfog.batch import Item, WorkQueue, find_releases, get_worker_name
 from nfog.config import Directories, Files, config
 from nfog.constants import GROUP_SETTINGS
+from nfog.loader import load_object
+from nfog.manifest import Manifest, Source
+from nfog.network import Usage
+from nfog.probe import PROBE_MODE, PROBE_MODES, get_media_files, probe
+from nfog.serve import create_server
+from nfog.snapshot import VOLATILE_OPTIONS, Snapshot, get_snapshot_path, render_snapshot
 from nfog.templates import Template
 from nfog.templates.Group import TemplateGroup
+from nfog.timing import Timings, span
+from nfog.watch import Watcher
+from nfog.writer import write_lines
+
+
+def enable_timings(ctx: click.Context, param: click.Parameter, value: Any) -> Any:
+    """Start recording timings as soon as it's asked for, so template loading is included."""
+    if value:
+        Timings.enable(memory=param.name == "memprofile")
+        # even if the generation fails, so it isn't left recording, e.g., for the next `nfog.generate()`
+        ctx.call_on_close(Timings.disable)
+    return value
 
 
 @click.group(
@@ -65,23 +87,110 @@ def version() -> None:
 @click.option("-n", "--note", type=str, default=None, help="Notes/special information.")
 @click.option("-p", "--preview", type=str, default=None, help="Preview information, typically an URL.")
 @click.option("-e", "--encoding", type=str, default="utf8", help="Text-encoding for output, input is always UTF-8.")
+@click.option("-d", "--deadline", type=float, default=None,
+              help="Seconds to allow for network requests, after which optional data is skipped.")
+@click.option("--probe", "probe_mode", type=click.Choice(list(PROBE_MODES)), default=PROBE_MODE,
+              help="How thoroughly to probe files, 'fast' reads only headers but some fields are estimated.")
+@click.option("-f", "--force", is_flag=True, default=False,
+              help="Generate even if nothing has changed since the NFO was last generated.")
+@click.option("--timings", is_flag=True, default=False, callback=enable_timings,
+              help="Print how long each phase of the generation took.")
+@click.option("--trace", type=Path, default=None, callback=enable_timings,
+              help="Append the timed phases to a Chrome trace file, e.g., to aggregate batch runs.")
+@click.option("--memprofile", is_flag=True, default=False, callback=enable_timings,
+              help="Print the peak and retained memory of each phase, and the top allocation sites.")
+@click.option("--usage", is_flag=True, default=False,
+              help="Print the requests, bytes, and cache hits of each network provider.")
+@click.option("-o", "--output", "outputs", type=str, multiple=True,
+              help="Also render TEMPLATE[:ARTWORK] from the same data, e.g., 'bbcode/Movie:MiU'. Repeatable.")
+@click.option("--snapshot", type=Path, default=None,
+              help="Save the probed and fetched data to this file or folder, to re-render it with `nfo render`.")
 @click.pass_context
 def generate(
-    ctx: click.Context, file: Path, imdb: Optional[str], tmdb: Optional[str], tvdb: Optional[int], **__
+    ctx: click.Context,
+    file: Path,
+    imdb: Optional[str],
+    tmdb: Optional[str],
+    tvdb: Optional[int],
+    artwork: Optional[str],
+    force: bool,
+    timings: bool,
+    trace: Optional[Path],
+    memprofile: bool,
+    outputs: tuple[str, ...],
+    snapshot: Optional[Path],
+    **__
 ) -> None:
     """
-    Generates an NFO for the provided file.
+    Generates an NFO for the provided file or folder.
 
     \b
     The file provided should best represent the majority of the release.
     E.g., If Episode 1 and 2 has a fault not found on Episodes 3 onwards, then provide Episode 3.
+    Alternatively, provide the folder of a multi-file release, e.g., a Season pack, to probe every
+    file and let the template report the differences between them.
+
+    \b
+    Use -o/--output to render more templates from the same probed and fetched data,
+    e.g., an NFO and a BBCode description at once: nfo generate -a MiU -o bbcode/Movie:MiU FILE Movie
     """
+    recording = Timings.current()
+    if recording:
+        def report() -> None:
+            if timings:
+                print(recording.summary())
+            if memprofile:
+                print(recording.memory_summary())
+            if trace:
+                recording.write_trace(trace, file=str(file), template=ctx.invoked_subcommand)
+        ctx.call_on_close(report)
+
+    # let programmatic callers know what was generated, see `nfog.api.run()`
+    ctx.ensure_object(dict).update(file=file, template=ctx.invoked_subcommand, encoding=ctx.params["encoding"])
+
+    if not ctx.invoked_subcommand:
+        raise click.UsageError("Missing the template to generate with.", ctx)
     if not file.exists():
         raise click.ClickException(f"The provided path ({file}) does not exist.")
-    if not file.is_file():
-        raise click.ClickException(f"The provided path ({file}) is not to a file.")
+    if file.is_dir():
+        media_files = get_media_files(file)
+        if not media_files:
+            raise click.ClickException(f"The provided folder ({file}) does not contain any media files.")
+    elif not file.is_file():
+        raise click.ClickException(f"The provided path ({file}) is not to a file or folder.")
+    else:
+        media_files = [file]
+
+    sources: list[tuple[str, Optional[str]]] = [(ctx.invoked_subcommand, artwork)]
+    for output in outputs:
+        name, _, output_artwork = output.partition(":")
+        sources.append((name, output_artwork or None))
+    for name, source_artwork in sources:
+        if not generate.get_template_path(name).exists():
+            raise click.ClickException(f"The Template ({name}) was not found in {Directories.templates}.")
+        if source_artwork and not Files.artwork(source_artwork).exists():
+            raise click.ClickException(f"Artwork ({Files.artwork(source_artwork)}) does not exist.")
+    ctx.meta["nfog.outputs"] = sources
+
+    manifest = Manifest(
+        file,
+        ctx.invoked_subcommand,
+        ctx.meta.get("nfog.template_args", []),
+        {k: v for k, v in ctx.params.items() if k not in VOLATILE_OPTIONS or k == "outputs"}
+    )
+    ctx.meta["nfog.manifest"] = manifest
+    with span("manifest.check"):
+        # a snapshot needs the data, so it can't be skipped
+        is_current = not force and not snapshot and (ctx.obj or {}).get("save", True)
+        is_current = is_current and manifest.is_current(get_sources(sources))
+    if is_current:
+        ctx.ensure_object(dict)["unchanged"] = manifest.output
+        print(f"Skipped NFO for {file.name}, nothing has changed since it was last generated.")
+        for out_path in manifest.outputs:
+            print(f" + Saved to: {out_path}")
+        ctx.exit(0)
 
-    media_info = MediaInfo.parse(file)
+    media_info = probe(media_files[0], ctx.params["probe_mode"])
 
     if not imdb:
         imdb = media_info.general_tracks[0].to_data().get("imdb")
@@ -102,31 +211,433 @@ def generate(
         )
 
 
+def get_sources(sources: list[tuple[str, Optional[str]]]) -> list[Source]:
+    """Get the template and artwork file paths of each output."""
+    return [
+        (generate.get_template_path(name), Files.artwork(artwork) if artwork else None)
+        for name, artwork in sources
+    ]
+
+
+def get_template(ctx: click.Context, name: str) -> Template:
+    """Create another Template from the same `generate` options and template arguments."""
+    command = generate.get_command(ctx, name)
+    with command.make_context(name, list(ctx.meta.get("nfog.template_args", [])), parent=ctx) as sub_ctx:
+        return command.invoke(sub_ctx)
+
+
 @generate.result_callback()
 def generator(
     template: Template,
     file: Path,
-    artwork: Optional[str] = None,
     encoding: str = "utf8",
+    usage: bool = False,
+    snapshot: Optional[Path] = None,
     **__
-) -> None:
-    if artwork:
-        fn = Files.artwork(artwork)
-        if not fn.exists():
-            raise click.ClickException(f"Artwork ({fn}) does not exist.")
-        scope: dict[str, Any] = {}
-        with fn.open(encoding="utf8") as f:
-            code = compile(f.read(), fn, "exec")
-            eval(code, scope, scope)
-        artwork: Artwork = scope[artwork]
-        nfo = artwork.with_template(template)
+) -> tuple[Optional[str], Path]:
+    """
+    Render the Template with the Artwork, and save it next to the file.
+
+    Any extra outputs (`-o TEMPLATE[:ARTWORK]`) are rendered from the same probed
+    and fetched data, concurrently with the first. Their NFO texts and paths are
+    provided in `obj["outputs"]`.
+
+    Returns the NFO text and the path it was (or would be) saved to. Saving can be
+    skipped by passing `obj=dict(save=False)` when invoking `generate` programmatically.
+    Saved NFOs are written as they're rendered and never held in memory, so their
+    text is None, read it from the path instead.
+    """
+    ctx = click.get_current_context()
+    options = ctx.ensure_object(dict)
+    save = options.get("save", True)
+
+    sources: list[tuple[str, Optional[str]]] = ctx.meta["nfog.outputs"]
+    outputs = [(template, sources[0][1])]
+    for name, artwork in sources[1:]:
+        # the probe and metadata are cached, so only rendering is left
+        outputs.append((get_template(ctx, name), artwork))
+    templates = [x for x, _ in outputs]
+
+    def report_usage() -> None:
+        # once everything is done, as rendering may make requests, e.g., for preview images
+        total = Usage(template.usage.budgets)
+        for x in templates:
+            total.merge(x.usage)
+        options["usage"] = total.to_dict()
+        if usage:
+            print(total.summary())
+        for x in templates:
+            x.close()
+    ctx.call_on_close(report_usage)
+
+    out_paths = [x.file.parent / f"{x.release_name}{x.file_ext}" for x in templates]
+    if len(set(out_paths)) != len(out_paths):
+        raise click.ClickException("Multiple outputs would be saved to the same path, use different templates.")
+
+    def render(output: tuple[Template, Optional[str]], out_path: Path) -> tuple[Optional[str], Optional[bool]]:
+        template_, artwork_ = output
+        if artwork_:
+            lines = load_object(Files.artwork(artwork_), artwork_).lines(template_)
+        else:
+            lines = template_.lines()
+        with span("render", output=out_path.name):
+            if not save:
+                return "\n".join(lines), None
+            # lines are written as they're rendered
+            (changed_,) = write_lines(lines, (out_path, encoding))
+            return None, changed_
+
+    if len(outputs) == 1:
+        results = [render(outputs[0], out_paths[0])]
     else:
-        nfo = template.nfo
+        with ThreadPoolExecutor(max_workers=len(outputs)) as pool:
+            results = list(pool.map(Timings.bind(render), outputs, out_paths))
+
+    skipped = list(dict.fromkeys(x for t in templates for x in t.skipped))
+    options["skipped"] = skipped
+    options["estimated"] = template.estimated
+    options["outputs"] = [(nfo, out_path) for (nfo, _), out_path in zip(results, out_paths)]
+
+    for x, out_path, (_, changed) in zip(templates, out_paths, results):
+        if changed is None:
+            print(f"Rendered NFO for {x.release_name}")
+            continue
+        print(f"{['Unchanged', 'Generated'][changed]} NFO for {x.release_name}")
+        print(f" + Saved to: {out_path}")
+    for reason in skipped:
+        print(f" + Skipped {reason}")
+    for fields in template.estimated:
+        print(f" + Estimated by a fast probe, {fields}")
+
+    if snapshot:
+        snapshot = get_snapshot_path(snapshot, template.release_name)
+        with span("snapshot.save"):
+            Snapshot.capture(
+                templates, sources[0][0], sources[0][1], ctx.meta.get("nfog.template_args", []), ctx.params
+            ).save(snapshot)
+        print(f" + Snapshot saved to: {snapshot}")
+
+    nfo = results[0][0]
+    if not save or skipped:
+        # an NFO missing optional data shouldn't let the next generation skip it
+        return nfo, out_paths[0]
+
+    manifest: Manifest = ctx.meta["nfog.manifest"]
+    with span("manifest.save"):
+        manifest.save(sources=get_sources(sources), outputs=out_paths)
+
+    return nfo, out_paths[0]
+
+
+@cli.command()
+@click.option("-S", "--snapshot", "snapshots", type=Path, multiple=True, required=True,
+              help="Snapshot file, or folder of snapshots, to render. Repeatable.")
+@click.option("-t", "--template", type=str, default=None, help="Template to use instead of the snapshot's.")
+@click.option("-a", "--artwork", type=str, default=None, help="Artwork to use instead of the snapshot's.")
+@click.option("-O", "--out-dir", type=Path, default=None,
+              help="Folder to save the NFOs to, instead of next to the snapshot's files.")
+@click.option("-e", "--encoding", type=str, default=None, help="Text-encoding for output, instead of the snapshot's.")
+@click.option("-w", "--workers", type=int, default=None, help="Processes to render on, defaults to the CPU count.")
+def render(
+    snapshots: tuple[Path, ...],
+    template: Optional[str],
+    artwork: Optional[str],
+    out_dir: Optional[Path],
+    encoding: Optional[str],
+    workers: Optional[int]
+) -> None:
+    """
+    Render NFOs from snapshots saved by `generate --snapshot`.
+
+    \b
+    Nothing is probed or fetched, so the media files don't need to be available,
+    e.g., to re-render a whole library with new artwork:
+    nfo render -S ~/snapshots -a MiU
+    """
+    paths = []
+    for path in snapshots:
+        if path.is_dir():
+            paths.extend(sorted(path.glob(f"*{Snapshot.SUFFIX}")))
+        elif path.is_file():
+            paths.append(path)
+        else:
+            raise click.ClickException(f"The snapshot ({path}) does not exist.")
+    if not paths:
+        raise click.ClickException("No snapshots were found.")
+    if template and not TemplateGroup().get_template_path(template).exists():
+        raise click.ClickException(f"The Template ({template}) was not found in {Directories.templates}.")
+    if artwork and not Files.artwork(artwork).exists():
+        raise click.ClickException(f"Artwork ({Files.artwork(artwork)}) does not exist.")
+    if out_dir:
+        out_dir.mkdir(parents=True, exist_ok=True)
+
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+    args = (template, artwork, out_dir, encoding)
+
+    def render_all() -> Iterator[tuple[Path, Any]]:
+        if workers == 1:
+            for path in paths:
+                try:
+                    yield path, render_snapshot(path, *args)
+                except Exception as e:
+                    yield path, e
+            return
+        # rendering is pure CPU, so snapshots are rendered on a process pool
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(render_snapshot, path, *args) for path in paths]
+            for path, future in zip(paths, futures):
+                yield path, future.exception() or future.result()
+
+    failed = 0
+    for path, result in render_all():
+        if isinstance(result, Exception):
+            failed += 1
+            print(f"Failed to render {path.name}, {result}")
+            continue
+        release_name, out_path, changed, skipped = result
+        print(f"{['Unchanged', 'Generated'][changed]} NFO for {release_name}")
+        print(f" + Saved to: {out_path}")
+        for x in skipped:
+            print(f" + Skipped {x}, it's not in the snapshot")
+
+    if failed:
+        raise click.ClickException(f"Failed to render {failed} of {len(paths)} snapshots.")
+
+
+@cli.group(name="queue", context_settings=GROUP_SETTINGS)
+def queue_() -> None:
+    """
+    Generate NFOs for a batch of releases across processes and machines.
+
+    \b
+    A coordinator adds releases to a queue file, e.g., on the storage every machine
+    mounts, and workers on any machine claim and generate them until it's empty.
+    Interrupted batches resume where they stopped by running the workers again.
+    E.g., nfo queue add /mnt/archive/queue.db /mnt/archive/movies -g "-a MiU Movie"
+    and, on every machine, nfo queue work /mnt/archive/queue.db -j 4
+    """
+
+
+@queue_.command(name="add")
+@click.argument("queue", type=Path)
+@click.argument("dirs", type=Path, nargs=-1, required=True)
+@click.option("-g", "--generate-args", type=str, required=True,
+              help="Arguments to `generate` following the file path, e.g., '-a MiU Movie'.")
+@click.option("--folders", is_flag=True, default=False,
+              help="Add every folder of media files as one release, e.g., season packs, instead of every file.")
+def queue_add(queue: Path, dirs: tuple[Path, ...], generate_args: str, folders: bool) -> None:
+    """Add the releases within directories to a queue, skipping ones already added."""
+    for directory in dirs:
+        if not directory.is_dir():
+            raise click.ClickException(f"The provided path ({directory}) is not a directory.")
+    args = shlex.split(generate_args)
+    try:
+        api.insert_path("", args)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    work_queue = WorkQueue(queue)
+    releases = list(find_releases(dirs, folders=folders))
+    added = work_queue.add(releases, args)
+    print(f"Added {added} releases to {queue}, {len(releases) - added} were already added.")
+
+
+@queue_.command(name="work")
+@click.argument("queue", type=Path)
+@click.option("-j", "--jobs", type=int, default=1, help="Releases to generate at the same time.")
+@click.option("--lease", type=float, default=600.0,
+              help="Seconds a claimed release is held without renewal before other workers may claim it.")
+@click.option("--max-attempts", type=int, default=3, help="Attempts at a release before it's marked failed.")
+@click.option("--interval", type=float, default=5.0,
+              help="Seconds between checks for releases when the rest are claimed by other workers.")
+def queue_work(queue: Path, jobs: int, lease: float, max_attempts: int, interval: float) -> None:
+    """
+    Claim and generate releases from a queue until every release is done or failed.
+
+    \b
+    Releases claimed by other workers are waited for, so any release whose worker
+    stopped responding is claimed again once its lease runs out.
+    """
+    if not queue.is_file():
+        raise click.ClickException(f"The queue ({queue}) does not exist, add releases with `nfo queue add`.")
+    if jobs < 1:
+        raise click.ClickException("There must be at least one job.")
+    work_queue = WorkQueue(queue, lease=lease, max_attempts=max_attempts)
+    claimed: dict[str, Item] = {}
+    counts = {"done": 0, "failed": 0}
+    counts_lock = threading.Lock()
+
+    def work() -> None:
+        worker = get_worker_name()
+        try:
+            while True:
+                item = work_queue.claim(worker)
+                if not item:
+                    if work_queue.is_finished():
+                        return
+                    time.sleep(interval)
+                    continue
+                claimed[worker] = item
+                with work_queue.hold(item, worker) as lost:
+                    try:
+                        result = api.run(api.insert_path(item.path, item.args))
+                    except Exception as e:
+                        message = e.format_message() if isinstance(e, click.ClickException) else repr(e)
+                        print(f"Failed to generate NFO for {item.path}, {message}")
+                        work_queue.fail(item, worker, message)
+                        with counts_lock:
+                            counts["failed"] += 1
+                    else:
+                        if lost.is_set():
+                            print(f"Warning: The lease of {item.path} was lost, another worker may generate it too.")
+                        work_queue.complete(item, worker, {
+                            "release_name": result.release_name,
+                            "out_paths": [str(path) for _, path in result.outputs],
+                            "unchanged": result.unchanged,
+                            "skipped": result.skipped
+                        })
+                        with counts_lock:
+                            counts["done"] += 1
+                del claimed[worker]
+        finally:
+            work_queue.close()
+
+    print(f"Working on {queue} with {jobs} jobs...")
+    threads = [threading.Thread(target=work, name=f"nfog-queue-{i}", daemon=True) for i in range(jobs)]
+    for thread in threads:
+        thread.start()
+    try:
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(0.5)
+    except KeyboardInterrupt:
+        # give the releases being generated back, so other workers don't wait for their leases
+        for worker, item in list(claimed.items()):
+            work_queue.release(item, worker)
+        print(f"Stopped, released {len(claimed)} releases back to the queue.")
+        raise click.Abort()
+
+    print(f"Generated {counts['done']} releases, {counts['failed']} attempts failed.")
+    status = work_queue.counts()
+    print(f"Queue: {status['done']} done, {status['failed']} failed.")
+
+
+@queue_.command(name="status")
+@click.argument("queue", type=Path)
+@click.option("--failed", is_flag=True, default=False, help="List the failed releases and their last error.")
+def queue_status(queue: Path, failed: bool) -> None:
+    """Show how many releases of a queue are pending, claimed, done, and failed."""
+    if not queue.is_file():
+        raise click.ClickException(f"The queue ({queue}) does not exist.")
+    work_queue = WorkQueue(queue)
+    print(", ".join(f"{count} {status}" for status, count in work_queue.counts().items()))
+    if failed:
+        for path, attempts, error in work_queue.failures():
+            print(f"{path} ({attempts} attempts): {error}")
+
+
+@queue_.command(name="retry")
+@click.argument("queue", type=Path)
+def queue_retry(queue: Path) -> None:
+    """Queue every failed release of a queue again."""
+    if not queue.is_file():
+        raise click.ClickException(f"The queue ({queue}) does not exist.")
+    print(f"Queued {WorkQueue(queue).retry()} failed releases again.")
+
+
+@cli.command(context_settings=dict(default_map=config.get("cli", {}).get("watch", {})))
+@click.argument("dirs", type=Path, nargs=-1, required=True)
+@click.option("-g", "--generate-args", type=str, required=True,
+              help="Arguments to `generate` following the file path, e.g., '-a MiU Movie'.")
+@click.option("--settle", type=float, default=5.0, help="Seconds a file's size must be unchanged before generating.")
+@click.option("--interval", type=float, default=1.0, help="Seconds between checks for changes.")
+@click.option("--poll", is_flag=True, default=False, help="Poll for changes even if inotify is available.")
+@click.option("--existing", is_flag=True, default=False, help="Also generate for files that exist on startup.")
+def watch(
+    dirs: tuple[Path, ...], generate_args: str, settle: float, interval: float, poll: bool, existing: bool
+) -> None:
+    """
+    Watch directories and generate NFOs as new media files land.
+
+    \b
+    Runs forever, generating an NFO for each new or changed media file once it has
+    finished being written. Templates, artwork, and metadata stay loaded in memory
+    across releases, so only new data has to be probed and fetched.
+    E.g., nfo watch /downloads/complete -g "-a MiU Season 1"
+    """
+    args = shlex.split(generate_args)
+    try:
+        api.insert_path("", args)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    try:
+        watcher = Watcher(dirs, settle=settle, interval=interval, poll=poll, existing=existing)
+    except NotADirectoryError as e:
+        raise click.ClickException(str(e))
+
+    print(f"Watching {len(watcher.directories)} directories using {watcher.mode}...")
+    for file in watcher:
+        print(f"Detected {file}")
+        try:
+            generate.main(api.insert_path(file, args), prog_name="nfo generate", standalone_mode=False)
+        except click.ClickException as e:
+            e.show()
+        except click.Abort:
+            raise
+        except Exception as e:
+            # keep watching even if one release fails
+            print(f"Error: Failed to generate NFO for {file}, {e!r}")
+
+
+@cli.command(context_settings=dict(default_map=config.get("cli", {}).get("serve", {})))
+@click.option("-b", "--bind", type=str, default="127.0.0.1:8960",
+              help="Address to listen on, either HOST:PORT or a unix socket path (unix:/path/to.sock).")
+@click.option("-w", "--workers", type=int, default=4, help="Maximum amount of NFOs to generate at the same time.")
+@click.option("-q", "--queue", type=int, default=16, help="Maximum amount of requests waiting for a worker.")
+@click.option("-r", "--root", "roots", type=Path, multiple=True,
+              help="Only generate NFOs for releases within this folder. Repeatable.")
+def serve(bind: str, workers: int, queue: int, roots: tuple[Path, ...]) -> None:
+    """
+    Serve NFO generation over a local JSON API.
+
+    \b
+    GET  /templates  List available templates.
+    POST /generate   Generate and save an NFO, returning its text.
+    POST /render     Render an NFO without saving it.
+
+    \b
+    Request bodies are JSON objects, e.g.:
+    {"path": "/tv/Show.S01/Show.S01E01.mkv", "template": "Season", "args": ["1"],
+     "options": {"artwork": "MiU", "imdb": "tt0386676"}}
+
+    \b
+    Options are those of `generate` that don't write other files, e.g., `snapshot`,
+    `trace`, `memprofile`, and `outputs` are rejected.
+
+    \b
+    NFOs are written next to the requested path and there's no authentication, so
+    use -r/--root to only allow releases within your media folders, especially
+    when listening on anything other than localhost or a unix socket.
+    """
+    if workers < 1 or queue < 0:
+        raise click.ClickException("There must be at least one worker and the queue cannot be negative.")
+    for root in roots:
+        if not root.is_dir():
+            raise click.ClickException(f"The root ({root}) is not a folder.")
+
+    host = bind.rpartition(":")[0].strip("[]")
+    if not bind.startswith("unix:") and host not in ("127.0.0.1", "::1", "localhost"):
+        print(f"Warning: Listening on {host}, anyone that can reach it can generate NFOs without authentication.")
+        if not roots:
+            print("Warning: No -r/--root is set, NFOs can be written next to any path nfog can access.")
 
-    out_path: Path = file.parent / f"{template.release_name}{template.file_ext}"
-    out_path.write_text(nfo, encoding=encoding)
-    print(f"Generated NFO for {template.release_name}")
-    print(f" + Saved to: {out_path}")
+    server = create_server(bind, generate, workers=workers, queue=queue, roots=roots)
+    print(f"Serving on {bind} with {workers} workers...")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
 
 
 @cli.command(name="config")
@@ -171,9 +682,14 @@ def export(out_dir: Path) -> None:
     if not out_dir or not out_dir.is_dir():
         raise click.ClickException("Save Path must be directory.")
     art = {x.stem: x.read_text(encoding="utf8") for x in Directories.artwork.glob("*.py")}
-    tmpl = {x.stem: x.read_text(encoding="utf8") for x in Directories.templates.glob("*.py")}
+    # by file name, as templates may be Python or declarative TOML files
+    tmpl = {
+        x.name: x.read_text(encoding="utf8")
+        for extension in TemplateGroup.EXTENSIONS
+        for x in Directories.templates.glob(f"*{extension}")
+    }
     json = jsonpickle.dumps({
-        "version": 1,
+        "version": 2,
         "config": config,
         "artwork": art,
         "templates": tmpl
@@ -207,7 +723,10 @@ def import_(file: Path):
         path.write_text(data, encoding="utf8")
         print(f"Imported Artwork: {name}")
     for name, data in json["templates"].items():
-        path = (Directories.templates / name).with_suffix(".py")
+        path = Directories.templates / name
+        if path.suffix not in TemplateGroup.EXTENSIONS:
+            # version 1 exports only had Python templates, by name
+            path = path.with_suffix(".py")
         path.write_text(data, encoding="utf8")
         print(f"Imported Template: {name}")
     print(f"Successfully Imported from {file}!")
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from typing import Any, Optional
+
+from langcodes import closest_supported_match
+
+from nfog.cache import Cache
+from nfog.config import Directories
+from nfog.network import BudgetExceeded, DeadlineExceeded, Session
+
+
+class FanartTV:
+    """
+    Client for the fanart.tv v3 TV API with a persistent, revalidating cache.
+
+    Responses are reduced to the artwork needed and stored on disk with their
+    ETag and Last-Modified headers. Cached entries younger than `MAX_AGE` are
+    used as-is. Older entries are still returned immediately, while a background
+    request revalidates them with If-None-Match/If-Modified-Since so the next
+    lookup gets the refreshed data (stale-while-revalidate), unless the NFO has no
+    fanart.tv requests or time left, e.g., when rendering a snapshot offline.
+
+    The best banner per requested language is computed once per entry, making
+    repeat lookups a dictionary hit.
+    """
+
+    URL = "http://webservice.fanart.tv/v3/tv/{tvdb_id}"
+    MAX_AGE = 24 * 60 * 60
+    CACHE_DIR = Directories.cache / "fanart-tv"
+
+    _lock = threading.Lock()
+    _refreshing: set[int] = set()
+
+    def __init__(self, api_key: str, session: Session):
+        self.api_key = api_key
+        self.session = session
+
+    def get_banner(self, tvdb_id: int, language: str) -> Optional[str]:
+        """Get the URL of a wide banner image in the provided language."""
+        self.session.usage.used("fanart-tv", "fanart-tv", tvdb_id)
+        entry = Cache.get("fanart-tv", tvdb_id, lambda: self._load(tvdb_id))
+        if entry is None:
+            entry = self._fetch(tvdb_id, None)
+        else:
+            self.session.usage.hit("fanart-tv")
+            if time.time() - entry["time"] > self.MAX_AGE and self._can_refresh():
+                self._refresh_in_background(tvdb_id, entry)
+
+        best = entry["best"]
+        if language not in best:
+            best[language] = next((
+                url
+                for lang, url in entry["banners"]
+                if closest_supported_match(lang, [language], 5)
+            ), None)
+        return best[language]
+
+    def _fetch(self, tvdb_id: int, entry: Optional[dict[str, Any]]) -> dict[str, Any]:
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        r = self.session.get(self.URL.format(tvdb_id=tvdb_id), params={"api_key": self.api_key}, headers=headers)
+        if entry and r.status_code == 304:
+            entry = dict(entry, time=time.time())
+        else:
+            banners = []
+            if r.status_code != 404:
+                res = r.json()
+                error = res.get("error message")
+                if error and error != "Not found":
+                    raise ValueError(f"An unexpected error occurred while calling Fanart.tv, {res}")
+                # keep the order of the response, only unique languages matter for matching
+                banners = [(x["lang"], x["url"]) for x in res.get("tvbanner") or []]
+            entry = {
+                "time": time.time(),
+                "etag": r.headers.get("ETag"),
+                "last_modified": r.headers.get("Last-Modified"),
+                "banners": banners,
+                "best": {}
+            }
+
+        Cache.set("fanart-tv", tvdb_id, entry)
+        self._save(tvdb_id, entry)
+        return entry
+
+    def _can_refresh(self) -> bool:
+        """Check if the NFO's budget of fanart.tv requests and its deadline allow a refresh."""
+        try:
+            self.session.usage.check("fanart-tv")
+            self.session.deadline.check()
+        except (BudgetExceeded, DeadlineExceeded):
+            return False
+        return True
+
+    def _refresh_in_background(self, tvdb_id: int, entry: dict[str, Any]) -> None:
+        with self._lock:
+            if tvdb_id in self._refreshing:
+                return
+            self._refreshing.add(tvdb_id)
+
+        # a Session of its own, as the template's is closed once its NFO is generated
+        client = FanartTV(self.api_key, Session(self.session.deadline, self.session.usage))
+
+        def refresh() -> None:
+            try:
+                client._fetch(tvdb_id, entry)
+            except Exception as e:
+                print(f"Warning: Failed to refresh fanart.tv data for {tvdb_id}, {e!r}")
+            finally:
+                client.session.close()
+                with self._lock:
+                    self._refreshing.discard(tvdb_id)
+
+        # not a daemon, so a short-lived process finishes the refresh before exiting
+        threading.Thread(target=refresh, name=f"fanart-tv-{tvdb_id}").start()
+
+    def _load(self, tvdb_id: int) -> Optional[dict[str, Any]]:
+        path = self.CACHE_DIR / f"{tvdb_id}.json"
+        if not path.is_file():
+            return None
+        try:
+            entry = json.loads(path.read_text(encoding="utf8"))
+        except ValueError:
+            return None
+        entry["banners"] = [tuple(x) for x in entry["banners"]]
+        return entry
+
+    def _save(self, tvdb_id: int, entry: dict[str, Any]) -> None:
+        self.CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        path = self.CACHE_DIR / f"{tvdb_id}.json"
+        temp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        temp.write_text(json.dumps({**entry, "best": {}}), encoding="utf8")
+        temp.replace(path)
+
+
+__ALL__ = (FanartTV,)
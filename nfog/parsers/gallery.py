@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+Image = Tuple[str, str]
+Extractor = Callable[[str], List[Image]]
+
+EXTRACTORS: Dict[str, Extractor] = {}
+
+
+def register_extractor(*domains: str) -> Callable[[Extractor], Extractor]:
+    """
+    Register a function that extracts (link, thumbnail) image pairs from a gallery
+    page's HTML, for galleries hosted on any of the provided domains.
+
+    Templates may register their own extractors to support more image hosts:
+        >>> @register_extractor("example.com")
+        ... def example(page: str) -> list[tuple[str, str]]:
+        ...     return [(m.group(1), m.group(2)) for m in EXAMPLE_RE.finditer(page)]
+    """
+    def decorator(func: Extractor) -> Extractor:
+        for domain in domains:
+            EXTRACTORS[domain.lower()] = func
+        return func
+    return decorator
+
+
+def get_domain(url: str) -> str:
+    """Get the registrable domain of a URL, e.g., 'imgbox.com' for 'https://www.imgbox.com/g/1'."""
+    return ".".join(urlparse(url).netloc.lower().split(".")[-2:])
+
+
+def get_extractor(url: str) -> Optional[Extractor]:
+    """Get the extractor for a gallery URL, or None if the host is not supported."""
+    return EXTRACTORS.get(get_domain(url))
+
+
+IMGBOX_RE = re.compile(r'src="(https://thumbs2.imgbox.com.+/)(\w+)_b.([^"]+)')
+BEYONDHD_RE = re.compile(r'/image/([^"]+)"\D+src="(https://.*beyondhd.co/images.+/(\w+).md.[^"]+)')
+
+
+@register_extractor("imgbox.com")
+def imgbox(page: str) -> list[Image]:
+    return [
+        (f"https://imgbox.com/{m.group(2)}", f"{m.group(1)}{m.group(2)}_t.{m.group(3)}")
+        for m in IMGBOX_RE.finditer(page)
+    ]
+
+
+@register_extractor("beyondhd.co")
+def beyondhd(page: str) -> list[Image]:
+    return [
+        (f"https://beyondhd.co/image/{m.group(1)}", m.group(2))
+        for m in BEYONDHD_RE.finditer(page)
+    ]
+
+
+__ALL__ = (EXTRACTORS, register_extractor, get_domain, get_extractor)
@@ -1,20 +1,62 @@
 import json
 import re
-from typing import Any
-
-from requests import Session
+import time
+from typing import Any, Optional
+from urllib.error import HTTPError
+
+from imdb import Cinemagoer
+from imdb._exceptions import IMDbDataAccessError
+
+from nfog.network import Deadline, Session, Usage, get_timeout, hedge
+from nfog.ratelimit import RateLimiter
+
+
+def get_cinemagoer() -> Cinemagoer:
+    """
+    Get a Cinemagoer instance using nfog's IMDb timeout and cross-process rate limit.
+    Its requests are counted in the Usage active on the calling thread, if any.
+    """
+    cinemagoer = Cinemagoer(timeout=get_timeout("imdb"))
+    limiter = RateLimiter.get("imdb")
+    retrieve = cinemagoer.urlOpener.retrieve_unicode
+
+    def retrieve_unicode(url: str, size: int = -1) -> str:
+        usage = Usage.active()
+        if usage:
+            usage.check("imdb")
+        if limiter:
+            limiter.acquire()
+        start = time.monotonic()
+        content = ""
+        try:
+            content = retrieve(url, size)
+            return content
+        except IMDbDataAccessError as e:
+            error = e.args[0].get("original exception") if e.args and isinstance(e.args[0], dict) else None
+            if limiter and isinstance(error, HTTPError) and error.code in (429, 503):
+                limiter.throttled(error.headers.get("Retry-After"))
+            raise
+        finally:
+            if usage:
+                usage.record("imdb", len(content.encode("utf8")), time.monotonic() - start)
+
+    cinemagoer.urlOpener.retrieve_unicode = retrieve_unicode
+
+    return cinemagoer
 
 
 class IMDb:
-    def __init__(self, title_id: str):
+    def __init__(self, title_id: str, deadline: Optional[Deadline] = None, usage: Optional[Usage] = None):
         """
         Parameters:
             title_id: The IMDb Title ID excluding the `tt`.
+            deadline: Time budget shared with other requests for the same NFO.
+            usage: Network usage and request budgets shared with other requests for the same NFO.
         """
         super().__init__()
 
         self.id = title_id
-        self.session = self._get_session()
+        self.session = self._get_session(deadline, usage)
 
     def get_title_data(self) -> dict[str, Any]:
         payload = self._get_payload(f"https://www.imdb.com/title/tt{self.id}")
@@ -46,7 +88,7 @@ class IMDb:
         return episode_items
 
     def _get_payload(self, url: str) -> dict[str, Any]:
-        res = self.session.get(url)
+        res = hedge(lambda: self.session.get(url), "imdb")
         res.raise_for_status()
 
         source = res.text
@@ -65,9 +107,12 @@ class IMDb:
         return payload
 
     @staticmethod
-    def _get_session() -> Session:
-        session = Session()
+    def _get_session(deadline: Optional[Deadline] = None, usage: Optional[Usage] = None) -> Session:
+        session = Session(deadline, usage)
         session.headers.update({
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/119.0"
         })
         return session
+
+
+__ALL__ = (IMDb, get_cinemagoer)
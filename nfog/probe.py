@@ -0,0 +1,298 @@
+from __future__ import annotations
+
+import io
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from pymediainfo import MediaInfo
+
+from nfog.config import config
+from nfog.constants import MEDIA_EXTENSIONS
+from nfog.timing import span
+
+if TYPE_CHECKING:
+    from _typeshed import WriteableBuffer
+
+ProbeKey = Tuple[str, int, int, str]  # resolved path, size, mtime, mode
+
+# how thoroughly files are probed, by MediaInfo's parse speed, 'normal' is MediaInfo's default
+PROBE_MODES = {"fast": 0.0, "normal": 0.5, "full": 1.0}
+PROBE_MODE = config.get("probe", {}).get("mode", "normal")
+# bytes a fast probe may read, and the smallest read it makes, see `BoundedReader`
+FAST_LIMIT = int(config.get("probe", {}).get("fast-limit", 16 * 1024 * 1024))
+FAST_BLOCK_SIZE = int(config.get("probe", {}).get("fast-block-size", 256 * 1024))
+
+# fields MediaInfo may measure from the part of the stream it read, rather than read from headers
+ESTIMATED_FIELDS = (
+    "duration", "bit_rate", "maximum_bit_rate", "bit_rate_mode", "overall_bit_rate", "overall_bit_rate_mode",
+    "frame_count", "stream_size", "scan_type", "scan_order"
+)
+
+# recently probed files, so multiple templates rendered from one invocation probe each file once
+CACHE_SIZE = 256
+_cache: OrderedDict[ProbeKey, MediaInfo] = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+class ProbedMediaInfo(MediaInfo):
+    """MediaInfo that keeps the XML it was parsed from, e.g., to save it in a snapshot."""
+
+    def __init__(self, xml: str):
+        super().__init__(xml)
+        self.xml = xml
+
+
+# media information provided up front, e.g., from a snapshot, used instead of probing the files
+_provided: dict[str, MediaInfo] = {}
+_provided_folders: dict[str, list[Path]] = {}
+
+
+def provide(path: Path, media_info: Union[MediaInfo, list[Path]]) -> None:
+    """
+    Provide the media information of a file, or the media files of a folder, to use
+    instead of probing. The files don't have to exist, e.g., when rendering a snapshot.
+    """
+    with _cache_lock:
+        if isinstance(media_info, list):
+            _provided_folders[str(path)] = media_info
+        else:
+            _provided[str(path)] = media_info
+
+
+def withdraw(path: Path) -> None:
+    """Stop providing the media information of a file, or the media files of a folder, see `provide()`."""
+    with _cache_lock:
+        _provided.pop(str(path), None)
+        _provided_folders.pop(str(path), None)
+
+
+def is_folder(path: Path) -> bool:
+    """Check if a path is a folder, or was provided as one, see `provide()`."""
+    return str(path) in _provided_folders or path.is_dir()
+
+
+def get_media_files(folder: Path) -> list[Path]:
+    """Get a sorted list of media files directly within a folder."""
+    if str(folder) in _provided_folders:
+        return list(_provided_folders[str(folder)])
+    return sorted(
+        x
+        for x in folder.iterdir()
+        if x.is_file() and x.suffix.lower() in MEDIA_EXTENSIONS
+    )
+
+
+class BoundedReader(io.RawIOBase):
+    """
+    Read-only binary file for MediaInfo that reads at most `limit` bytes of the file.
+
+    MediaInfo reads small buffers and seeks around, e.g., to the end for the duration,
+    which on network mounts (NFS, SMB) is a round-trip each. Reads are instead made
+    in whole blocks, which are kept so reading them again is free, and sequential
+    reads double how many blocks are read ahead at once, up to `max_ahead`. Once
+    `limit` bytes were read, the rest of the file reads as empty, so MediaInfo
+    finishes with what it has.
+    """
+
+    def __init__(self, path: Path, limit: int = FAST_LIMIT, block_size: int = FAST_BLOCK_SIZE, max_ahead: int = 8):
+        super().__init__()
+        self.path = path
+        self.limit = limit
+        self.block_size = block_size
+        self.max_ahead = max_ahead
+        self.mode = "rb"
+        self.reads = 0
+        self.bytes_read = 0
+        self._file = open(path, "rb", buffering=0)
+        self._size = os.fstat(self._file.fileno()).st_size
+        self._position = 0
+        self._blocks: Dict[int, bytes] = {}
+        self._ahead = 1
+        self._next_block = -1  # the block after the last read, to detect sequential reads
+
+    @property
+    def exhausted(self) -> bool:
+        """Check if the limit was reached, i.e., MediaInfo may not have seen everything it wanted."""
+        return self.bytes_read >= self.limit
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self._size
+        self._position = max(offset, 0)
+        return self._position
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = self._size - self._position
+        data = bytearray()
+        while size > 0 and self._position < self._size:
+            index, start = divmod(self._position, self.block_size)
+            block = self._blocks.get(index)
+            if block is None:
+                if self.exhausted:
+                    break
+                block = self._read_block(index)
+            chunk = block[start:start + size]
+            if not chunk:
+                break
+            data += chunk
+            self._position += len(chunk)
+            size -= len(chunk)
+        return bytes(data)
+
+    def readinto(self, buffer: WriteableBuffer) -> int:
+        view = memoryview(buffer).cast("B")
+        data = self.read(len(view))
+        view[:len(data)] = data
+        return len(data)
+
+    def _read_block(self, index: int) -> bytes:
+        self._ahead = min(self._ahead * 2, self.max_ahead) if index == self._next_block else 1
+        # stop short of blocks that were already read, and of the limit
+        count = min(self._ahead, -(-(self.limit - self.bytes_read) // self.block_size))
+        while count > 1 and any(index + i in self._blocks for i in range(count)):
+            count -= 1
+        count = max(count, 1)
+
+        self._file.seek(index * self.block_size)
+        data = self._file.read(count * self.block_size)
+        self.reads += 1
+        self.bytes_read += len(data)
+        for i in range(count):
+            self._blocks[index + i] = data[i * self.block_size:(i + 1) * self.block_size]
+        self._next_block = index + count
+        return self._blocks[index]
+
+    def close(self) -> None:
+        self._file.close()
+        super().close()
+
+
+def check_mode(mode: str) -> str:
+    if mode not in PROBE_MODES:
+        raise ValueError(f"Unknown probe mode ({mode}), expected any of {', '.join(PROBE_MODES)}.")
+    return mode
+
+
+def get_estimated(tracks: Iterable[Any], mode: str) -> List[str]:
+    """
+    Get the fields of each track that may be estimated, e.g., 'Video #1: bit_rate, frame_count'.
+    Only fast probes are considered estimated, as they measure only the start of the stream.
+    Tracks are MediaInfo tracks, or `BaseTrack`s, which add the fields of the full-file
+    scans the fast probe skipped, see `BaseTrack.unscanned`.
+    """
+    if mode != "fast":
+        return []
+    estimated = []
+    for track in tracks:
+        fields = [x for x in ESTIMATED_FIELDS if getattr(track, x) is not None]
+        fields += [x for x in getattr(track, "unscanned", None) or [] if x not in fields]
+        if fields:
+            name = track.track_type
+            if track.stream_identifier is not None and track.track_type != "General":
+                name += f" #{int(track.stream_identifier) + 1}"
+            estimated.append(f"{name}: {', '.join(fields)}")
+    return estimated
+
+
+def _get_key(file: Path, mode: str) -> ProbeKey:
+    stat = file.stat()
+    return str(file.resolve()), stat.st_size, stat.st_mtime_ns, mode
+
+
+def _get_cached(key: ProbeKey) -> Optional[MediaInfo]:
+    with _cache_lock:
+        media_info = _cache.get(key)
+        if media_info is not None:
+            _cache.move_to_end(key)
+        return media_info
+
+
+def _set_cached(key: ProbeKey, media_info: MediaInfo) -> None:
+    with _cache_lock:
+        _cache[key] = media_info
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def probe(file: Path, mode: str = PROBE_MODE) -> MediaInfo:
+    """
+    Parse a file's media information.
+    The most recently probed files are kept in memory until they change.
+
+    The mode is how thoroughly it's parsed, see `PROBE_MODES`. A 'fast' probe reads
+    only the headers, through a `BoundedReader`, so probing a file on a network
+    mount takes a handful of reads, but some fields are estimated (`get_estimated()`).
+    A 'full' probe reads as much of the file as needed for exact values.
+    """
+    if str(file) in _provided:
+        return _provided[str(file)]
+    key = _get_key(file, check_mode(mode))
+    media_info = _get_cached(key)
+    if media_info is None:
+        with span("probe", file=file.name, mode=mode):
+            media_info = ProbedMediaInfo(_probe_xml(file, mode))
+        _set_cached(key, media_info)
+    return media_info
+
+
+def _probe_xml(file: Path, mode: str = PROBE_MODE) -> str:
+    # MediaInfo objects aren't picklable, so workers return the XML to re-parse
+    if mode != "fast":
+        return MediaInfo.parse(file, output="OLDXML", parse_speed=PROBE_MODES[mode])
+    with BoundedReader(file) as reader, span("probe.read", file=file.name) as s:
+        xml = MediaInfo.parse(reader, output="OLDXML", parse_speed=PROBE_MODES[mode], buffer_size=reader.block_size)
+        if s:
+            s.args.update(reads=reader.reads, bytes=reader.bytes_read)
+    return xml
+
+
+def probe_many(files: Iterable[Path], workers: Optional[int] = None, mode: str = PROBE_MODE) -> list[MediaInfo]:
+    """
+    Parse the media information of multiple files concurrently on a process pool.
+    Results are returned in the same order as the files were provided.
+    Files probed recently are taken from memory, see `probe()`.
+    """
+    files = list(files)
+    check_mode(mode)
+    results: Dict[Path, MediaInfo] = {file: _provided[str(file)] for file in files if str(file) in _provided}
+    keys = {file: _get_key(file, mode) for file in files if file not in results}
+    for file, key in keys.items():
+        media_info = _get_cached(key)
+        if media_info is not None:
+            results[file] = media_info
+    missing = [file for file in keys if file not in results]
+
+    if len(missing) == 1:
+        results[missing[0]] = probe(missing[0], mode)
+    elif missing:
+        workers = min(workers or os.cpu_count() or 1, len(missing))
+        with span("probe.many", files=len(missing), workers=workers, mode=mode):
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for file, xml in zip(missing, pool.map(_probe_xml, missing, repeat(mode))):
+                    results[file] = ProbedMediaInfo(xml)
+                    _set_cached(keys[file], results[file])
+
+    return [results[file] for file in files]
+
+
+__ALL__ = (
+    PROBE_MODES, BoundedReader, ProbedMediaInfo, get_estimated, get_media_files, is_folder, probe, probe_many, provide,
+    withdraw
+)
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import os
+import struct
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import IO, Iterator, Optional
+
+from nfog.config import Directories, config
+
+if sys.platform == "win32":
+    import msvcrt
+else:
+    import fcntl
+
+
+@contextmanager
+def locked(path: Path) -> Iterator[IO[bytes]]:
+    """Open a file for reading and writing, holding an exclusive lock across processes."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with os.fdopen(os.open(path, os.O_RDWR | os.O_CREAT), "r+b") as f:
+        if sys.platform == "win32":
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        else:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield f
+        finally:
+            if sys.platform == "win32":
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header, in either delay-seconds or HTTP-date form, to seconds from now."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """
+    Token bucket rate limiter shared by every nfog process on this machine.
+
+    The bucket holds up to `burst` tokens and refills at `rate` tokens per second.
+    Each request takes a token, waiting for one to refill if the bucket is empty.
+    Its state lives in a small file in the user cache directory, updated under an
+    exclusive file lock, so parallel runs share a single budget instead of each
+    hammering the provider at full speed.
+
+    When the provider throttles anyway, `throttled()` empties the bucket and holds
+    back every process until the Retry-After delay has passed.
+    """
+
+    STATE = struct.Struct("<3d")  # tokens, last update, blocked until
+    DIRECTORY = Directories.cache / "ratelimit"
+
+    _limiters: dict[str, Optional[RateLimiter]] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, name: str, rate: float, burst: float):
+        self.name = name
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.path = self.DIRECTORY / f"{name}.bucket"
+
+    @classmethod
+    def get(cls, name: str) -> Optional[RateLimiter]:
+        """
+        Get the rate limiter of a provider, or None if it's not rate limited.
+        Providers are not limited unless configured at `network.rate-limits.<provider>`
+        with `rate` (requests per second) and `burst`. A rate of 0 disables the limit.
+        """
+        with cls._registry_lock:
+            if name not in cls._limiters:
+                settings = config.get("network", {}).get("rate-limits", {}).get(name, {})
+                rate = float(settings.get("rate", 0))
+                cls._limiters[name] = cls(name, rate, float(settings.get("burst", 1))) if rate > 0 else None
+            return cls._limiters[name]
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        Take a token, waiting until one is available.
+        Returns False without taking a token if that would take longer than `timeout` seconds.
+        """
+        end = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            wait = self._take()
+            if not wait:
+                return True
+            if end is not None and time.monotonic() + wait > end:
+                return False
+            time.sleep(wait)
+
+    def throttled(self, retry_after: Optional[str] = None) -> None:
+        """Hold back all requests for the Retry-After delay, or the time to refill one token."""
+        delay = parse_retry_after(retry_after)
+        if delay is None:
+            delay = 1 / self.rate
+        with locked(self.path) as f:
+            _, _, blocked_until = self._read(f)
+            now = time.time()
+            self._write(f, 0.0, now, max(blocked_until, now + delay))
+
+    def _take(self) -> float:
+        """Take a token if one is available, otherwise return the seconds to wait for one."""
+        with locked(self.path) as f:
+            tokens, updated, blocked_until = self._read(f)
+            now = time.time()
+            if now < blocked_until:
+                return blocked_until - now
+            tokens = min(self.burst, tokens + max(now - updated, 0.0) * self.rate)
+            if tokens >= 1:
+                self._write(f, tokens - 1, now, blocked_until)
+                return 0.0
+            self._write(f, tokens, now, blocked_until)
+            return (1 - tokens) / self.rate
+
+    def _read(self, f: IO[bytes]) -> tuple[float, float, float]:
+        f.seek(0)
+        data = f.read(self.STATE.size)
+        if len(data) < self.STATE.size:
+            return self.burst, time.time(), 0.0
+        return self.STATE.unpack(data)
+
+    def _write(self, f: IO[bytes], tokens: float, updated: float, blocked_until: float) -> None:
+        f.seek(0)
+        f.write(self.STATE.pack(tokens, updated, blocked_until))
+        f.flush()
+
+
+__ALL__ = (RateLimiter, locked, parse_retry_after)
@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import json
+import os
+import socket
+import socketserver
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from typing import Any, List, Optional, Sequence, Union
+
+import click
+
+from nfog import api
+from nfog.templates.Group import TemplateGroup
+
+# `generate` options clients may set, the rest write or append to files of the client's
+# choosing, e.g., `snapshot` and `trace`, or profile the whole process, e.g., `memprofile`
+OPTIONS = (
+    "imdb", "tmdb", "tvdb", "artwork", "source", "note", "preview", "encoding", "deadline", "probe_mode", "force",
+    "usage"
+)
+
+
+class PoolMixIn(socketserver.BaseServer):
+    """
+    Handle requests on a bounded pool of worker threads.
+
+    Up to `workers` requests are handled at once, with up to `queue` more waiting
+    for a free worker. Requests beyond that are rejected immediately with a
+    503 instead of piling up.
+    """
+
+    # the `generate` command group, and the folders releases must be in, set by `create_server()`
+    command: TemplateGroup
+    roots: List[Path]
+
+    def __init__(self, *args: Any, workers: int = 4, queue: int = 16, **kwargs: Any):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="nfog-worker")
+        self._slots = threading.BoundedSemaphore(workers + queue)
+        self.roots = []
+        super().__init__(*args, **kwargs)
+
+    def is_allowed(self, path: Path) -> bool:
+        """Check if a release path is within one of the roots, if any are set."""
+        if not self.roots:
+            return True
+        path = path.resolve()
+        for root in self.roots:
+            try:
+                path.relative_to(root)
+            except ValueError:
+                continue
+            return True
+        return False
+
+    def process_request(self, request: Any, client_address: Any) -> None:
+        if not self._slots.acquire(blocking=False):
+            try:
+                request.sendall(
+                    b"HTTP/1.0 503 Service Unavailable\r\n"
+                    b"Content-Type: application/json\r\n"
+                    b"Retry-After: 1\r\n"
+                    b"\r\n"
+                    b'{"error": "Too many requests are queued, try again later."}'
+                )
+            finally:
+                self.shutdown_request(request)
+            return
+        self._pool.submit(self._process_request, request, client_address)
+
+    def _process_request(self, request: socket.socket, client_address: Any) -> None:
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def server_close(self) -> None:
+        super().server_close()
+        self._pool.shutdown(wait=True)
+
+
+class TCPServer(PoolMixIn, HTTPServer):
+    allow_reuse_address = True
+
+
+class UnixServer(PoolMixIn, socketserver.UnixStreamServer):
+    def __init__(self, path: str, *args: Any, **kwargs: Any):
+        self.path = path
+        super().__init__(path, *args, **kwargs)
+
+    def server_bind(self) -> None:
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        super().server_bind()
+
+    def server_close(self) -> None:
+        super().server_close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+class Handler(BaseHTTPRequestHandler):
+    """JSON API for generating NFOs using the `generate` command."""
+
+    server: Union[TCPServer, UnixServer]
+    server_version = "nfog"
+
+    def address_string(self) -> str:
+        if isinstance(self.client_address, tuple):
+            return super().address_string()
+        return "unix"
+
+    def do_GET(self) -> None:
+        if self.path != "/templates":
+            return self.respond(HTTPStatus.NOT_FOUND, {"error": f"Unknown endpoint {self.path}"})
+        command = self.server.command
+        with click.Context(command) as ctx:
+            try:
+                templates = command.list_commands(ctx)
+            except click.ClickException as e:
+                return self.respond(HTTPStatus.NOT_FOUND, {"error": e.format_message()})
+        self.respond(HTTPStatus.OK, {"templates": templates})
+
+    def do_POST(self) -> None:
+        if self.path not in ("/generate", "/render"):
+            return self.respond(HTTPStatus.NOT_FOUND, {"error": f"Unknown endpoint {self.path}"})
+
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(body, dict):
+                raise TypeError("The request body must be a JSON object.")
+            if not body.get("path") or not body.get("template"):
+                raise ValueError("Both `path` and `template` must be provided.")
+            options: dict[str, Any] = body.get("options") or {}
+            if not isinstance(options, dict):
+                raise TypeError("The `options` must be a JSON object.")
+            unsupported = [x for x in options if x not in OPTIONS]
+            if unsupported:
+                raise ValueError(
+                    f"Unsupported options: {', '.join(unsupported)}, expected any of {', '.join(OPTIONS)}."
+                )
+            args = body.get("args") or []
+            api.get_args(body["path"], body["template"], args, options, self.server.command)
+        except (ValueError, TypeError) as e:
+            return self.respond(HTTPStatus.BAD_REQUEST, {"error": str(e)})
+        if not self.server.is_allowed(Path(body["path"])):
+            return self.respond(HTTPStatus.FORBIDDEN, {"error": "The path is not within the served folders."})
+
+        try:
+            result = api.generate(body["path"], body["template"], *args, save=self.path == "/generate", **options)
+        except click.ClickException as e:
+            return self.respond(HTTPStatus.BAD_REQUEST, {"error": e.format_message()})
+        except Exception as e:
+            return self.respond(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": repr(e)})
+
+        self.respond(HTTPStatus.OK, result.to_dict())
+
+    def respond(self, status: HTTPStatus, data: dict[str, Any]) -> None:
+        payload = json.dumps(data).encode("utf8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def create_server(
+    bind: str,
+    command: TemplateGroup,
+    workers: int = 4,
+    queue: int = 16,
+    roots: Optional[Sequence[Path]] = None
+) -> Union[TCPServer, UnixServer]:
+    """
+    Create a server for the JSON API.
+
+    The bind address may be a HOST:PORT pair or a unix socket path prefixed
+    with `unix:`. The `command` is the `generate` command group, used to list
+    templates and check options. NFOs are generated in-process with `nfog.generate()`,
+    so output matches the CLI exactly.
+
+    NFOs are written next to the requested path, so anyone that can reach the server
+    can write files wherever nfog can. Set `roots` to only allow releases within them.
+    """
+    if bind.startswith("unix:"):
+        server: Union[TCPServer, UnixServer] = UnixServer(bind[5:], Handler, workers=workers, queue=queue)
+    else:
+        host, _, port = bind.rpartition(":")
+        if not host or not port.isdigit():
+            raise click.ClickException(f"The bind address ({bind}) must be HOST:PORT or unix:/path/to.sock.")
+        server = TCPServer((host, int(port)), Handler, workers=workers, queue=queue)
+    server.command = command
+    server.roots = [x.resolve() for x in roots or ()]
+    return server
+
+
+__ALL__ = (OPTIONS, create_server, Handler, TCPServer, UnixServer)
@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Hashable, List, Optional, Tuple
+
+import click
+import jsonpickle
+
+from nfog.cache import Cache
+from nfog.config import Files
+from nfog.loader import load_object
+from nfog.probe import ProbedMediaInfo, provide, withdraw
+from nfog.templates import Template, TemplateGroup
+from nfog.writer import write_lines
+
+CacheEntry = Tuple[str, Hashable, Any, bool]  # namespace, key, value, whether it was cached as a Future
+
+# generate options that only affect the invocation, not the NFO
+VOLATILE_OPTIONS = ("force", "timings", "trace", "memprofile", "usage", "outputs", "snapshot")
+
+# classes and functions a snapshot may restore, i.e., of IMDb titles, any other is refused
+SAFE_NAMES = {
+    "imdb.Movie.Movie",
+    "imdb.Person.Person",
+    "imdb.Company.Company",
+    "imdb.Character.Character",
+    "imdb.utils.RolesList",
+    "imdb.utils.modClearRefs"
+}
+# jsonpickle tags that restore plain data, or an object of SAFE_NAMES, but never import or call anything else
+SAFE_TAGS = {
+    "py/object", "py/type", "py/function", "py/state", "py/newargs", "py/newargsex", "py/initargs",
+    "py/seq", "py/tuple", "py/set", "py/bytes", "py/b64", "py/b85", "py/id", "py/ref"
+}
+NAMED_TAGS = ("py/object", "py/type", "py/function")
+
+
+class Snapshot:
+    """
+    Everything a Template consumed to render an NFO, to render it again offline.
+
+    A snapshot holds the generate options and template arguments, the MediaInfo XML
+    of every probed file, and the cached data the Template used, e.g., IMDb titles,
+    TMDB info, fanart.tv banners, preview images, and file analysis, e.g., MPEG scan types.
+
+    Rendering a snapshot provides all of it up front, so the Template is created
+    without probing or network requests and the media files don't have to exist,
+    e.g., to re-render a whole library with new artwork.
+
+    Snapshots are saved as gzipped jsonpickle JSON and are versioned, so snapshots
+    of an older format are refused instead of rendered wrong. As snapshots may come
+    from anyone, they're checked before decoding, and any that would create objects
+    other than plain data and IMDb titles are refused, see `check_safe()`.
+    """
+
+    VERSION = 1
+    SUFFIX = ".snapshot.json.gz"
+
+    def __init__(
+        self,
+        template: str,
+        artwork: Optional[str],
+        args: List[str],
+        params: dict[str, Any],
+        media_info: dict[str, str],
+        folder: Optional[Tuple[str, List[str]]] = None,
+        cache: Optional[List[CacheEntry]] = None
+    ):
+        self.template = template
+        self.artwork = artwork
+        self.args = args
+        self.params = params
+        self.media_info = media_info  # file path -> MediaInfo XML
+        self.folder = folder  # folder path and its media files, for multi-file releases
+        self.cache = cache or []
+
+    @classmethod
+    def capture(
+        cls,
+        templates: List[Template],
+        name: str,
+        artwork: Optional[str],
+        args: List[str],
+        params: dict[str, Any]
+    ) -> Snapshot:
+        """
+        Capture the data used by a Template, and any other outputs rendered from the
+        same data. Capture after rendering, as templates may fetch data while rendering.
+        """
+        template = templates[0]
+        files = [(x.path, x.media_info) for x in template.episodes] if template.episodes else [
+            (template.file, template.media_info)
+        ]
+        media_info = {}
+        for path, info in files:
+            if not isinstance(info, ProbedMediaInfo):
+                raise ValueError(f"The media information of {path} was not probed by nfog, it cannot be saved.")
+            media_info[str(path)] = info.xml
+
+        folder = None
+        if template.episodes:
+            folder = (str(params["file"]), [str(path) for path, _ in files])
+
+        keys: dict[tuple[str, Hashable], str] = {}
+        for x in templates:
+            keys.update(x.usage.keys)
+        tracks = [t for x in (template.episodes or [template]) for t in x.video_tracks]
+        keys.update({("scan", x.scan_key): "analysis" for x in tracks})
+        keys.update({("blocks", path): "analysis" for path in media_info})
+        keys.update({("packets", path): "analysis" for path in media_info})
+
+        cache: List[CacheEntry] = []
+        for namespace, key in keys:
+            value = Cache.peek(namespace, key)
+            if isinstance(value, Future):
+                if value.done() and not value.exception():
+                    cache.append((namespace, key, value.result(), True))
+            elif value is not None:
+                cache.append((namespace, key, value, False))
+
+        return cls(
+            template=name,
+            artwork=artwork,
+            args=list(args),
+            params={
+                k: str(v) if isinstance(v, Path) else v
+                for k, v in params.items()
+                if k not in VOLATILE_OPTIONS
+            },
+            media_info=media_info,
+            folder=folder,
+            cache=cache
+        )
+
+    def save(self, path: Path) -> None:
+        """Save the snapshot to a file, replacing it atomically."""
+        data = jsonpickle.encode({"version": self.VERSION, **self.__dict__}, keys=True)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp = path.with_name(f".{path.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+        temp.write_bytes(gzip.compress(data.encode("utf8")))
+        temp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> Snapshot:
+        text = gzip.decompress(path.read_bytes()).decode("utf8")
+        try:
+            check_safe(json.loads(text))
+        except ValueError as e:
+            raise ValueError(f"The snapshot ({path}) cannot be loaded, {e}") from e
+        data = jsonpickle.decode(text, keys=True, safe=True)
+        version = data.pop("version", None)
+        if version != cls.VERSION:
+            raise ValueError(f"The snapshot ({path}) is version {version}, only version {cls.VERSION} is supported.")
+        return cls(**data)
+
+    def restore(self) -> None:
+        """Provide the snapshot's media information and cached data to Templates of this process."""
+        for path, xml in self.media_info.items():
+            provide(Path(path), ProbedMediaInfo(xml))
+        if self.folder:
+            provide(Path(self.folder[0]), [Path(x) for x in self.folder[1]])
+        for namespace, key, value, is_future in self.cache:
+            if is_future:
+                future: Future[Any] = Future()
+                future.set_result(value)
+                value = future
+            Cache.set(namespace, key, value)
+
+    def release(self) -> None:
+        """Stop providing the snapshot's media information, see `restore()`."""
+        for path in self.media_info:
+            withdraw(Path(path))
+        if self.folder:
+            withdraw(Path(self.folder[0]))
+
+    def create_template(self, name: Optional[str] = None) -> Template:
+        """
+        Create the snapshot's Template, or another Template by name, from the snapshot's
+        options and arguments. The Template is offline, so it can only use the snapshot's data.
+        """
+        self.restore()
+        name = name or self.template
+        parent = click.Context(click.Command("generate"), info_name="generate")
+        parent.params = {**self.params, "file": Path(self.params["file"]), "offline": True}
+        command = TemplateGroup().get_command(parent, name)
+        if command is None:
+            raise click.ClickException(f"The Template ({name}) has no command.")
+        with command.make_context(name, list(self.args), parent=parent) as ctx:
+            return command.invoke(ctx)
+
+
+def get_snapshot_path(path: Path, release_name: str) -> Path:
+    """Get where to save a snapshot, naming it after the release if `path` is a folder."""
+    if path.is_dir():
+        return path / f"{release_name}{Snapshot.SUFFIX}"
+    return path
+
+
+def render_snapshot(
+    path: Path,
+    template: Optional[str] = None,
+    artwork: Optional[str] = None,
+    out_dir: Optional[Path] = None,
+    encoding: Optional[str] = None
+) -> Tuple[str, Path, bool, List[str]]:
+    """
+    Render and save the NFO of a snapshot, optionally with another Template or Artwork.
+    Returns the release name, the path the NFO was saved to, whether it changed, and
+    any optional data that was skipped as the snapshot did not have it.
+    """
+    snapshot = Snapshot.load(path)
+    nfo_template: Optional[Template] = None
+    try:
+        nfo_template = snapshot.create_template(template)
+        artwork = artwork or snapshot.artwork
+        if artwork:
+            lines = load_object(Files.artwork(artwork), artwork).lines(nfo_template)
+        else:
+            lines = nfo_template.lines()
+
+        out_path = (out_dir or nfo_template.file.parent) / f"{nfo_template.release_name}{nfo_template.file_ext}"
+        (changed,) = write_lines(lines, (out_path, encoding or snapshot.params.get("encoding") or "utf8"))
+    finally:
+        # so rendering many snapshots in one process doesn't keep every snapshot's media information
+        snapshot.release()
+        if nfo_template:
+            nfo_template.close()
+    return nfo_template.release_name, out_path, changed, nfo_template.skipped
+
+
+def check_safe(data: Any) -> None:
+    """
+    Check that decoding jsonpickle data would only create plain data and objects of
+    SAFE_NAMES, raising a ValueError if it would import or call anything else.
+    """
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, list):
+            stack.extend(value)
+        elif isinstance(value, dict):
+            for key, item in value.items():
+                if key.startswith("json://"):
+                    # a non-string dict key, encoded as jsonpickle JSON itself
+                    try:
+                        stack.append(json.loads(key[7:]))
+                    except ValueError:
+                        pass
+                elif key.startswith("py/"):
+                    if key not in SAFE_TAGS:
+                        raise ValueError(f"it uses the unsafe jsonpickle tag {key}.")
+                    if key in NAMED_TAGS and item not in SAFE_NAMES:
+                        raise ValueError(f"{item!r} is not allowed in snapshots.")
+                stack.append(item)
+
+
+__ALL__ = (SAFE_NAMES, Snapshot, check_safe, get_snapshot_path, render_snapshot)
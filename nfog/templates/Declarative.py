@@ -0,0 +1,266 @@
+from __future__ import annotations
+
+import builtins
+import string
+from collections import ChainMap
+from pathlib import Path
+from types import CodeType
+from typing import Any, Callable, Iterator, List, Mapping, Optional, Tuple
+
+import click
+import toml
+
+from nfog import layout
+from nfog.cache import Cache
+from nfog.templates.Template import Template
+
+Render = Callable[["Scope"], Iterator[str]]
+Lines = Callable[[Mapping[str, Any]], List[str]]
+Section = Callable[["Scope"], List[str]]
+
+ARGUMENT_TYPES = {"str": str, "int": int, "float": float}
+TEMPLATE_KEYS = {
+    "help", "extension", "release-name", "width", "indent", "analyzers", "arguments", "fields", "section"
+}
+SECTION_KEYS = {"if", "text", "wrap", "rows", "empty", "width", "indent"}
+
+
+class Scope(dict):
+    """
+    Names available to a declarative template's expressions and format strings.
+
+    Names are resolved when first used, in order, from the template's fields, its
+    command-line arguments, and the Template's attributes and methods, then kept
+    for the rest of the render. Fields that are never used are never computed.
+
+    Expressions are evaluated with the Scope as their globals, rather than locals,
+    so comprehensions and lambdas within them can use its names too.
+    """
+
+    def __init__(self, template: DeclarativeTemplate):
+        super().__init__(__builtins__=builtins)
+        self.template = template
+
+    def __missing__(self, name: str) -> Any:
+        fields = self.template.FIELDS
+        if name in fields:
+            value = eval(fields[name], self)
+        elif name in self.template.args:
+            value = self.template.args[name]
+        else:
+            try:
+                value = getattr(self.template, name)
+            except AttributeError:
+                # let expressions fall back to builtins, e.g., len()
+                raise KeyError(name) from None
+        self[name] = value
+        return value
+
+
+class DeclarativeTemplate(Template):
+    """
+    Template defined by a TOML file instead of Python code.
+
+    The file is compiled once into a render function, which is cached until the
+    file changes, so rendering many releases only formats and wraps the values.
+
+    Example:
+        extension = ".nfo"
+        release-name = "file.stem"  # expression, the default
+        width = 66  # wrap width, default 66
+        indent = "  "  # wrap indent, default no indent
+        analyzers = ["sha256"]  # run in one pass over the file, see `Template.analysis()`
+
+        [arguments]  # command-line arguments and their type, available by name
+        season = "int"
+
+        [fields]  # expressions, available by name
+        title = "title_info['title']"
+
+        [[section]]
+        wrap = ["{release_name}"]
+
+        [[section]]
+        text = ["", "  Title    : {title}"]
+
+        [[section]]
+        if = "source"  # expression, the section is skipped if false
+        text = ["", "  Source :"]
+        wrap = ["{source}"]
+
+        [[section]]
+        rows = "map(get_audio_summary, audio_tracks)"
+        text = ["", "Audio [ {count:0>2} ]", ""]
+        empty = ["  --"]
+
+    Each section renders `text` lines as-is, then `wrap` lines wrapped at the width
+    and indent, then each item of the `rows` expression wrapped line by line, or the
+    `empty` lines if there are none. Lines are Python format strings of the fields,
+    arguments, and Template attributes, e.g., `{tmdb.id}`. The section's `text`
+    can use `{count}`, the amount of rows. A section may override `width` and `indent`.
+    """
+
+    FILE: Path
+    FIELDS: dict[str, CodeType] = {}
+    EXTENSION = ".nfo"
+    RELEASE_NAME: CodeType = compile("file.stem", "<release-name>", "eval")
+    RENDER: Render
+    cli: click.Command
+
+    def lines(self) -> Iterator[str]:
+        """Generate the NFO line by line from the compiled sections."""
+        yield from self.RENDER(Scope(self))
+
+    @property
+    def release_name(self) -> str:
+        """The release name used for the output NFO filename."""
+        return str(eval(self.RELEASE_NAME, Scope(self)))
+
+    @property
+    def file_ext(self) -> str:
+        """The file extension to use when saving this template."""
+        return self.EXTENSION
+
+    @classmethod
+    def compile(cls, fn: Path, name: str) -> type[DeclarativeTemplate]:
+        """Compile a declarative template file to a DeclarativeTemplate class with a `cli` command."""
+        data = toml.load(fn)
+        check_keys(data, TEMPLATE_KEYS, fn, "template")
+
+        width = data.get("width", 66)
+        indent = data.get("indent", "")
+        sections = [
+            compile_section(section, fn, width, indent)
+            for section in data.get("section", [])
+        ]
+
+        def render(scope: Scope) -> Iterator[str]:
+            for condition, section in sections:
+                if condition is None or eval(condition, scope):
+                    yield from section(scope)
+
+        def cli(ctx: click.Context, **kwargs: Any) -> Template:
+            return template(**(ctx.parent.params if ctx.parent else {}), **kwargs)
+
+        command = click.pass_context(cli)
+        for argument, type_ in reversed(list(data.get("arguments", {}).items())):
+            if type_ not in ARGUMENT_TYPES:
+                raise ValueError(
+                    f"The argument type ({type_}) of {argument} in {fn} is not one of {', '.join(ARGUMENT_TYPES)}."
+                )
+            command = click.argument(argument, type=ARGUMENT_TYPES[type_])(command)
+
+        template: type[DeclarativeTemplate] = type(name, (cls,), {
+            "__doc__": data.get("help"),
+            "FILE": fn,
+            "FIELDS": {
+                key: compile_expression(value, fn, f"fields.{key}")
+                for key, value in data.get("fields", {}).items()
+            },
+            "EXTENSION": data.get("extension", cls.EXTENSION),
+            "ANALYZERS": tuple(data.get("analyzers", ())),
+            "RELEASE_NAME": compile_expression(data.get("release-name", "file.stem"), fn, "release-name"),
+            "RENDER": staticmethod(render),
+            "cli": staticmethod(click.command(name=name, help=data.get("help"))(command))
+        })
+
+        return template
+
+
+def load_declarative(fn: Path, name: str) -> type[DeclarativeTemplate]:
+    """
+    Compile a declarative Template file, see `DeclarativeTemplate`.
+    Like `load_object()`, the result is cached until the file changes on disk.
+    """
+    stat = fn.stat()
+    return Cache.get(
+        "code",
+        (str(fn.resolve()), name, stat.st_mtime_ns, stat.st_size),
+        lambda: DeclarativeTemplate.compile(fn, name)
+    )
+
+
+def check_keys(data: dict[str, Any], allowed: set[str], fn: Path, where: str) -> None:
+    unknown = set(data) - allowed
+    if unknown:
+        raise ValueError(f"Unknown {where} keys in {fn}: {', '.join(sorted(unknown))}.")
+
+
+def compile_expression(expression: str, fn: Path, where: str) -> CodeType:
+    try:
+        return compile(expression, f"{fn}:{where}", "eval")
+    except SyntaxError as e:
+        raise ValueError(f"Invalid expression for {where} in {fn}: {e.msg}, {expression!r}") from e
+
+
+def compile_lines(lines: List[str], wrapper: Optional[layout.WidthWrapper], fn: Path, where: str) -> Lines:
+    """
+    Compile format strings to a function formatting them with a scope.
+    Lines without replacement fields are formatted, and wrapped, only once.
+    """
+    compiled: List[Tuple[str, bool]] = []
+    for line in lines:
+        try:
+            fields = [x[1] for x in string.Formatter().parse(line) if x[1] is not None]
+        except ValueError as e:
+            raise ValueError(f"Invalid format string for {where} in {fn}: {e}, {line!r}") from e
+        if fields:
+            compiled.append((line, True))
+        else:
+            text = line.format()
+            compiled.append(("\n".join(wrapper.wrap(text)) if wrapper and text else text, False))
+
+    if not any(dynamic for _, dynamic in compiled):
+        static = [line for line, _ in compiled]
+        return lambda scope: list(static)
+
+    def format_lines(scope: Mapping[str, Any]) -> List[str]:
+        rendered = []
+        for line, dynamic in compiled:
+            if dynamic:
+                line = line.format_map(scope)
+                if wrapper and line:
+                    line = "\n".join(wrapper.wrap(line))
+            rendered.append(line)
+        return rendered
+
+    return format_lines
+
+
+def compile_section(
+    section: dict[str, Any], fn: Path, width: int, indent: str
+) -> Tuple[Optional[CodeType], Section]:
+    """Compile a section of a declarative template to its condition and a render function."""
+    check_keys(section, SECTION_KEYS, fn, "section")
+    wrapper = layout.get_wrapper(
+        section.get("width", width),
+        section.get("indent", indent),
+        section.get("indent", indent)
+    )
+
+    condition = compile_expression(section["if"], fn, "section.if") if "if" in section else None
+    text = compile_lines(section.get("text", []), None, fn, "section.text")
+    wrap = compile_lines(section.get("wrap", []), wrapper, fn, "section.wrap")
+    empty = compile_lines(section.get("empty", []), None, fn, "section.empty")
+    rows = compile_expression(section["rows"], fn, "section.rows") if "rows" in section else None
+
+    if rows is None:
+        if "wrap" not in section:
+            return condition, text
+        return condition, lambda scope: text(scope) + wrap(scope)
+
+    def render(scope: Scope) -> List[str]:
+        items = [str(x) for x in eval(rows, scope)]
+        names = ChainMap({"count": len(items)}, scope)
+        lines = text(names) + wrap(names)
+        for item in items:
+            for line in item.splitlines():
+                lines.append("\n".join(wrapper.wrap(line)) if line else line)
+        if not items:
+            lines.extend(empty(names))
+        return lines
+
+    return condition, render
+
+
+__ALL__ = (DeclarativeTemplate, Scope, load_declarative)
@@ -1,37 +1,59 @@
+from __future__ import annotations
+
 from pathlib import Path
-from typing import Any, Optional
+from typing import Optional
 
 import click
 
 from nfog.config import Directories
+from nfog.loader import load_object
+from nfog.templates.Declarative import load_declarative
+from nfog.timing import span
 
 
 class TemplateGroup(click.MultiCommand):
     """Lazy-loaded command group of nfo templates."""
     TEMPLATES_DIR = Directories.templates
+    EXTENSIONS = (".py", ".toml")  # Python templates, and declarative templates, see `DeclarativeTemplate`
 
     def list_commands(self, ctx: click.Context) -> list[str]:
         """Returns a list of template names from the template filenames."""
         rv = []
         if self.TEMPLATES_DIR.is_dir():
-            for cmd in self.TEMPLATES_DIR.rglob("**/*.py"):
+            for cmd in self.TEMPLATES_DIR.rglob("**/*"):
                 cmd = cmd.relative_to(self.TEMPLATES_DIR)
-                if cmd.stem.lower() not in ("__init__", "group"):
+                if cmd.suffix in self.EXTENSIONS and cmd.stem.lower() not in ("__init__", "group"):
                     rv.append(str(cmd.with_suffix("")).replace("\\", "/"))
         if not rv:
             raise click.ClickException(f"No Templates were found in {Directories.templates}")
-        rv.sort()
-        return rv
+        return sorted(set(rv))
+
+    def get_template_path(self, name: str) -> Path:
+        """
+        Get the path to a template's code from the template name.
+        Python templates take precedence over declarative templates of the same name.
+        """
+        path = Path(self.TEMPLATES_DIR, *name.split("/"))
+        for extension in self.EXTENSIONS:
+            if path.with_suffix(extension).exists():
+                return path.with_suffix(extension)
+        return path.with_suffix(self.EXTENSIONS[0])
 
     def get_command(self, ctx: click.Context, name: str) -> Optional[click.Command]:
         """Load the template code and return the main click command function."""
-        scope: dict[str, Any] = {}
-        name_split = name.split("/")
-        name = name_split[-1]
-        fn = Path(self.TEMPLATES_DIR, *name_split).with_suffix(".py")
+        fn = self.get_template_path(name)
+        name = name.split("/")[-1]
         if not fn.exists():
             raise click.ClickException(f"The Template ({name}) was not found in {Directories.templates}.")
-        with fn.open(encoding="utf8") as f:
-            code = compile(f.read(), fn, "exec")
-            eval(code, scope, scope)
-        return scope[name].cli
+        with span("template.load", template=name):
+            if fn.suffix == ".toml":
+                return load_declarative(fn, name).cli
+            return load_object(fn, name).cli
+
+    def resolve_command(
+        self, ctx: click.Context, args: list[str]
+    ) -> tuple[Optional[str], Optional[click.Command], list[str]]:
+        """Resolve the template command, keeping the template's arguments available to the group."""
+        cmd_name, cmd, args = super().resolve_command(ctx, args)
+        ctx.meta["nfog.template_args"] = list(args)
+        return cmd_name, cmd, args
@@ -1,21 +1,31 @@
 from __future__ import annotations
 
 import re
-import textwrap
 from abc import abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from datetime import timedelta
 from pathlib import Path
-from typing import Any, Optional
-from urllib.parse import urlparse
+from typing import Any, Iterable, Iterator, Optional, Union
 
 import tmdbsimple
-from imdb import Cinemagoer
-from langcodes import closest_supported_match
-from pymediainfo import MediaInfo, Track
-from requests import Session
+from imdb.Movie import Movie
+from langcodes import DEFAULT_LANGUAGE
+from pymediainfo import Track
 
+from nfog import layout
+from nfog.analyzers import CHECKSUMS, analyze, format_sfv, get_checksums, want
+from nfog.cache import Cache
 from nfog.config import config
-from nfog.parsers.imdb import IMDb
-from nfog.tracks import Audio, Subtitle, Video
+from nfog.network import (NETWORK_ERRORS, CircuitBreaker, Deadline, DeadlineExceeded, Latency, Session, Usage,
+                          get_provider, hedge, is_enabled, race, submit)
+from nfog.parsers.fanart import FanartTV
+from nfog.parsers.gallery import get_extractor
+from nfog.parsers.imdb import IMDb, get_cinemagoer
+from nfog.probe import PROBE_MODE, get_estimated, get_media_files, is_folder, probe
+from nfog.timing import Timings, span
+from nfog.tracks import Audio, Episodes, Subtitle, Video
+from nfog.tracks.BaseTrack import BaseTrack
 
 
 class Template:
@@ -23,6 +33,10 @@ class Template:
     TMDB_ID_T = re.compile(r"^(tv|movie)/\d+$")
     TVDB_ID_T = re.compile(r"^\d+$")
 
+    # analyzers to run on every file of the release, in the same pass as any other analysis, see `analysis()`
+    ANALYZERS: tuple[str, ...] = ()
+
+    @span("template.init")
     def __init__(
         self,
         file: Path,
@@ -32,11 +46,26 @@ class Template:
         source: Optional[str] = None,
         note: Optional[str] = None,
         preview: Optional[str] = None,
+        deadline: Optional[float] = None,
+        offline: bool = False,
+        probe_mode: Optional[str] = None,
         **kwargs: Any
     ):
         self._nfo = []
+        self._session = None
+
+        # optional data that was skipped due to network issues, see `skip()`
+        self.skipped: list[str] = []
+        self.deadline = Deadline(deadline or config.get("network", {}).get("deadline"))
+        # requests, bytes, and cache hits per provider, bound by `network.budgets`
+        # offline, e.g., rendering a snapshot, only cached data can be used
+        self.offline = offline
+        self.usage = Usage({"*": 0} if offline else None)
 
         self.file = file
+        self.imdb_id = imdb
+        self.tmdb_id = tmdb
+        self._title_info: Optional[dict[str, Any]] = None
 
         if imdb:
             if not self.IMDB_ID_T.match(imdb):
@@ -44,29 +73,29 @@ class Template:
                     f"The provided IMDb ID ({imdb}) is not valid. Expected e.g., 'tt0487831', 'tt10810424'."
                 )
 
-            self._cinemagoer = Cinemagoer()
-            self.imdb = self._cinemagoer.get_movie(imdb.lstrip("tt"))
-            if "movie" not in self.imdb["kind"]:
-                # broken, very manual fix below
-                # self._cinemagoer.update(self.imdb, ("episodes",))
-                imdb_object = IMDb(imdb.lstrip("tt"))
-                self.imdb["episodes"] = {}
-                for season in range(1, self.imdb["seasons"] + 1):
-                    self.imdb["episodes"][season] = imdb_object.get_episodes(int(season))
+            self._cinemagoer = Cache.get("cinemagoer", None, get_cinemagoer)
+            # fetched in the background while the file is probed, see the `imdb` property
+            future = self.usage.cached("imdb", "imdb", imdb, lambda: submit(self.get_imdb_title, imdb))
+            future.add_done_callback(lambda f: f.exception() and Cache.pop("imdb", imdb))
+            self._imdb: Union[Movie, Future, None] = future
         else:
-            self.imdb = None
+            self._imdb = None
 
         if tmdb:
             if not self.TMDB_ID_T.match(tmdb):
                 raise ValueError(
                     f"The provided TMDB ID ({tmdb}) is not valid. Expected e.g., 'tv/2490', 'movie/14836'."
                 )
-            if not tmdbsimple.API_KEY:
+            if not tmdbsimple.API_KEY and not offline:
                 raise EnvironmentError("No themoviedb.org api key in config, cannot proceed.")
             self.tmdb = {
                 "movie": tmdbsimple.Movies,
                 "tv": tmdbsimple.TV
             }[tmdb.split("/")[0]](tmdb.split("/")[1])
+            self.tmdb.session = self.session
+            if imdb and is_enabled("race"):
+                # start early so it's ready to race IMDb for the title information
+                self.usage.cached("tmdb", "tmdb", tmdb, lambda: submit(hedge, self.tmdb.info, "tmdb"))
         else:
             self.tmdb = None
 
@@ -85,10 +114,34 @@ class Template:
         self.preview = preview
         self.args = kwargs
 
-        self.media_info = MediaInfo.parse(self.file)
-        self.video_tracks = [Video(x, self.file) for x in self.media_info.video_tracks]
-        self.audio_tracks = [Audio(x, self.file) for x in self.media_info.audio_tracks]
-        self.text_tracks = [Subtitle(x, self.file) for x in self.media_info.text_tracks]
+        # how thoroughly files are probed, 'fast' reads only their headers, see `nfog.probe.probe()`
+        self.probe_mode = probe_mode or PROBE_MODE
+        if is_folder(self.file):
+            # multi-file release, e.g., a season pack
+            self.files = get_media_files(self.file)
+            if not self.files:
+                raise ValueError(f"The provided folder ({self.file}) does not contain any media files.")
+            self.episodes: Optional[Episodes] = Episodes.from_files(self.files, mode=self.probe_mode)
+            self.file = self.episodes.representative.path
+            self.media_info = self.episodes.representative.media_info
+        else:
+            self.files = [self.file]
+            self.episodes = None
+            self.media_info = probe(self.file, self.probe_mode)
+
+        analyzers = (*self.ANALYZERS, *config.get("analyzers", {}).get("always", []))
+        if analyzers and not offline:
+            for file in self.files:
+                want(file, analyzers)
+
+        with span("tracks"):
+            self.video_tracks = [Video(x, self.file, self.probe_mode) for x in self.media_info.video_tracks]
+            self.audio_tracks = [Audio(x, self.file, self.probe_mode) for x in self.media_info.audio_tracks]
+            self.text_tracks = [Subtitle(x, self.file, self.probe_mode) for x in self.media_info.text_tracks]
+        # fields of each track that may be estimated by a fast probe, reported after generation
+        self.estimated = get_estimated([
+            *self.media_info.general_tracks, *self.video_tracks, *self.audio_tracks, *self.text_tracks
+        ], self.probe_mode)
 
         self.chapters: Optional[Track] = next(iter(self.media_info.menu_tracks), None)
         if self.chapters:
@@ -104,16 +157,33 @@ class Template:
                 for lang in sorted(self.audio_tracks, key=lambda x: x.streamorder)
                 if lang.language
             ),
-            # default to first language on IMDb
-            self.imdb["language codes"][0] if self.imdb else None
+            None
         )
-
-        self._session = None
+        if not self.primary_lang and self.imdb:
+            # default to first language on IMDb
+            self.primary_lang = self.imdb["language codes"][0]
 
     @property
-    @abstractmethod
     def nfo(self) -> str:
-        """Generate the NFO string using Template information."""
+        """
+        Generate the NFO string using Template information.
+        Templates implement either this or `lines()`. By default, it joins `lines()`.
+        """
+        return "\n".join(self.lines())
+
+    def lines(self) -> Iterator[str]:
+        """
+        Generate the NFO line by line using Template information.
+
+        Each item is followed by a line break in the NFO and may itself span multiple
+        lines, e.g., from `indented_wrap()`. Templates implementing this instead of `nfo`
+        are written out as they're generated, without splitting and re-joining the NFO.
+        By default, it splits `nfo`.
+        """
+        if type(self).nfo is Template.nfo:
+            # the default `nfo` joins `lines()`, which would recurse forever
+            raise NotImplementedError(f"The {type(self).__name__} Template must implement `nfo` or `lines()`.")
+        yield from self.nfo.split("\n")
 
     @property
     @abstractmethod
@@ -125,13 +195,97 @@ class Template:
     def file_ext(self) -> str:
         """The file extension to use when saving this template."""
 
+    @property
+    def imdb(self) -> Optional[Movie]:
+        """
+        IMDb title information, waiting for it if it's still being fetched.
+        If it isn't fetched within the deadline, it's skipped and None is returned.
+        """
+        if isinstance(self._imdb, Future):
+            try:
+                self._imdb = self._imdb.result(timeout=self.deadline.remaining)
+            except FutureTimeoutError:
+                error = DeadlineExceeded(f"The deadline of {self.deadline.seconds}s has passed.")
+                self.skip("IMDb title information", error)
+                self._imdb = None
+        return self._imdb
+
+    @imdb.setter
+    def imdb(self, value: Union[Movie, Future, None]) -> None:
+        self._imdb = value
+
+    @property
+    def title_info(self) -> dict[str, Any]:
+        """
+        Get the title, year, and kind (e.g., 'movie', 'tv series') of the title.
+
+        This information is available from both IMDb and TMDB. If `network.race` is
+        enabled in the config and both IDs were provided, both are asked at the same
+        time and whichever answers first is used.
+        """
+        if self._title_info:
+            return self._title_info
+
+        def from_imdb() -> dict[str, Any]:
+            if not self.imdb:
+                raise DeadlineExceeded(f"IMDb title information was not fetched within {self.deadline.seconds}s.")
+            return {
+                "title": self.imdb["title"],
+                "year": self.imdb.get("year"),
+                "kind": self.imdb["kind"]
+            }
+
+        def from_tmdb() -> dict[str, Any]:
+            info = self.usage.cached(
+                "tmdb", "tmdb", self.tmdb_id, lambda: submit(hedge, self.tmdb.info, "tmdb")
+            ).result()
+            date = info.get("release_date") or info.get("first_air_date") or ""
+            return {
+                "title": info.get("title") or info.get("name"),
+                "year": int(date[:4]) if date[:4].isdigit() else None,
+                "kind": "movie" if isinstance(self.tmdb, tmdbsimple.Movies) else "tv series"
+            }
+
+        if self.imdb_id and self.tmdb and is_enabled("race"):
+            self._title_info = race(from_imdb, from_tmdb, valid=lambda x: all(x.values()))
+        elif self.imdb_id and (self.imdb or not self.tmdb):
+            self._title_info = from_imdb()
+        else:
+            self._title_info = from_tmdb()
+
+        return self._title_info
+
+    def get_imdb_title(self, imdb: str) -> Movie:
+        """Get a Cinemagoer Movie object for an IMDb ID, with episodes for TV titles."""
+        self.deadline.check()
+        with CircuitBreaker.get("imdb").guard():
+            title = hedge(lambda: self._get_cinemagoer_title(imdb), "imdb")
+        if "movie" not in title["kind"]:
+            # broken, very manual fix below
+            # self._cinemagoer.update(title, ("episodes",))
+            imdb_object = IMDb(imdb.lstrip("tt"), self.deadline, self.usage)
+            try:
+                # fail fast, instead of after fetching as many seasons as the budget allows
+                self.usage.check("imdb", title["seasons"])
+                title["episodes"] = {}
+                for season in range(1, title["seasons"] + 1):
+                    with span("imdb.episodes", season=season):
+                        title["episodes"][season] = imdb_object.get_episodes(int(season))
+            finally:
+                imdb_object.session.close()
+        return title
+
+    def _get_cinemagoer_title(self, imdb: str) -> Movie:
+        with span("imdb.title", imdb=imdb), Latency.measure("imdb"), self.usage.activate():
+            return self._cinemagoer.get_movie(imdb.lstrip("tt"))
+
     @property
     def session(self) -> Session:
-        """Get a Request Session."""
+        """Get a Request Session, bound by this NFO's deadline and usage, see `close()`."""
         if self._session is not None:
             return self._session
 
-        self._session = Session()
+        self._session = Session(self.deadline, self.usage)
         self._session.headers.update({
             "User-Agent": "Mozilla/5.0 (X11; Linux x86_64; rv:81.0) Gecko/20100101 Firefox/81.0",
             "Accept-Language": "en-US,en;q=0.5"
@@ -139,61 +293,92 @@ class Template:
 
         return self._session
 
-    def get_preview_images(self, url: str) -> list[tuple[str, str]]:
-        """Get a list of image thumbnail SRCs and full hyperlinks from Gallery url."""
-        if not url:
+    def close(self) -> None:
+        """Close the Session once the NFO is rendered, the process's connection pools are kept for the next."""
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def skip(self, name: str, error: Exception) -> None:
+        """Record optional data that was skipped, to be reported after generation."""
+        self.skipped.append(f"{name}: {error}")
+
+    def analysis(self, *names: str, path: Optional[Path] = None) -> dict[str, Any]:
+        """
+        Get the results of analyzers on a file of the release, by name, e.g., 'sha256'.
+        Defaults to the representative file. See `nfog.analyzers` for available analyzers.
+
+        Reading a whole file takes a while, so every analyzer in ANALYZERS (and the
+        config's `analyzers.always`) is run in the same pass as the first analysis
+        of each file, and results are cached until the file changes.
+        """
+        path = path or self.file
+        self.usage.used("analysis", "analysis", str(path))
+        return analyze(path, names)
+
+    def checksums(self, *names: str, paths: Optional[Iterable[Path]] = None) -> dict[Path, dict[str, str]]:
+        """
+        Get checksums of every file of the release by analyzer name, 'crc32' and 'sha256'
+        by default, e.g., `checksums()[file]["sha256"]`. See `nfog.analyzers.get_checksums`.
+
+        Files are hashed concurrently, and digests are cached on disk until the file
+        changes, so regenerating the NFO of an unchanged release never hashes it again.
+        """
+        paths = list(paths or self.files)
+        for path in paths:
+            self.usage.used("analysis", "analysis", str(path))
+        return get_checksums(paths, names or CHECKSUMS)
+
+    def get_sfv(self, paths: Optional[Iterable[Path]] = None) -> str:
+        """Get an SFV file of the CRC32 checksums of every file of the release, see `checksums()`."""
+        return format_sfv(self.checksums("crc32", paths=paths))
+
+    def get_preview_images(self, *urls: str) -> list[tuple[str, str]]:
+        """
+        Get a list of image thumbnail SRCs and full hyperlinks from Gallery urls.
+
+        Multiple galleries may be provided as separate arguments or in one string
+        separated by whitespace. Galleries are fetched concurrently and the images
+        of each gallery are cached for the life of the process. Galleries on hosts
+        without a registered extractor (see `nfog.parsers.gallery`) are skipped.
+        """
+        urls = tuple(url for value in urls if value for url in value.split())
+        if not urls:
             raise ValueError("Provided URL cannot be empty.")
 
-        domain = ".".join(urlparse(url).netloc.split(".")[-2:])
-        supported_domains = ["imgbox.com", "beyondhd.co"]
-        if domain not in supported_domains:
-            return []
+        def get_images(url: str) -> list[tuple[str, str]]:
+            extractor = get_extractor(url)
+            if not extractor:
+                return []
+            try:
+                return self.usage.cached(
+                    get_provider(url), "previews", url, lambda: extractor(self.session.get(url).text)
+                )
+            except NETWORK_ERRORS as e:
+                self.skip(f"Preview images from {url}", e)
+                return []
+
+        if len(urls) == 1:
+            return get_images(urls[0])
 
-        images = []
-        page = self.session.get(url).text
-        if domain == "imgbox.com":
-            for m in re.finditer(r'src="(https://thumbs2.imgbox.com.+/)(\w+)_b.([^"]+)', page):
-                images.append((
-                    f"https://imgbox.com/{m.group(2)}",
-                    f"{m.group(1)}{m.group(2)}_t.{m.group(3)}"
-                ))
-        if domain == "beyondhd.co":
-            for m in re.finditer(r'/image/([^"]+)"\D+src="(https://.*beyondhd.co/images.+/(\w+).md.[^"]+)', page):
-                images.append((
-                    f"https://beyondhd.co/image/{m.group(1)}",
-                    m.group(2)
-                ))
-
-        return images
+        with ThreadPoolExecutor(max_workers=min(len(urls), 8)) as pool:
+            return [image for images in pool.map(Timings.bind(get_images), urls) for image in images]
 
     def get_banner_image(self, tvdb_id: int, language: str) -> Optional[str]:
-        """Get a wide banner image from fanart.tv."""
+        """Get a wide banner image from fanart.tv, cached and revalidated in the background."""
         if not tvdb_id:
             return None
 
         api_key = config.get("api-keys", {}).get("fanart-tv")
-        if not api_key:
+        if not api_key and not self.offline:
             print("Warning: No fanart.tv api key in config, skipping banner image.")
             return None
 
-        r = self.session.get(f"http://webservice.fanart.tv/v3/tv/{tvdb_id}?api_key={api_key}")
-        if r.status_code == 404:
+        try:
+            return FanartTV(api_key or "", self.session).get_banner(tvdb_id, language)
+        except NETWORK_ERRORS as e:
+            self.skip("Banner image", e)
             return None
-        res = r.json()
-
-        error = res.get("error message")
-        if error:
-            if error == "Not found":
-                return None
-            raise ValueError(f"An unexpected error occurred while calling Fanart.tv, {res}")
-
-        url = next((
-            x["url"]
-            for x in res.get("tvbanner") or []
-            if closest_supported_match(x["lang"], [language], 5)
-        ), None)
-
-        return url
 
     def get_video_summary(self, video: Video) -> str:
         """Get a video track's information in a two-line summary."""
@@ -241,6 +426,47 @@ class Template:
 
         return line
 
+    def get_episode_summary(self) -> list[str]:
+        """
+        Get a summary of a multi-file release's total size and runtime, the bitrate
+        range of each track, and the episodes that differ from the rest.
+        Returns an empty list if a single file was provided.
+        """
+        if not self.episodes:
+            return []
+
+        def name(track: BaseTrack) -> str:
+            language = track.language.display_name(self.primary_lang or DEFAULT_LANGUAGE) if track.language else None
+            channels = getattr(track, "channels", None)
+            return ", ".join(filter(None, (
+                track.track_type,
+                language,
+                track.title,
+                f"{track.codec} {channels}" if channels else track.codec
+            )))
+
+        total_size = self.episodes.total_size / 1024 ** 3
+        total_duration = timedelta(seconds=int(self.episodes.total_duration))
+        lines = [f"- {len(self.episodes)} Episodes, {total_size:.2f} GiB, {total_duration}"]
+
+        for track in self.episodes.common:
+            bitrate_range = self.episodes.bitrate_range(track)
+            if bitrate_range and bitrate_range[0] != bitrate_range[1]:
+                low, high = (x / 1000 for x in bitrate_range)
+                lines.append(f"- {name(track)} @ {low:,.0f} - {high:,.0f} kb/s")
+
+        for episode, (missing, extra) in self.episodes.outliers.items():
+            for track in missing:
+                lines.append(f"- {episode.name}: Missing {name(track)}")
+            for track in extra:
+                lines.append(f"- {episode.name}: Extra {name(track)}")
+
+        for track in self.episodes.common:
+            for episode, bitrate in self.episodes.bitrate_outliers(track).items():
+                lines.append(f"- {episode.name}: {name(track)} @ {bitrate / 1000:,.0f} kb/s")
+
+        return lines
+
     @staticmethod
     def get_chapter_list(chapters: Optional[dict[str, str]]) -> list[str]:
         """Get a list of chapters showing timecode and chapter name."""
@@ -257,15 +483,14 @@ class Template:
         Wrap text at a specific width and indent.
         The `indent` value will set an initial and subsequent indent. If
         set, it will override any indent options you may have also provided via kwargs.
+        Width is measured in display columns, so wide characters like CJK count as two.
         """
-        if not text:
-            return text
-        if not width or width < 1:
-            raise ValueError(f"An invalid width value of [{width}] was provided.")
-        if indent:
-            kwargs["initial_indent"] = indent
-            kwargs["subsequent_indent"] = indent
-        return "\n".join(textwrap.wrap(text, width, **kwargs))
+        return layout.indented_wrap(text, width, indent, **kwargs)
+
+    @staticmethod
+    def wrap_lines(lines: Iterable[str], width: int, indent: Optional[str] = None, **kwargs: Any) -> list[str]:
+        """Wrap many lines at a specific width and indent, see `indented_wrap()`."""
+        return layout.wrap_lines(lines, width, indent, **kwargs)
 
     @staticmethod
     def centered_wrap(text: str, width: int, wrap_width: Optional[int] = None) -> str:
@@ -273,16 +498,7 @@ class Template:
         Center text to a specific width, while also wrapping at another width.
         If wrap_width is not provided, width will be used instead.
         """
-        if not text:
-            return text
-        if not width or width < 1:
-            raise ValueError(f"An invalid width value of [{width}] was provided.")
-        if wrap_width and wrap_width < width:
-            raise ValueError(f"Wrap width [{wrap_width}] cannot be less than centering width [{width}].")
-        return "\n".join([
-            x.center(width).rstrip()
-            for x in textwrap.wrap(text, wrap_width or width)
-        ])
+        return layout.centered_wrap(text, width, wrap_width)
 
     @staticmethod
     def layout(items: list[str], width: int, spacing: int = 0) -> str:
@@ -1,4 +1,5 @@
+from nfog.templates.Declarative import DeclarativeTemplate
 from nfog.templates.Group import TemplateGroup
 from nfog.templates.Template import Template
 
-__ALL__ = (Template, TemplateGroup)
+__ALL__ = (Template, DeclarativeTemplate, TemplateGroup)
@@ -0,0 +1,317 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class Span:
+    """A named, timed phase of a generation."""
+
+    __slots__ = ("name", "start", "end", "thread", "depth", "args", "memory_start", "memory_peak", "memory_end")
+
+    def __init__(self, name: str, start: float, thread: int, depth: int, args: dict[str, Any]):
+        self.name = name
+        self.start = start
+        self.end = start
+        self.thread = thread
+        self.depth = depth
+        self.args = args
+        # traced memory in bytes, only recorded while memory profiling
+        self.memory_start = 0
+        self.memory_peak = 0
+        self.memory_end = 0
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+    @property
+    def peak(self) -> int:
+        """Bytes allocated at the highest point of the span, on top of what was allocated before it."""
+        return max(self.memory_peak - self.memory_start, 0)
+
+    @property
+    def retained(self) -> int:
+        """Bytes still allocated after the span that were not allocated before it."""
+        return self.memory_end - self.memory_start
+
+
+def format_bytes(size: float) -> str:
+    """Format a (possibly negative) amount of bytes with binary units, e.g., '1.50 MiB'."""
+    for unit in ("B", "KiB", "MiB"):
+        if abs(size) < 1024:
+            return f"{size:.2f} {unit}" if unit != "B" else f"{size:.0f} B"
+        size /= 1024
+    return f"{size:.2f} GiB"
+
+
+class Timings:
+    """
+    Recorder of the timed spans of a generation, e.g., probing, metadata requests, and rendering.
+
+    Recording is off until `enable()` is called, which starts a recording for the
+    current context only, so generations running at the same time, e.g., with
+    `generate_many()`, each record their own spans. `span()` costs next to nothing
+    while there's no recording, so phases can be instrumented wherever they happen.
+    Spans on background threads are recorded when their function is `bind()`-ed.
+
+    With memory profiling enabled, tracemalloc also records the peak and retained
+    memory of each span. The peak is process-wide, so it includes allocations made
+    by other threads during the span. Tracing is shared by every recording that
+    profiles memory, and only stopped once the last of them stops, unless it was
+    already started by someone else. While several recordings profile memory at
+    once, the peak can't be reset for each span, so peaks are upper bounds.
+    """
+
+    _tracers = 0  # recordings tracing memory
+    _started = False  # if tracing was started by a recording, rather than already on
+    _tracers_lock = threading.Lock()
+
+    def __init__(self) -> None:
+        self.memory = False
+        self.origin = time.perf_counter()
+        self.epoch = time.time()  # so traces of separate processes line up
+        self._spans: list[Span] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+
+    @classmethod
+    def current(cls) -> Optional[Timings]:
+        """Get the recording of the current context, or None if it's not recording."""
+        return _current.get()
+
+    @classmethod
+    def enable(cls, memory: bool = False) -> Timings:
+        """
+        Start recording in the current context, or get its ongoing recording.
+        If `memory` is set, memory usage is traced too, adding to an ongoing recording.
+        """
+        timings = _current.get()
+        if timings is None:
+            timings = cls()
+            _current.set(timings)
+        if memory:
+            timings.trace_memory()
+        return timings
+
+    @classmethod
+    def disable(cls) -> None:
+        """Stop recording in the current context, including memory tracing."""
+        timings = _current.get()
+        if timings:
+            timings.stop()
+            _current.set(None)
+
+    @staticmethod
+    def bind(func: Callable[..., T]) -> Callable[..., T]:
+        """Bind a function to the current recording, so its spans are recorded when called on another thread."""
+        timings = _current.get()
+        if timings is None:
+            return func
+
+        @wraps(func)
+        def run(*args: Any, **kwargs: Any) -> T:
+            token = _current.set(timings)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _current.reset(token)
+
+        return run
+
+    def trace_memory(self) -> None:
+        """Trace memory usage of the spans recorded from now on."""
+        with self._lock:
+            if self.memory:
+                return
+            with Timings._tracers_lock:
+                if not Timings._tracers and not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    Timings._started = True
+                Timings._tracers += 1
+            self._snapshot = tracemalloc.take_snapshot()
+            self.memory = True
+
+    def stop(self) -> None:
+        """Stop tracing memory, unless other recordings still are. Recorded spans are kept."""
+        with self._lock:
+            if not self.memory:
+                return
+            self.memory = False
+            with Timings._tracers_lock:
+                Timings._tracers -= 1
+                if not Timings._tracers and Timings._started:
+                    tracemalloc.stop()
+                    Timings._started = False
+
+    def spans(self) -> list[Span]:
+        with self._lock:
+            return list(self._spans)
+
+    @contextmanager
+    def record(self, name: str, **args: Any) -> Iterator[Span]:
+        """Time the code within the context as a span named `name`, see `span()`."""
+        stack: list[Span] = self._local.__dict__.setdefault("stack", [])
+        span = Span(name, time.perf_counter(), threading.get_ident(), len(stack), args)
+        memory = self.memory
+        if memory:
+            self._start_memory(span, stack[-1] if stack else None)
+        stack.append(span)
+        try:
+            yield span
+        finally:
+            stack.pop()
+            if memory:
+                self._end_memory(span, stack[-1] if stack else None)
+            span.end = time.perf_counter()
+            with self._lock:
+                self._spans.append(span)
+
+    @staticmethod
+    def _start_memory(span: Span, parent: Optional[Span]) -> None:
+        current, peak = tracemalloc.get_traced_memory()
+        if parent:
+            # the peak is about to be reset, keep it for the enclosing span first
+            parent.memory_peak = max(parent.memory_peak, peak)
+        # resetting it would lose the peaks of the spans of other recordings
+        if hasattr(tracemalloc, "reset_peak") and Timings._tracers == 1:  # Python 3.9+
+            tracemalloc.reset_peak()
+            peak = current
+        span.memory_start = current
+        span.memory_peak = peak
+
+    @staticmethod
+    def _end_memory(span: Span, parent: Optional[Span]) -> None:
+        if not tracemalloc.is_tracing():
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        span.memory_end = current
+        span.memory_peak = max(span.memory_peak, peak)
+        if parent:
+            parent.memory_peak = max(parent.memory_peak, span.memory_peak)
+        span.args.update(memory_peak=span.peak, memory_retained=span.retained)
+
+    def summary(self) -> str:
+        """
+        Get a breakdown of the time spent per span name, in the order they started.
+        Spans on background threads overlap with others, so totals can add up to more
+        than the wall time.
+        """
+        spans = sorted(self.spans(), key=lambda x: x.start)
+        wall = time.perf_counter() - self.origin
+
+        totals: OrderedDict[str, list[Any]] = OrderedDict()
+        for span in spans:
+            total = totals.setdefault(span.name, [span.depth, 0, 0.0])
+            total[1] += 1
+            total[2] += span.duration
+
+        width = max([len(name) + depth * 2 for name, (depth, _, _) in totals.items()] + [5])
+        lines = [f"Timings ({wall:.3f}s wall time):"]
+        for name, (depth, count, seconds) in totals.items():
+            lines.append(
+                f"  {'  ' * depth}{name:{width - depth * 2}}  {count:>4}x  {seconds:>8.3f}s  "
+                f"{seconds / wall * 100 if wall else 0:>5.1f}%"
+            )
+        return "\n".join(lines)
+
+    def memory_summary(self, top: int = 10) -> str:
+        """
+        Get the peak and retained memory per span name, in the order they started,
+        and the code that allocated the most memory still retained since profiling started.
+        Repeated spans are reported with their highest peak and their total retained memory.
+        """
+        if not self.memory or self._snapshot is None:
+            return "Memory was not profiled."
+
+        totals: OrderedDict[str, list[Any]] = OrderedDict()
+        for span in sorted(self.spans(), key=lambda x: x.start):
+            total = totals.setdefault(span.name, [span.depth, 0, 0])
+            total[1] = max(total[1], span.peak)
+            total[2] += span.retained
+
+        width = max([len(name) + depth * 2 for name, (depth, _, _) in totals.items()] + [5])
+        lines = [f"Memory ({format_bytes(tracemalloc.get_traced_memory()[0])} traced):"]
+        for name, (depth, peak, retained) in totals.items():
+            lines.append(
+                f"  {'  ' * depth}{name:{width - depth * 2}}  peak {format_bytes(peak):>11}  "
+                f"retained {format_bytes(retained):>11}"
+            )
+
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+            tracemalloc.Filter(False, "<unknown>")
+        ))
+        lines.append(f"Top {top} allocation sites (retained):")
+        for stat in snapshot.compare_to(self._snapshot, "lineno")[:top]:
+            frame = stat.traceback[0]
+            lines.append(
+                f"  {format_bytes(stat.size_diff):>11}  {stat.count_diff:>+7} blocks  {frame.filename}:{frame.lineno}"
+            )
+        return "\n".join(lines)
+
+    def write_trace(self, path: Path, **args: Any) -> None:
+        """
+        Append the recorded spans to a trace file in Chrome's JSON Array Format.
+
+        The file can be opened in chrome://tracing or https://ui.perfetto.dev. Every
+        event is written on its own line and the array is never closed, which the
+        format allows, so multiple generations and processes can append to the same
+        file. Keyword arguments are added to every event, e.g., the file name.
+        """
+        pid = os.getpid()
+        events = [
+            {
+                "name": span.name,
+                "cat": span.name.split(".")[0],
+                "ph": "X",
+                "ts": round((self.epoch + span.start - self.origin) * 1e6, 3),
+                "dur": round(span.duration * 1e6, 3),
+                "pid": pid,
+                "tid": span.thread,
+                "args": {**args, **span.args}
+            }
+            for span in sorted(self.spans(), key=lambda x: x.start)
+        ]
+        if not events:
+            return
+
+        data = "".join(f"{json.dumps(event, default=str)},\n" for event in events)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a", encoding="utf8") as f:
+            if f.tell() == 0:
+                data = f"[\n{data}"
+            f.write(data)
+
+
+_current: ContextVar[Optional[Timings]] = ContextVar("timings", default=None)
+
+
+@contextmanager
+def span(name: str, **args: Any) -> Iterator[Optional[Span]]:
+    """
+    Time the code within the context as a span named `name`, if the current context is recording.
+    Any keyword arguments are stored with the span, e.g., the URL of a request.
+    """
+    timings = _current.get()
+    if timings is None:
+        yield None
+        return
+    with timings.record(name, **args) as span_:
+        yield span_
+
+
+__ALL__ = (Span, Timings, format_bytes, span)
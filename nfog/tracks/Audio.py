@@ -4,6 +4,7 @@ from pathlib import Path
 
 import pymediainfo
 
+from nfog.probe import PROBE_MODE
 from nfog.tracks.BaseTrack import BaseTrack
 
 
@@ -12,8 +13,8 @@ class Audio(BaseTrack):
         "LFE": 0.1
     }
 
-    def __init__(self, track: pymediainfo.Track, path: Path):
-        super().__init__(track, path)
+    def __init__(self, track: pymediainfo.Track, path: Path, probe_mode: str = PROBE_MODE):
+        super().__init__(track, path, probe_mode)
 
     @property
     def codec(self) -> str:
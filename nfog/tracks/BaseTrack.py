@@ -8,28 +8,50 @@ from typing import Any, Optional
 import pymediainfo
 from langcodes import Language
 
+from nfog.analyzers.Matroska import BlockScanner, format_bitrate, get_block_stats
+from nfog.analyzers.Pipeline import want
+from nfog.analyzers.TransportStream import PIDProfile, get_packet_stats
+from nfog.config import config
+from nfog.probe import PROBE_MODE
+
 
 class BaseTrack:
     ALPHA_NUMERIC_RE = re.compile(r"[\W]+")
+    MATROSKA_EXTENSIONS = (".mkv", ".mka", ".mks", ".mk3d", ".webm")
+    TRANSPORT_STREAM_EXTENSIONS = (".ts", ".m2ts", ".mts", ".m2t", ".tp", ".trp")
+    # properties that may read the whole file, left out of `all_properties`
+    SCANNED_PROPERTIES = (
+        "bit_rate", "bitrate", "peak_bitrate", "bitrate_histogram", "block_stats", "packet_stats", "scan"
+    )
 
     """Track to aide in overriding properties of a PyMediaInfo Track instance."""
-    def __init__(self, track: pymediainfo.Track, path: Path):
+    def __init__(self, track: pymediainfo.Track, path: Path, probe_mode: str = PROBE_MODE):
         self._x = track
         self._path = path
-        # common shorthands
-        self.bitrate = self._x.other_bit_rate[0]
+        # a 'fast' probe skips the full-file scans, see `unscanned`
+        self._probe_mode = probe_mode
+        if probe_mode != "fast" and self._wants_scan("block-bitrates", self.MATROSKA_EXTENSIONS):
+            # scanned in the same pass as any other analysis of the file, e.g., its checksums
+            want(path, [BlockScanner.NAME])
+        if probe_mode != "fast" and self._wants_scan("packet-bitrates", self.TRANSPORT_STREAM_EXTENSIONS):
+            # profiled in the same pass as any other analysis of the file, e.g., its MPEG-2 scan type
+            want(path, [PIDProfile.NAME])
 
     def __getattr__(self, name: str) -> Any:
         return getattr(self._x, name)
 
     @property
     def all_properties(self) -> defaultdict[str, Any]:
-        """Get all non-callable attributes from this and it's sub-track object."""
+        """
+        Get all non-callable attributes from this and it's sub-track object.
+        Properties that may scan the whole file, e.g., `bit_rate`, are left as MediaInfo's
+        values, if any, see `SCANNED_PROPERTIES`, so dumping a track never reads the file.
+        """
         props = defaultdict(lambda: None)
 
         for obj in (self, self._x):
             for k, v in obj.__dict__.items():
-                if k in ("_x", "_path"):
+                if k in ("_x", "_path", "_probe_mode"):
                     continue
                 props[k] = v
 
@@ -37,12 +59,99 @@ class BaseTrack:
             for k, v in vars(subclass).items():
                 if not isinstance(v, property):
                     continue
-                if k in ("all_properties",):
+                if k == "all_properties" or k in self.SCANNED_PROPERTIES:
                     continue
                 props[k] = getattr(self, k)
 
         return props
 
+    @property
+    def bit_rate(self) -> Optional[int]:
+        """
+        Get the average bitrate in bits/s.
+        Matroska tracks without one, e.g., missing BPS tags, or with `analyzers.block-bitrates`
+        set to 'always' in the config, use the sizes of the track's blocks instead. Likewise,
+        transport stream tracks use the payload bytes of the PID's packets, see `packet_stats`.
+        Fast probes skip those scans, leaving MediaInfo's estimate, if any, see `unscanned`.
+        """
+        stats = self.block_stats or self.packet_stats
+        if stats and stats["bitrate"]:
+            return stats["bitrate"]
+        if not self._x.bit_rate:
+            return None
+        # e.g., '4000000 / 3000000' for multiple values, the first is of the track itself
+        return int(float(str(self._x.bit_rate).split(" / ")[0]))
+
+    @property
+    def bitrate(self) -> Optional[str]:
+        """Get the average bitrate in human-readable form, e.g., '6 542 kb/s'."""
+        if not (self.block_stats or self.packet_stats) and self._x.other_bit_rate:
+            return self._x.other_bit_rate[0]
+        bit_rate = self.bit_rate
+        return format_bitrate(bit_rate) if bit_rate else None
+
+    @property
+    def peak_bitrate(self) -> Optional[str]:
+        """
+        Get the highest bitrate over a second (`analyzers.peak-window`) in human-readable form.
+        Only available for Matroska and transport stream tracks using the sizes of their
+        blocks or packets, see `bit_rate`. Transport streams always measure over a second.
+        """
+        stats = self.block_stats or self.packet_stats
+        return format_bitrate(stats["peak_bitrate"]) if stats else None
+
+    @property
+    def bitrate_histogram(self) -> Optional[list[int]]:
+        """
+        Get the bitrate in bits/s of every second of the track, from the start of the file.
+        Only available for transport stream tracks using the payload bytes of their packets.
+        """
+        stats = self.packet_stats
+        return stats["histogram"] if stats else None
+
+    @property
+    def block_stats(self) -> Optional[dict[str, Any]]:
+        """
+        Get the statistics of the track's blocks in a Matroska file, see `BlockScanner`, if
+        used for the bitrate. Only block headers are read, once per file, and only if needed.
+        """
+        if self._probe_mode == "fast" or not self._wants_scan("block-bitrates", self.MATROSKA_EXTENSIONS):
+            return None
+        return (get_block_stats(self._path) or {}).get(int(self._x.track_id))
+
+    @property
+    def packet_stats(self) -> Optional[dict[str, Any]]:
+        """
+        Get the statistics of the track's packets in a transport stream (TS or M2TS), see
+        `PIDProfile`, if used for the bitrate, per `analyzers.packet-bitrates` in the config
+        like `block_stats`. The track ID MediaInfo reports for transport streams is the PID.
+        Requires NumPy, otherwise MediaInfo's bitrate is used.
+        """
+        if self._probe_mode == "fast" or not self._wants_scan("packet-bitrates", self.TRANSPORT_STREAM_EXTENSIONS):
+            return None
+        return (get_packet_stats(self._path) or {}).get(int(str(self._x.track_id).split(" ")[0]))
+
+    @property
+    def unscanned(self) -> list[str]:
+        """
+        Get the fields a fast probe didn't scan the whole file for, which are left as
+        MediaInfo's estimate from the start of the stream, or unset, e.g., 'bit_rate'.
+        """
+        if self._probe_mode != "fast":
+            return []
+        if self._wants_scan("block-bitrates", self.MATROSKA_EXTENSIONS):
+            return ["bit_rate", "peak_bitrate"]
+        if self._wants_scan("packet-bitrates", self.TRANSPORT_STREAM_EXTENSIONS):
+            return ["bit_rate", "peak_bitrate", "bitrate_histogram"]
+        return []
+
+    def _wants_scan(self, option: str, extensions: tuple[str, ...]) -> bool:
+        """Check if the bitrate is measured by scanning the file, per `analyzers.<option>` in the config."""
+        mode = config.get("analyzers", {}).get(option, "missing")
+        if mode == "never" or (mode == "missing" and self._x.bit_rate):
+            return False
+        return self._path.suffix.lower() in extensions and bool(self._x.track_id)
+
     @property
     def language(self) -> Optional[Language]:
         """
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+from collections import Counter
+from pathlib import Path
+from statistics import median
+from typing import Iterable, Iterator, Optional, Tuple
+
+from pymediainfo import MediaInfo
+
+from nfog.probe import PROBE_MODE, probe_many
+from nfog.timing import span
+from nfog.tracks.Audio import Audio
+from nfog.tracks.BaseTrack import BaseTrack
+from nfog.tracks.Subtitle import Subtitle
+from nfog.tracks.Video import Video
+
+Signature = Tuple[str, ...]
+
+
+class Episode:
+    """Tracks and size information of a single file within a multi-file release."""
+
+    def __init__(self, path: Path, media_info: MediaInfo, probe_mode: str = PROBE_MODE):
+        self.path = path
+        self.media_info = media_info
+        self.video_tracks = [Video(x, path, probe_mode) for x in media_info.video_tracks]
+        self.audio_tracks = [Audio(x, path, probe_mode) for x in media_info.audio_tracks]
+        self.text_tracks = [Subtitle(x, path, probe_mode) for x in media_info.text_tracks]
+
+        general = next(iter(media_info.general_tracks), None)
+        self.size: int = int(general.file_size or 0) if general else path.stat().st_size
+        self.duration: float = float(general.duration or 0) / 1000 if general else 0.0
+
+    def __repr__(self) -> str:
+        return f"Episode({self.path.name!r})"
+
+    @property
+    def name(self) -> str:
+        return self.path.stem
+
+    @property
+    def tracks(self) -> list[BaseTrack]:
+        return [*self.video_tracks, *self.audio_tracks, *self.text_tracks]
+
+    @property
+    def layout(self) -> Counter[Signature]:
+        """Count of each kind of track in this episode."""
+        return Counter(Episodes.signature(x) for x in self.tracks)
+
+
+class Episodes:
+    """
+    Aggregated track information over every file of a multi-file release.
+
+    Tracks are compared by their signature (type, language, codec, channels,
+    and title) rather than by exact properties like bitrate, so that a track
+    can be matched across episodes even when its bitrate varies.
+    """
+
+    def __init__(self, episodes: Iterable[Episode]):
+        self.episodes = list(episodes)
+        if not self.episodes:
+            raise ValueError("At least one episode is required.")
+
+    @classmethod
+    def from_files(cls, files: Iterable[Path], workers: Optional[int] = None, mode: str = PROBE_MODE) -> Episodes:
+        """Probe all files concurrently and aggregate their tracks."""
+        files = list(files)
+        media_infos = probe_many(files, workers, mode)
+        with span("tracks", files=len(files)):
+            return cls(Episode(path, media_info, mode) for path, media_info in zip(files, media_infos))
+
+    def __iter__(self) -> Iterator[Episode]:
+        return iter(self.episodes)
+
+    def __len__(self) -> int:
+        return len(self.episodes)
+
+    @staticmethod
+    def signature(track: BaseTrack) -> Signature:
+        """Get a signature identifying what kind of track this is, ignoring per-file values."""
+        return (
+            track.track_type,
+            str(track.language or ""),
+            track.codec,
+            str(track.channels) if isinstance(track, Audio) else "",
+            track.title or ""
+        )
+
+    @property
+    def representative(self) -> Episode:
+        """The first episode with the most common track layout of the release."""
+        layouts = Counter(tuple(sorted(x.layout.elements())) for x in self.episodes)
+        common_layout = layouts.most_common(1)[0][0]
+        return next(x for x in self.episodes if tuple(sorted(x.layout.elements())) == common_layout)
+
+    @property
+    def common(self) -> list[BaseTrack]:
+        """Tracks of the representative episode that are available in every episode."""
+        shared = self.episodes[0].layout
+        for episode in self.episodes[1:]:
+            shared &= episode.layout
+        common = []
+        for track in self.representative.tracks:
+            signature = self.signature(track)
+            if shared[signature]:
+                shared[signature] -= 1
+                common.append(track)
+        return common
+
+    def missing(self, episode: Episode) -> list[BaseTrack]:
+        """Tracks of the representative episode that the episode does not have."""
+        missing = self.representative.layout - episode.layout
+        return [x for x in self.representative.tracks if missing[self.signature(x)]]
+
+    def extra(self, episode: Episode) -> list[BaseTrack]:
+        """Tracks of the episode that the representative episode does not have."""
+        extra = episode.layout - self.representative.layout
+        return [x for x in episode.tracks if extra[self.signature(x)]]
+
+    @property
+    def outliers(self) -> dict[Episode, tuple[list[BaseTrack], list[BaseTrack]]]:
+        """Episodes with a different track layout, mapped to their missing and extra tracks."""
+        return {
+            episode: (self.missing(episode), self.extra(episode))
+            for episode in self.episodes
+            if episode.layout != self.representative.layout
+        }
+
+    @property
+    def total_size(self) -> int:
+        """Total size of all episodes in bytes."""
+        return sum(x.size for x in self.episodes)
+
+    @property
+    def total_duration(self) -> float:
+        """Total runtime of all episodes in seconds."""
+        return sum(x.duration for x in self.episodes)
+
+    def bitrates(self, track: BaseTrack) -> dict[Episode, int]:
+        """Get the bitrate in bits/s of tracks matching the provided track in each episode."""
+        signature = self.signature(track)
+        bitrates = {}
+        for episode in self.episodes:
+            match = next((x for x in episode.tracks if self.signature(x) == signature), None)
+            if match and match.bit_rate:
+                bitrates[episode] = int(match.bit_rate)
+        return bitrates
+
+    def bitrate_range(self, track: BaseTrack) -> Optional[tuple[int, int]]:
+        """Get the lowest and highest bitrate in bits/s of the provided track across episodes."""
+        bitrates = self.bitrates(track).values()
+        if not bitrates:
+            return None
+        return min(bitrates), max(bitrates)
+
+    def bitrate_outliers(self, track: BaseTrack, threshold: float = 0.25) -> dict[Episode, int]:
+        """Get episodes where the track's bitrate deviates from the median by more than `threshold`."""
+        bitrates = self.bitrates(track)
+        if not bitrates:
+            return {}
+        middle = median(bitrates.values())
+        return {
+            episode: bitrate
+            for episode, bitrate in bitrates.items()
+            if abs(bitrate - middle) > middle * threshold
+        }
+
+
+__ALL__ = (Episode, Episodes)
@@ -4,12 +4,13 @@ from pathlib import Path
 
 import pymediainfo
 
+from nfog.probe import PROBE_MODE
 from nfog.tracks.BaseTrack import BaseTrack
 
 
 class Subtitle(BaseTrack):
-    def __init__(self, track: pymediainfo.Track, path: Path):
-        super().__init__(track, path)
+    def __init__(self, track: pymediainfo.Track, path: Path, probe_mode: str = PROBE_MODE):
+        super().__init__(track, path, probe_mode)
 
     @property
     def codec(self) -> str:
@@ -1,10 +1,13 @@
 from __future__ import annotations
 
 from pathlib import Path
+from typing import Optional
 
 import pymediainfo
-from pyd2v import D2V
 
+from nfog.analyzers import analyze, want
+from nfog.cache import Cache
+from nfog.probe import PROBE_MODE
 from nfog.tracks.BaseTrack import BaseTrack
 
 
@@ -17,8 +20,8 @@ class Video(BaseTrack):
         "Dolby Vision": "DV"
     }
 
-    def __init__(self, track: pymediainfo.Track, path: Path):
-        super().__init__(track, path)
+    def __init__(self, track: pymediainfo.Track, path: Path, probe_mode: str = PROBE_MODE):
+        super().__init__(track, path, probe_mode)
         # quick shorthands
         self.profile = self._x.format_profile
         self.dar = self._x.other_display_aspect_ratio[0]
@@ -26,6 +29,8 @@ class Video(BaseTrack):
             self.fps = f"{self._x.framerate_num}/{self._x.framerate_den}"
         else:
             self.fps = self._x.frame_rate
+        if self.codec in ["MPEG-1", "MPEG-2"] and probe_mode != "fast":
+            want(path, ["mpeg-scan"])
 
     @property
     def codec(self) -> str:
@@ -57,7 +62,8 @@ class Video(BaseTrack):
     def scan(self) -> str:
         """
         Get video scan type in string form.
-        Will accurately check using DGIndex if codec is MPEG-1/2.
+        Will accurately check the progressive frame flags of every picture if codec is MPEG-1/2,
+        unless the file was fast probed, see `unscanned`.
 
         Examples:
             'Interlaced'
@@ -71,23 +77,36 @@ class Video(BaseTrack):
             # some videos may not state scan, assume progressive
             scan_type = "Progressive"
 
-        if self.codec in ["MPEG-1", "MPEG-2"]:
-            d2v = D2V.load(self._path)
-            for ext in ("log", "d2v", "mpg", "mpeg"):
-                d2v.path.with_suffix(f".{ext}").unlink(missing_ok=True)
-
-            flags = [
-                dict(**flag, vob=d["vob"], cell=d["cell"])
-                for d in d2v.data
-                for flag in d["flags"]
-            ]
-            progressive_frames = sum(f["progressive_frame"] for f in flags)
-            progressive_percent = (progressive_frames / len(flags)) * 100
-            is_constant = progressive_percent in (0.0, 100.0)
-
-            scan_type = ["Interlaced", "Progressive"][progressive_percent >= 50.0]
-            if not is_constant:
-                scan_type = f"{progressive_percent:.2f}% {scan_type} (VST)"
+        if self.codec in ["MPEG-1", "MPEG-2"] and self._probe_mode != "fast":
+            # the whole file is read, so its result is kept for other outputs and snapshots
+            scan_type = Cache.get("scan", self.scan_key, self._get_mpeg_scan) or scan_type
+
+        return scan_type
+
+    @property
+    def unscanned(self) -> list[str]:
+        fields = super().unscanned
+        if self._probe_mode == "fast" and self.codec in ["MPEG-1", "MPEG-2"]:
+            fields.append("scan_type")
+        return fields
+
+    @property
+    def scan_key(self) -> tuple[str, int, int]:
+        """Key of the MPEG-1/2 scan type in the Cache: the file path, track ID, and stream size."""
+        return str(self._path), self._x.track_id, self._x.stream_size
+
+    def _get_mpeg_scan(self) -> Optional[str]:
+        """Get the scan type of an MPEG-1/2 stream from its progressive frame flags, see `MPEGScan`."""
+        frames = analyze(self._path, ["mpeg-scan"])["mpeg-scan"]
+        if not frames["frames"]:
+            return None
+
+        progressive_percent = (frames["progressive"] / frames["frames"]) * 100
+        is_constant = progressive_percent in (0.0, 100.0)
+
+        scan_type = ["Interlaced", "Progressive"][progressive_percent >= 50.0]
+        if not is_constant:
+            scan_type = f"{progressive_percent:.2f}% {scan_type} (VST)"
 
         return scan_type
 
@@ -1,6 +1,7 @@
 from nfog.tracks import BaseTrack
 from nfog.tracks.Audio import Audio
+from nfog.tracks.Episodes import Episode, Episodes
 from nfog.tracks.Subtitle import Subtitle
 from nfog.tracks.Video import Video
 
-__ALL__ = (BaseTrack, Video, Audio, Subtitle)
+__ALL__ = (BaseTrack, Video, Audio, Subtitle, Episode, Episodes)
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from nfog.constants import MEDIA_EXTENSIONS
+
+
+class Inotify:
+    """Minimal ctypes binding to Linux's inotify, recursively watching directories."""
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_ISDIR = 0x40000000
+    MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+    EVENT = struct.Struct("iIII")
+
+    def __init__(self) -> None:
+        libc_name = ctypes.util.find_library("c")
+        if not libc_name:
+            raise OSError("Could not find the C library, inotify is unavailable.")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches: dict[int, Path] = {}
+
+    def add(self, directory: Path) -> None:
+        """Watch a directory and all of its sub-directories."""
+        for path in (directory, *(x for x in directory.rglob("*") if x.is_dir())):
+            wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), self.MASK)
+            if wd < 0:
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+            self.watches[wd] = path
+
+    def read(self, timeout: float) -> list[Path]:
+        """Wait up to `timeout` seconds for events and return the paths of changed files."""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        paths: list[Path] = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = self.EVENT.unpack_from(data, offset)
+            offset += self.EVENT.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if wd not in self.watches or not name:
+                continue
+            path = self.watches[wd] / os.fsdecode(name)
+            if mask & self.IN_ISDIR:
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                    # files may have landed before the watch was added
+                    self.add(path)
+                    paths.extend(x for x in path.rglob("*") if x.is_file())
+                continue
+            paths.append(path)
+
+        return paths
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class Watcher:
+    """
+    Watch directories for new or changed media files.
+
+    Iterating a Watcher blocks forever, yielding each media file once it has
+    finished being written. Files are considered finished once their size has
+    not changed for `settle` seconds, which debounces partially written and
+    still-copying files.
+
+    Uses inotify on Linux, falling back to polling the directory tree every
+    `interval` seconds elsewhere or when inotify is unavailable.
+    """
+
+    def __init__(
+        self,
+        directories: Iterable[Path],
+        extensions: Optional[Iterable[str]] = None,
+        settle: float = 5.0,
+        interval: float = 1.0,
+        poll: bool = False,
+        existing: bool = False
+    ):
+        self.directories = [Path(x) for x in directories]
+        for directory in self.directories:
+            if not directory.is_dir():
+                raise NotADirectoryError(f"The provided path ({directory}) is not a directory.")
+        self.extensions = tuple(x.lower() for x in (extensions or MEDIA_EXTENSIONS))
+        self.settle = settle
+        self.interval = interval
+        self.existing = existing
+
+        self._inotify: Optional[Inotify] = None
+        if not poll and sys.platform.startswith("linux"):
+            try:
+                self._inotify = Inotify()
+                for directory in self.directories:
+                    self._inotify.add(directory)
+            except OSError as e:
+                print(f"Warning: Could not use inotify ({e}), falling back to polling.")
+                self._inotify = None
+
+        # path -> (size, monotonic time of last size change)
+        self._pending: dict[Path, tuple[int, float]] = {}
+        self._seen: dict[Path, tuple[int, int]] = {}
+
+    @property
+    def mode(self) -> str:
+        """The method used to detect changes, either 'inotify' or 'polling'."""
+        return "inotify" if self._inotify else "polling"
+
+    def __iter__(self) -> Iterator[Path]:
+        for path in self._scan():
+            if self.existing:
+                self._touch(path)
+            else:
+                self._seen[path] = self._signature(path)
+
+        try:
+            while True:
+                if self._inotify:
+                    changed = self._inotify.read(self.interval)
+                else:
+                    time.sleep(self.interval)
+                    changed = [
+                        path
+                        for path in self._scan()
+                        if self._seen.get(path) != self._signature(path)
+                    ]
+
+                for path in changed:
+                    if self._is_media(path):
+                        self._touch(path)
+
+                yield from self._settled()
+        finally:
+            if self._inotify:
+                self._inotify.close()
+
+    def _scan(self) -> Iterator[Path]:
+        for directory in self.directories:
+            for path in directory.rglob("*"):
+                if self._is_media(path) and path.is_file():
+                    yield path
+
+    def _is_media(self, path: Path) -> bool:
+        return path.suffix.lower() in self.extensions
+
+    @staticmethod
+    def _signature(path: Path) -> tuple[int, int]:
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return -1, -1
+        return stat.st_size, stat.st_mtime_ns
+
+    def _touch(self, path: Path) -> None:
+        size = self._signature(path)[0]
+        if path not in self._pending or self._pending[path][0] != size:
+            self._pending[path] = (size, time.monotonic())
+
+    def _settled(self) -> Iterator[Path]:
+        now = time.monotonic()
+        for path, (size, since) in list(self._pending.items()):
+            current = self._signature(path)
+            if current[0] < 0:
+                # deleted or moved away before it settled
+                del self._pending[path]
+                continue
+            if current[0] != size:
+                self._pending[path] = (current[0], now)
+                continue
+            if size and now - since >= self.settle:
+                del self._pending[path]
+                self._seen[path] = current
+                yield path
+
+
+__ALL__ = (Inotify, Watcher)
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+from typing import IO, Iterable, List, Tuple
+
+Target = Tuple[Path, str]  # path, encoding
+
+
+def same_content(a: Path, b: Path, chunk_size: int = 64 * 1024) -> bool:
+    """Check if two files have the same bytes, reading them in chunks."""
+    if a.stat().st_size != b.stat().st_size:
+        return False
+    with open(a, "rb") as fa, open(b, "rb") as fb:
+        while True:
+            chunk = fa.read(chunk_size)
+            if chunk != fb.read(chunk_size):
+                return False
+            if not chunk:
+                return True
+
+
+def write_lines(lines: Iterable[str], *targets: Target) -> List[bool]:
+    """
+    Write NFO lines to one or more files as they are generated, see `Template.lines()`.
+
+    Every line is encoded and written to a temporary file next to each target as
+    it comes in, so multiple outputs are written from one pass over the lines,
+    without ever holding the whole NFO in memory. A target is only replaced (by
+    renaming the temporary file) once its NFO is complete and different from it,
+    so an unchanged NFO keeps its modification time and a failed render never
+    leaves a partial NFO behind.
+
+    Returns whether each target was changed.
+    """
+    suffix = f".{os.getpid()}-{threading.get_ident()}.tmp"
+    temps = [path.with_name(f".{path.name}{suffix}") for path, _ in targets]
+    files: list[IO[str]] = []
+    try:
+        for temp, (_, encoding) in zip(temps, targets):
+            files.append(open(temp, "w", encoding=encoding))
+        first = True
+        for line in lines:
+            if not first:
+                line = f"\n{line}"
+            first = False
+            for f in files:
+                f.write(line)
+        for f in files:
+            f.close()
+
+        changed = []
+        for temp, (path, _) in zip(temps, targets):
+            if path.is_file() and same_content(temp, path):
+                temp.unlink()
+                changed.append(False)
+            else:
+                temp.replace(path)
+                changed.append(True)
+        return changed
+    finally:
+        for f in files:
+            f.close()
+        for temp in temps:
+            if temp.exists():
+                temp.unlink()
+
+
+__ALL__ = (Target, same_content, write_lines)